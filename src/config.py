@@ -49,6 +49,100 @@ MIN_PRINT_SUITABILITY = float(os.getenv('MIN_PRINT_SUITABILITY', '0.4'))
 USE_ENHANCED_FILTERING = os.getenv('USE_ENHANCED_FILTERING', 'true').lower() == 'true'
 USE_GCS = os.getenv('USE_GCS', 'false').lower() == 'true'
 
+# Image download concurrency
+# Total downloads in flight, and the cap per CDN host
+DOWNLOAD_MAX_WORKERS = int(os.getenv('DOWNLOAD_MAX_WORKERS', '8'))
+DOWNLOAD_MAX_PER_HOST = int(os.getenv('DOWNLOAD_MAX_PER_HOST', '4'))
+# Downloaded image bytes kept in memory for the enhanced filter; images past this are read back from disk
+DOWNLOAD_IMAGE_CACHE_MB = int(os.getenv('DOWNLOAD_IMAGE_CACHE_MB', '256'))
+
+# Shared HTTP session retry policy (retries on timeouts and 429/5xx)
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+HTTP_BACKOFF_JITTER = float(os.getenv('HTTP_BACKOFF_JITTER', '0.5'))
+
+# Reject portrait/square images from their header (or Apify dimensions) before a full download
+PROBE_DIMENSIONS_BEFORE_DOWNLOAD = os.getenv('PROBE_DIMENSIONS_BEFORE_DOWNLOAD', 'true').lower() == 'true'
+
+# Reject images whose shorter side is below this many pixels before any analysis (0 disables)
+MIN_IMAGE_SHORT_EDGE = int(os.getenv('MIN_IMAGE_SHORT_EDGE', '0'))
+
+# Google Vision batching (images per batch_annotate_images request, max 16) and concurrent requests
+VISION_BATCH_SIZE = int(os.getenv('VISION_BATCH_SIZE', '16'))
+VISION_BATCH_CONCURRENCY = int(os.getenv('VISION_BATCH_CONCURRENCY', '4'))
+
+# Vision upload payloads are downscaled to this long edge (0 disables) and re-encoded as JPEG
+VISION_MAX_EDGE = int(os.getenv('VISION_MAX_EDGE', '1024'))
+VISION_JPEG_QUALITY = int(os.getenv('VISION_JPEG_QUALITY', '85'))
+
+# Persistent Vision result cache, keyed by image content hash and feature set
+VISION_CACHE_ENABLED = os.getenv('VISION_CACHE_ENABLED', 'true').lower() == 'true'
+VISION_CACHE_PATH = os.getenv('VISION_CACHE_PATH', os.path.join('data', 'cache', 'vision_results.db'))
+VISION_CACHE_MAX_ENTRIES = int(os.getenv('VISION_CACHE_MAX_ENTRIES', '50000'))
+VISION_CACHE_TTL_SECONDS = int(os.getenv('VISION_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+
+# Print variant generation: process images across a process pool (0 workers = one per CPU)
+PROCESSING_PARALLEL = os.getenv('PROCESSING_PARALLEL', 'false').lower() == 'true'
+PROCESSING_MAX_WORKERS = int(os.getenv('PROCESSING_MAX_WORKERS', '0'))
+
+# Memory available to parallel variant generation (caps the worker count), and the print
+# size in megapixels from which TIFFs are rendered strip by strip (0 disables)
+PROCESSING_MEMORY_BUDGET_MB = int(os.getenv('PROCESSING_MEMORY_BUDGET_MB', '4096'))
+PROCESSING_TILED_MIN_MEGAPIXELS = int(os.getenv('PROCESSING_TILED_MIN_MEGAPIXELS', '48'))
+
+# Store only the enhanced master and a variant manifest; print files are rendered on first order
+PROCESSING_LAZY_VARIANTS = os.getenv('PROCESSING_LAZY_VARIANTS', 'false').lower() == 'true'
+
+# Image enhancement implementation: 'fused' (lookup table and combined kernels) or 'pil' (ImageEnhance chain)
+ENHANCEMENT_ENGINE = os.getenv('ENHANCEMENT_ENGINE', 'pil')
+
+# Reuse rendered print variants keyed by source file hash and render parameters
+VARIANT_CACHE_ENABLED = os.getenv('VARIANT_CACHE_ENABLED', 'true').lower() == 'true'
+VARIANT_CACHE_PATH = os.getenv('VARIANT_CACHE_PATH', os.path.join('data', 'cache', 'variant_renders.db'))
+
+# Background GCS uploads: concurrency, retries with exponential backoff, resumable chunk size
+# for large files, and the journal of pending uploads that are resumed on the next run
+UPLOAD_QUEUE_ENABLED = os.getenv('UPLOAD_QUEUE_ENABLED', 'false').lower() == 'true'
+UPLOAD_MAX_WORKERS = int(os.getenv('UPLOAD_MAX_WORKERS', '4'))
+UPLOAD_MAX_RETRIES = int(os.getenv('UPLOAD_MAX_RETRIES', '5'))
+UPLOAD_BACKOFF_FACTOR = float(os.getenv('UPLOAD_BACKOFF_FACTOR', '1.0'))
+UPLOAD_CHUNK_SIZE_MB = int(os.getenv('UPLOAD_CHUNK_SIZE_MB', '8'))
+UPLOAD_JOURNAL_PATH = os.getenv('UPLOAD_JOURNAL_PATH', os.path.join('data', 'cache', 'upload_journal.jsonl'))
+
+# Skip GCS uploads whose destination already holds identical content (MD5/CRC32C from a prefix listing)
+GCS_SKIP_UNCHANGED = os.getenv('GCS_SKIP_UNCHANGED', 'true').lower() == 'true'
+# Most prefix listings kept in memory at once (oldest dropped first); other blobs are checked one by one
+GCS_REMOTE_INDEX_MAX_PREFIXES = int(os.getenv('GCS_REMOTE_INDEX_MAX_PREFIXES', '64'))
+
+# Reject near duplicates of accepted images (reposts, recompressions) by perceptual hash before
+# Vision analysis; the distance is in bits out of 64 for both the pHash and the dHash
+PHASH_DEDUP_ENABLED = os.getenv('PHASH_DEDUP_ENABLED', 'false').lower() == 'true'
+PHASH_MAX_DISTANCE = int(os.getenv('PHASH_MAX_DISTANCE', '6'))
+
+# Scrape each profile only for posts newer than its stored watermark; backfill mode instead walks
+# older history one page (posts_per_iteration) deeper per run
+SCRAPE_INCREMENTAL = os.getenv('SCRAPE_INCREMENTAL', 'false').lower() == 'true'
+SCRAPE_BACKFILL = os.getenv('SCRAPE_BACKFILL', 'false').lower() == 'true'
+# The actor can only list a profile from its newest post, so each backfill page re-lists the ones
+# above it; backfill stops this many posts deep to keep that re-listing bounded
+SCRAPE_BACKFILL_MAX_DEPTH = int(os.getenv('SCRAPE_BACKFILL_MAX_DEPTH', '1000'))
+
+# Apify actor runs: profiles per run (0 = all in one run), concurrent runs, memory per run
+# (0 = actor default), run timeout, and retries of a failed run
+APIFY_SHARD_SIZE = int(os.getenv('APIFY_SHARD_SIZE', '0'))
+APIFY_MAX_PARALLEL_RUNS = int(os.getenv('APIFY_MAX_PARALLEL_RUNS', '4'))
+APIFY_RUN_MEMORY_MB = int(os.getenv('APIFY_RUN_MEMORY_MB', '0'))
+APIFY_RUN_TIMEOUT_SECS = int(os.getenv('APIFY_RUN_TIMEOUT_SECS', '300'))
+APIFY_SHARD_RETRIES = int(os.getenv('APIFY_SHARD_RETRIES', '2'))
+
+# Items fetched per request when reading an actor run's dataset
+APIFY_DATASET_PAGE_SIZE = int(os.getenv('APIFY_DATASET_PAGE_SIZE', '500'))
+
+# Start downloading posts while the actor runs are still scraping, polling their datasets
+# every APIFY_POLL_INTERVAL_SECS seconds
+APIFY_ASYNC_SCRAPE = os.getenv('APIFY_ASYNC_SCRAPE', 'false').lower() == 'true'
+APIFY_POLL_INTERVAL_SECS = float(os.getenv('APIFY_POLL_INTERVAL_SECS', '5'))
+
 # Basic check to ensure critical tokens are loaded
 if not APIFY_API_TOKEN:
     print("Warning: APIFY_API_TOKEN not found in .env file.")
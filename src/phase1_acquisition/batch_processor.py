@@ -9,21 +9,27 @@ Integrates with image tracking to avoid duplicates and supports GCS for large ba
 import os
 import json
 import logging
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
 import time
 
 from .. import config
 from ..utils.image_tracker import ImageTracker
 from ..utils.gcs_storage import GCSStorage
+from ..utils.upload_queue import get_upload_queue
+from ..utils.download_engine import DownloadEngine
+from ..utils.decoded_image import DecodedImage
+from ..utils.phash_index import PerceptualHashIndex, compute_hashes
 from .instagram_scraper import (
     initialize_apify_client, 
-    run_instagram_scraper_for_profiles, 
-    get_scraped_data,
+    run_instagram_scraper_shards,
+    make_profile_shards,
     download_images_from_posts,
-    extract_post_metadata
+    extract_post_metadata,
+    profile_username
 )
 from .enhanced_content_filter import EnhancedContentFilter
+from .filter_cascade import FilterCascade
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +54,7 @@ class BatchProcessor:
         self.tracker = ImageTracker(base_dir)
         self.gcs = GCSStorage() if use_gcs else None
         self.enhanced_filter = EnhancedContentFilter(use_google_vision=True)
+        self.filter_cascade = None
         
         # Initialize Apify client
         try:
@@ -61,6 +68,40 @@ class BatchProcessor:
         if self.use_gcs and self.gcs and not self.gcs.is_available():
             logger.warning("GCS not available, falling back to local storage only")
             self.use_gcs = False
+        
+        # Accepted images are uploaded in the background
+        self.uploads = get_upload_queue(self.gcs) if self.use_gcs else None
+        
+        # Near-duplicate index of accepted images, kept next to the tracker database
+        self.phash_index = None
+        if getattr(config, 'PHASH_DEDUP_ENABLED', False):
+            try:
+                self.phash_index = PerceptualHashIndex(
+                    os.path.join(self.tracker.tracking_dir, 'phash_index.db'),
+                    max_distance=getattr(config, 'PHASH_MAX_DISTANCE', 6)
+                )
+                if len(self.phash_index) == 0:
+                    self._backfill_phash_index()
+            except Exception as e:
+                logger.error(f"Failed to open perceptual hash index: {e}")
+                self.phash_index = None
+    
+    def _backfill_phash_index(self):
+        """Hash previously accepted images that are still on disk into an empty index."""
+        added = 0
+        for entry in self.tracker.get_accepted_images():
+            local_path = entry.get('local_path')
+            if not local_path or not os.path.exists(local_path):
+                continue
+            try:
+                phash, dhash = compute_hashes(local_path)
+            except Exception as e:
+                logger.warning(f"Could not hash {local_path}: {e}")
+                continue
+            self.phash_index.add(entry['image_id'], phash, dhash, entry.get('shortcode'))
+            added += 1
+        if added:
+            logger.info(f"Backfilled perceptual hash index with {added} accepted images")
     
     def process_batch(self, 
                      target_count: int = 10,
@@ -70,7 +111,8 @@ class BatchProcessor:
                      min_category_score: float = None,
                      min_overall_score: float = None,
                      max_iterations: int = 10,
-                     posts_per_iteration: int = 50) -> Dict[str, Any]:
+                     posts_per_iteration: int = 50,
+                     backfill: bool = None) -> Dict[str, Any]:
         """
         Process Instagram posts in batches until target number of accepted images is reached.
         
@@ -82,7 +124,10 @@ class BatchProcessor:
             min_category_score: Minimum category score  
             min_overall_score: Minimum overall score
             max_iterations: Maximum number of scraping iterations
-            posts_per_iteration: Number of posts to fetch per iteration
+            posts_per_iteration: Number of posts to fetch per iteration (per profile when
+                                 scraping incrementally; the page size in backfill mode)
+            backfill: Walk older profile history page by page instead of fetching only
+                      posts newer than each profile's watermark. Defaults to config value.
             
         Returns:
             Dictionary with batch processing results
@@ -101,6 +146,9 @@ class BatchProcessor:
             min_category_score = getattr(config, 'MIN_CATEGORY_SCORE', 0.5)
         if min_overall_score is None:
             min_overall_score = getattr(config, 'MIN_OVERALL_SCORE', 0.6)
+        if backfill is None:
+            backfill = getattr(config, 'SCRAPE_BACKFILL', False)
+        watermarked = backfill or getattr(config, 'SCRAPE_INCREMENTAL', False)
         
         logger.info(f"Starting batch processing: target={target_count}, max_iterations={max_iterations}")
         logger.info(f"Filtering criteria: quality≥{min_quality_score}, category≥{min_category_score}, overall≥{min_overall_score}")
@@ -130,9 +178,14 @@ class BatchProcessor:
             
             # Scrape posts for this iteration
             iteration_start = time.time()
-            posts = self._scrape_posts_iteration(profile_urls, posts_per_iteration)
+            posts, watermark_updates = self._scrape_posts_iteration(profile_urls, posts_per_iteration, backfill)
             
             if not posts:
+                self._commit_watermarks(watermark_updates)
+                if watermarked and watermark_updates and all(update['exhausted'] for update in watermark_updates):
+                    # Every profile was scraped successfully and nothing is left to fetch
+                    logger.info(f"No {'older' if backfill else 'new'} posts on any profile; stopping")
+                    break
                 logger.warning(f"No posts retrieved in iteration {iteration + 1}")
                 continue
             
@@ -143,6 +196,7 @@ class BatchProcessor:
             logger.info(f"Got {len(posts)} posts, {len(unprocessed_posts)} are new")
             
             if not unprocessed_posts:
+                self._commit_watermarks(watermark_updates)
                 logger.warning(f"No new posts to process in iteration {iteration + 1}")
                 continue
             
@@ -158,6 +212,9 @@ class BatchProcessor:
             accepted_images.extend(iteration_accepted)
             total_posts_processed += len(unprocessed_posts)
             
+            # Advance watermarks only once the posts are processed, so an interrupted run fetches them again
+            self._commit_watermarks(watermark_updates)
+            
             iteration_time = time.time() - iteration_start
             iteration_results.append({
                 'iteration': iteration + 1,
@@ -173,6 +230,10 @@ class BatchProcessor:
             if iteration < max_iterations - 1:
                 time.sleep(2)
         
+        if self.uploads:
+            logger.info(f"Waiting for {self.uploads.pending_count()} GCS uploads to finish")
+            self.uploads.wait()
+        
         # Final results
         total_time = time.time() - start_time
         final_accepted_count = len(accepted_images) + len(existing_accepted)
@@ -189,6 +250,10 @@ class BatchProcessor:
             'total_time_seconds': total_time,
             'accepted_images': accepted_images,
             'iteration_results': iteration_results,
+            'filter_stats': self.filter_cascade.get_stats() if self.filter_cascade else {},
+            'upload_stats': self.uploads.get_stats() if self.uploads else {},
+            'gcs_upload_stats': self.gcs.get_upload_stats() if self.use_gcs else {},
+            'phash_stats': self.phash_index.get_stats() if self.phash_index else {},
             'tracker_stats': self.tracker.get_stats()
         }
         
@@ -200,43 +265,198 @@ class BatchProcessor:
         logger.info(f"Total posts processed: {total_posts_processed}")
         logger.info(f"Success rate: {(len(accepted_images) / total_posts_processed * 100) if total_posts_processed > 0 else 0:.1f}%")
         logger.info(f"Total time: {total_time:.1f} seconds")
+        if self.filter_cascade:
+            self.filter_cascade.log_stats()
         
         # Save batch results
         self._save_batch_results(results)
         
         return results
     
-    def _scrape_posts_iteration(self, profile_urls: List[str], posts_count: int) -> List[Dict[str, Any]]:
-        """Scrape posts for a single iteration."""
-        try:
-            # Run Instagram scraper
-            scraper_run = run_instagram_scraper_for_profiles(
-                self.apify_client, 
-                profile_urls, 
-                posts_count
-            )
-            
-            if not scraper_run or not scraper_run.get('defaultDatasetId'):
-                logger.error("Scraping failed or no dataset produced")
-                return []
+    def _scrape_posts_iteration(self, profile_urls: List[str], posts_count: int,
+                                backfill: bool = False) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Scrape posts for a single iteration.
+        
+        Profiles are scraped in shards run as concurrent actor runs; a failed
+        shard is retried on its own. With incremental scraping each profile is
+        its own shard and only asks for posts newer than the profile's
+        watermark; when that page comes back full, the next fetch goes a
+        page deeper until the gap below it is closed. In backfill mode each profile's listing is walked one page
+        deeper than the previous backfill run, until a page comes back short
+        (the oldest post was reached) or SCRAPE_BACKFILL_MAX_DEPTH is reached.
+        
+        Args:
+            profile_urls: Instagram profile URLs to scrape
+            posts_count: Posts per profile (the page size in backfill mode)
+            backfill: Whether to walk older history instead of fetching new posts
             
-            # Get scraped data
-            dataset_id = scraper_run['defaultDatasetId']
-            posts = get_scraped_data(self.apify_client, dataset_id)
+        Returns:
+            Tuple of (photo posts, watermark updates). There is one update per
+            profile, applied with _commit_watermarks once the posts have been
+            processed; 'exhausted' is set when the profile has nothing left to
+            fetch, and 'failed' when its run failed.
+        """
+        if not backfill and not getattr(config, 'SCRAPE_INCREMENTAL', False):
+            posts = []
+            for shard, shard_posts in run_instagram_scraper_shards(
+                    self.apify_client, make_profile_shards(profile_urls, posts_count)):
+                posts.extend(shard_posts or [])
+            return self._photo_posts(posts), []
+        
+        max_depth = getattr(config, 'SCRAPE_BACKFILL_MAX_DEPTH', 1000)
+        shards = []
+        watermark_updates = []
+        for profile_url in profile_urls:
+            profile = profile_username(profile_url)
+            watermark = self.tracker.get_profile_watermark(profile) or {}
+            
+            if backfill:
+                offset = watermark.get('backfill_offset', 0)
+                if watermark.get('backfill_complete') or offset >= max_depth:
+                    logger.info(f"Backfill of {profile} already reached "
+                                f"{'its oldest post' if watermark.get('backfill_complete') else f'{max_depth} posts deep'}")
+                    watermark_updates.append({'profile': profile, 'posts': [], 'exhausted': True})
+                    continue
+                # The actor lists newest first and has no upper date bound, so a page
+                # deeper means asking for the posts already walked plus one more page
+                shards.append({
+                    'profile': profile,
+                    'profile_urls': [profile_url],
+                    'max_posts': min(offset + posts_count, max_depth),
+                    'max_depth': max_depth,
+                    'older_than': watermark.get('oldest_timestamp')
+                })
+            else:
+                # An open gap is fetched by asking for the posts above it plus one more page
+                gap_depth = watermark.get('gap_depth', 0)
+                shards.append({
+                    'profile': profile,
+                    'profile_urls': [profile_url],
+                    'max_posts': gap_depth + posts_count,
+                    'only_posts_newer_than': watermark.get('newest_timestamp'),
+                    'gap_depth': gap_depth
+                })
+        
+        posts = []
+        for shard, profile_posts in run_instagram_scraper_shards(self.apify_client, shards):
+            profile = shard['profile']
+            if profile_posts is None:
+                # Not exhausted, so the loop goes on and the profile is asked again
+                watermark_updates.append({'profile': profile, 'posts': None, 'failed': True, 'exhausted': False})
+                continue
             
-            if not posts:
-                logger.error("No posts found in scraped data")
-                return []
+            if backfill:
+                update = self._backfill_update(shard, profile_posts)
+                logger.info(f"Backfilled {profile} to depth {update['backfill_offset']} "
+                            f"({len(update['posts'])} older posts)"
+                            f"{' (complete)' if update['backfill_complete'] else ''}")
+            else:
+                update = self._incremental_update(shard, profile_posts)
+                newer_than = shard['only_posts_newer_than']
+                logger.info(f"Fetched {len(profile_posts)} posts from {profile}"
+                            f"{f' newer than {newer_than}' if newer_than else ''}")
             
-            # Filter out video posts
-            photo_posts = [post for post in posts if not post.get('isVideo', False)]
-            logger.info(f"Filtered {len(posts)} posts to {len(photo_posts)} photo posts")
+            watermark_updates.append(update)
+            posts.extend(update['posts'])
+        
+        return self._photo_posts(posts), watermark_updates
+    
+    @staticmethod
+    def _incremental_update(shard: Dict[str, Any], profile_posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the watermark update for one incremental shard.
+        
+        A full page newer than the watermark means there may be more posts
+        between the watermark and the oldest post fetched. The gap stays open
+        (the newest mark is not advanced) and the next fetch asks for one page
+        more, until a page comes back short. Posts fetched again while the gap
+        is walked are dropped by the tracker's processed check.
+        
+        Args:
+            shard: Incremental shard (profile, max_posts, only_posts_newer_than, gap_depth)
+            profile_posts: Posts the shard returned, newest first
             
-            return photo_posts
+        Returns:
+            Watermark update with the fetched posts as 'posts'.
+        """
+        newer_than = shard['only_posts_newer_than']
+        gap_depth = len(profile_posts) if newer_than and len(profile_posts) >= shard['max_posts'] else 0
+        if gap_depth:
+            logger.warning(f"{shard['profile']} has more than {gap_depth} posts newer than {newer_than}; "
+                           f"fetching the rest on the next run")
+        elif shard.get('gap_depth'):
+            logger.info(f"Closed the gap of {len(profile_posts)} posts on {shard['profile']}")
+        return {
+            'profile': shard['profile'],
+            'posts': profile_posts,
+            'gap_depth': gap_depth,
+            'exhausted': not profile_posts
+        }
+    
+    @staticmethod
+    def _backfill_update(shard: Dict[str, Any], profile_posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the watermark update for one backfill shard.
+        
+        Only posts older than the profile's oldest watermark are kept, so the
+        posts re-listed above the new page are not processed again.
+        
+        Args:
+            shard: Backfill shard (profile, max_posts, max_depth, older_than)
+            profile_posts: Posts the shard returned, newest first
             
-        except Exception as e:
-            logger.error(f"Error in scraping iteration: {e}")
-            return []
+        Returns:
+            Watermark update with the new page as 'posts'.
+        """
+        older_than = shard.get('older_than')
+        if older_than:
+            page = [post for post in profile_posts if post.get('timestamp') and post['timestamp'] < older_than]
+        else:
+            page = list(profile_posts)
+        complete = len(profile_posts) < shard['max_posts']
+        return {
+            'profile': shard['profile'],
+            'posts': page,
+            'backfill_offset': len(profile_posts),
+            'backfill_complete': complete,
+            # At the depth limit the next run only re-lists what was walked
+            'exhausted': not page and (complete or len(profile_posts) >= shard['max_depth'])
+        }
+    
+    @staticmethod
+    def _photo_posts(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Filter out video posts."""
+        photo_posts = [post for post in posts if not post.get('isVideo', False)]
+        logger.info(f"Filtered {len(posts)} posts to {len(photo_posts)} photo posts")
+        return photo_posts
+    
+    def _commit_watermarks(self, watermark_updates: List[Dict[str, Any]]):
+        """Record the posts scraped from each profile in its watermark."""
+        for update in watermark_updates:
+            if update.get('failed'):
+                continue
+            self.tracker.update_profile_watermark(
+                update['profile'],
+                update['posts'],
+                backfill_offset=update.get('backfill_offset'),
+                backfill_complete=update.get('backfill_complete'),
+                gap_depth=update.get('gap_depth')
+            )
+    
+    def _get_filter_cascade(self,
+                            content_categories: List[str],
+                            min_quality_score: float,
+                            min_category_score: float,
+                            min_overall_score: float) -> FilterCascade:
+        """Get the filter cascade for these thresholds, keeping its stats across iterations."""
+        cascade = FilterCascade(
+            self.enhanced_filter, content_categories, min_quality_score,
+            min_category_score, min_overall_score, min_landscape_ratio=1.2
+        )
+        if self.filter_cascade is None or self.filter_cascade.settings() != cascade.settings():
+            self.filter_cascade = cascade
+        return self.filter_cascade
     
     def _process_posts_iteration(self, 
                                 posts: List[Dict[str, Any]],
@@ -244,142 +464,295 @@ class BatchProcessor:
                                 min_quality_score: float,
                                 min_category_score: float,
                                 min_overall_score: float) -> List[Dict[str, Any]]:
-        """Process posts for a single iteration."""
+        """
+        Process posts for a single iteration.
+        
+        Posts go through the filter cascade cheapest stage first: metadata and
+        header checks before download, then quality and video checks, and
+        finally the surviving images are sent to Google Vision in batched requests.
+        Downloads run concurrently, and downloaded images are analyzed in chunks
+        of a few full Vision rounds, so only one chunk of images is held at once.
+        """
+        from ..utils.image_utils import download_image
+        
         accepted_images = []
+        results = []
+        candidates = []
+        cascade = self._get_filter_cascade(
+            content_categories, min_quality_score, min_category_score, min_overall_score
+        )
+        chunk_size = max(getattr(config, 'VISION_BATCH_SIZE', 16) * getattr(config, 'VISION_BATCH_CONCURRENCY', 4), 1)
         
-        for post in posts:
+        jobs = {}
+        for index, post in enumerate(posts):
+            job = self._prepare_download(post)
+            if job:
+                jobs[index] = job
+        
+        def fetch(image_url: str, job: Dict[str, Any]) -> Dict[str, Any]:
+            """Run the pre-download checks and download one image (runs on a pool thread)."""
+            rejection = cascade.check_post(job['post'], image_url)
+            if rejection:
+                return {'rejection': rejection, 'image_data': None}
+            return {'rejection': None, 'image_data': download_image(image_url, job['local_path'])}
+        
+        engine = DownloadEngine(
+            max_workers=getattr(config, 'DOWNLOAD_MAX_WORKERS', 8),
+            max_per_host=getattr(config, 'DOWNLOAD_MAX_PER_HOST', 4)
+        )
+        download_jobs = [(index, job['image_url'], job) for index, job in jobs.items()]
+        for index, fetched, error in engine.run(download_jobs, fetch):
+            job = jobs.pop(index)
             try:
-                # Download and process the image
-                processed_post = self._download_and_analyze_image(
-                    post,
-                    content_categories,
-                    min_quality_score,
-                    min_category_score,
-                    min_overall_score
-                )
-                
-                if processed_post:
-                    if processed_post['status'] == 'accepted':
-                        accepted_images.append(processed_post)
-                        logger.info(f"✅ Accepted: {processed_post['shortcode']} (score: {processed_post.get('overall_score', 0):.3f})")
-                    else:
-                        logger.info(f"❌ Rejected: {processed_post['shortcode']} ({processed_post.get('rejection_reason', 'unknown')})")
-                
+                if error is not None:
+                    raise error
+                result, candidate = self._finish_download(job, fetched)
+                if candidate:
+                    candidates.append(candidate)
+                elif result:
+                    results.append(result)
             except Exception as e:
-                logger.error(f"Error processing post {post.get('shortCode', 'unknown')}: {e}")
+                logger.error(f"Error processing post {job['shortcode']}: {e}")
                 # Mark as error in tracker
-                self.tracker.mark_processed(post, 'error')
+                self.tracker.mark_processed(job['post'], 'error')
+            
+            if len(candidates) >= chunk_size:
+                results.extend(self._analyze_candidates(cascade, candidates, min_quality_score, min_overall_score))
+                candidates = []
+        
+        if candidates:
+            results.extend(self._analyze_candidates(cascade, candidates, min_quality_score, min_overall_score))
+        
+        for processed_post in results:
+            if processed_post['status'] == 'accepted':
+                accepted_images.append(processed_post)
+                logger.info(f"✅ Accepted: {processed_post['shortcode']} (score: {processed_post.get('overall_score', 0):.3f})")
+            else:
+                logger.info(f"❌ Rejected: {processed_post['shortcode']} ({processed_post.get('rejection_reason', 'unknown')})")
         
         return accepted_images
     
-    def _download_and_analyze_image(self, 
-                                   post: Dict[str, Any],
-                                   content_categories: List[str],
-                                   min_quality_score: float,
-                                   min_category_score: float,
-                                   min_overall_score: float) -> Optional[Dict[str, Any]]:
-        """Download and analyze a single image."""
+    def _analyze_candidates(self, cascade: FilterCascade, candidates: List[Dict[str, Any]],
+                            min_quality_score: float, min_overall_score: float) -> List[Dict[str, Any]]:
+        """Run the remaining cascade stages on downloaded images; Vision is called in batches."""
+        results = []
         try:
-            # Get image URL
-            image_url = post.get('displayUrl')
-            if not image_url and 'images' in post and post['images']:
-                image_url = post['images'][0]
-            
-            if not image_url:
-                logger.warning(f"No image URL for post {post.get('shortCode')}")
-                self.tracker.mark_processed(post, 'error')
-                return None
-            
-            # Extract metadata
-            post_metadata = extract_post_metadata(post)
-            shortcode = post.get('shortCode', f"unknown_{int(time.time())}")
-            
-            # Generate filename and path
-            local_filename = f"{post_metadata['owner_username']}_{shortcode}.jpg"
-            
-            # Use GCS for storage if available, otherwise local
-            if self.use_gcs and self.gcs:
-                # Download to temporary local file first
-                temp_dir = os.path.join(self.base_dir, 'temp')
-                os.makedirs(temp_dir, exist_ok=True)
-                local_path = os.path.join(temp_dir, local_filename)
-            else:
-                # Use local storage
-                from ..utils.image_utils import create_storage_structure
-                storage_paths = create_storage_structure(self.base_dir)
-                local_path = os.path.join(storage_paths['original'], local_filename)
-            
-            # Download image
-            from ..utils.image_utils import download_image, is_landscape, get_image_metadata
-            image_data = download_image(image_url, local_path)
-            
-            if not image_data:
-                logger.warning(f"Failed to download image for {shortcode}")
-                self.tracker.mark_processed(post, 'error')
-                return None
-            
-            # Check landscape orientation
-            landscape = is_landscape(image_data, 1.2)
-            if not landscape:
-                logger.info(f"Skipping non-landscape image: {shortcode}")
-                self.tracker.mark_processed(post, 'rejected', None, local_path)
-                if os.path.exists(local_path):
-                    os.remove(local_path)
-                return {'status': 'rejected', 'shortcode': shortcode, 'rejection_reason': 'not landscape'}
-            
-            # Enhanced content analysis
-            meets_criteria, analysis = self.enhanced_filter.meets_content_criteria(
-                image_path=local_path,
-                content_categories=content_categories,
-                min_quality_score=min_quality_score,
-                min_category_score=min_category_score,
-                min_overall_score=min_overall_score
+            criteria_results = cascade.evaluate(
+                [candidate['local_path'] for candidate in candidates],
+                images=[candidate['image'] for candidate in candidates]
             )
-            
-            # Prepare result
-            result = {
-                'status': 'accepted' if meets_criteria else 'rejected',
-                'shortcode': shortcode,
-                'local_path': local_path,
-                'post_metadata': post_metadata,
-                'analysis': analysis,
-                'overall_score': analysis.get('overall_score', 0),
-                'quality_score': analysis.get('quality_score', 0),
-                'is_video_thumbnail': analysis.get('is_video_thumbnail', False)
-            }
-            
-            if not meets_criteria:
-                # Determine rejection reason
-                if analysis.get('is_video_thumbnail'):
-                    result['rejection_reason'] = 'video thumbnail'
-                elif analysis.get('overall_score', 0) < min_overall_score:
-                    result['rejection_reason'] = f"overall score {analysis.get('overall_score', 0):.3f} < {min_overall_score}"
-                elif analysis.get('quality_score', 0) < min_quality_score:
-                    result['rejection_reason'] = f"quality score {analysis.get('quality_score', 0):.3f} < {min_quality_score}"
-                else:
-                    result['rejection_reason'] = 'category criteria not met'
-            
-            # Upload to GCS if configured and accepted
-            if meets_criteria and self.use_gcs and self.gcs:
-                gcs_path = f"images/batch/{local_filename}"
-                if self.gcs.upload_file(local_path, gcs_path):
-                    result['gcs_path'] = gcs_path
-                    logger.info(f"Uploaded to GCS: {gcs_path}")
-            
-            # Update tracker
-            status = 'accepted' if meets_criteria else 'rejected'
-            self.tracker.mark_processed(post, status, analysis, local_path)
-            
-            # Clean up temp file if using GCS
-            if self.use_gcs and meets_criteria and os.path.exists(local_path) and 'temp' in local_path:
-                os.remove(local_path)
-            
-            return result
-            
         except Exception as e:
-            logger.error(f"Error downloading/analyzing image: {e}")
+            logger.error(f"Error analyzing batch of {len(candidates)} images: {e}")
+            for candidate in candidates:
+                self.tracker.mark_processed(candidate['post'], 'error')
+            criteria_results = []
+        
+        for candidate, (meets_criteria, analysis) in zip(candidates, criteria_results):
+            try:
+                results.append(self._record_analysis(
+                    candidate, meets_criteria, analysis, min_quality_score, min_overall_score
+                ))
+            except Exception as e:
+                logger.error(f"Error processing post {candidate['shortcode']}: {e}")
+                self.tracker.mark_processed(candidate['post'], 'error')
+        
+        # Scored; the chunk's images, raw bytes included, can go
+        for candidate in candidates:
+            candidate['image'] = None
+        return results
+    
+    def _prepare_download(self, post: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Work out where a post's image comes from and where it is stored.
+        
+        Args:
+            post: Apify post data.
+        
+        Returns:
+            Download job (post, image_url, post_metadata, shortcode, local_filename,
+            local_path), or None if the post has no image URL.
+        """
+        # Get image URL
+        image_url = post.get('displayUrl')
+        if not image_url and 'images' in post and post['images']:
+            image_url = post['images'][0]
+        
+        if not image_url:
+            logger.warning(f"No image URL for post {post.get('shortCode')}")
             self.tracker.mark_processed(post, 'error')
             return None
+        
+        # Extract metadata
+        post_metadata = extract_post_metadata(post)
+        shortcode = post.get('shortCode', f"unknown_{int(time.time())}")
+        
+        # Generate filename and path
+        local_filename = f"{post_metadata['owner_username']}_{shortcode}.jpg"
+        
+        # Use GCS for storage if available, otherwise local
+        if self.use_gcs and self.gcs:
+            # Download to temporary local file first
+            temp_dir = os.path.join(self.base_dir, 'temp')
+            os.makedirs(temp_dir, exist_ok=True)
+            local_path = os.path.join(temp_dir, local_filename)
+        else:
+            # Use local storage
+            from ..utils.image_utils import create_storage_structure
+            storage_paths = create_storage_structure(self.base_dir)
+            local_path = os.path.join(storage_paths['original'], local_filename)
+        
+        return {
+            'post': post,
+            'image_url': image_url,
+            'post_metadata': post_metadata,
+            'shortcode': shortcode,
+            'local_filename': local_filename,
+            'local_path': local_path
+        }
+    
+    def _finish_download(self, job: Dict[str, Any],
+                         fetched: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Handle a finished download and run the checks that need the image.
+        
+        Args:
+            job: Download job from _prepare_download.
+            fetched: 'rejection' from the pre-download stages, or the downloaded 'image_data'.
+        
+        Returns:
+            Tuple of (result, candidate). For posts rejected or failed before
+            analysis, result is set (or None on error) and candidate is None.
+            Otherwise candidate holds everything needed to analyze the image.
+        """
+        from ..utils.image_utils import is_landscape
+        
+        post = job['post']
+        shortcode = job['shortcode']
+        local_path = job['local_path']
+        
+        if fetched['rejection']:
+            stage, reason = fetched['rejection']
+            logger.info(f"Skipping {shortcode} at {stage} stage: {reason} (not downloaded)")
+            self.tracker.mark_processed(post, 'rejected')
+            return {'status': 'rejected', 'shortcode': shortcode, 'rejection_reason': reason}, None
+        
+        image_data = fetched['image_data']
+        if not image_data:
+            logger.warning(f"Failed to download image for {shortcode}")
+            self.tracker.mark_processed(post, 'error')
+            return None, None
+        
+        # Decode once; the landscape check and every filter stage share it
+        image = DecodedImage.from_bytes(image_data, path=local_path)
+        
+        # Check landscape orientation
+        landscape = is_landscape(image, 1.2)
+        if not landscape:
+            logger.info(f"Skipping non-landscape image: {shortcode}")
+            self.tracker.mark_processed(post, 'rejected', None, local_path)
+            if os.path.exists(local_path):
+                os.remove(local_path)
+            return {'status': 'rejected', 'shortcode': shortcode, 'rejection_reason': 'not landscape'}, None
+        
+        # Reject reposts and re-uploads of an image we already accepted before paying for Vision
+        hashes = None
+        if self.phash_index is not None:
+            hashes = compute_hashes(image)
+            duplicate = self.phash_index.find_duplicate(*hashes)
+            if duplicate:
+                reason = f"near duplicate of {duplicate['label'] or duplicate['image_id']}"
+                logger.info(f"Skipping {shortcode}: {reason} (distance {duplicate['phash_distance']})")
+                self.tracker.mark_processed(post, 'rejected', None, local_path)
+                image.release()
+                if os.path.exists(local_path):
+                    os.remove(local_path)
+                return {'status': 'rejected', 'shortcode': shortcode, 'rejection_reason': reason}, None
+        
+        candidate = {
+            'post': post,
+            'post_metadata': job['post_metadata'],
+            'shortcode': shortcode,
+            'local_filename': job['local_filename'],
+            'local_path': local_path,
+            'image': image,
+            'hashes': hashes
+        }
+        return None, candidate
+    
+    def _record_analysis(self,
+                         candidate: Dict[str, Any],
+                         meets_criteria: bool,
+                         analysis: Dict[str, Any],
+                         min_quality_score: float,
+                         min_overall_score: float) -> Dict[str, Any]:
+        """Build the result for an analyzed image, upload it if accepted and update the tracker."""
+        post = candidate['post']
+        local_path = candidate['local_path']
+        local_filename = candidate['local_filename']
+        
+        # Analysis is done; drop the decoded pixels
+        candidate['image'].release()
+        
+        # Prepare result
+        result = {
+            'status': 'accepted' if meets_criteria else 'rejected',
+            'shortcode': candidate['shortcode'],
+            'local_path': local_path,
+            'post_metadata': candidate['post_metadata'],
+            'analysis': analysis,
+            'overall_score': analysis.get('overall_score', 0),
+            'quality_score': analysis.get('quality_score', 0),
+            'is_video_thumbnail': analysis.get('is_video_thumbnail', False)
+        }
+        
+        if not meets_criteria:
+            # Determine rejection reason
+            if analysis.get('rejection_reason'):
+                result['rejection_reason'] = analysis['rejection_reason']
+            elif analysis.get('is_video_thumbnail'):
+                result['rejection_reason'] = 'video thumbnail'
+            elif analysis.get('overall_score', 0) < min_overall_score:
+                result['rejection_reason'] = f"overall score {analysis.get('overall_score', 0):.3f} < {min_overall_score}"
+            elif analysis.get('quality_score', 0) < min_quality_score:
+                result['rejection_reason'] = f"quality score {analysis.get('quality_score', 0):.3f} < {min_quality_score}"
+            else:
+                result['rejection_reason'] = 'category criteria not met'
+        
+        # Index accepted images; a near duplicate accepted earlier in the same batch is rejected instead
+        if meets_criteria and candidate.get('hashes') and self.phash_index is not None:
+            duplicate = self.phash_index.find_duplicate(*candidate['hashes'])
+            if duplicate:
+                meets_criteria = False
+                result['status'] = 'rejected'
+                result['rejection_reason'] = f"near duplicate of {duplicate['label'] or duplicate['image_id']}"
+            else:
+                self.phash_index.add(self.tracker.get_image_id(post), *candidate['hashes'],
+                                     label=candidate['shortcode'])
+        
+        # Temp files are deleted once uploaded
+        delete_after_upload = 'temp' in local_path
+        
+        # Upload to GCS if configured and accepted
+        if meets_criteria and self.use_gcs and self.gcs:
+            gcs_path = f"images/batch/{local_filename}"
+            if self.uploads:
+                self.uploads.enqueue(local_path, gcs_path, delete_source=delete_after_upload)
+                result['gcs_path'] = gcs_path
+                logger.info(f"Queued GCS upload: {gcs_path}")
+            elif self.gcs.upload_file(local_path, gcs_path):
+                result['gcs_path'] = gcs_path
+                logger.info(f"Uploaded to GCS: {gcs_path}")
+        
+        # Update tracker
+        status = 'accepted' if meets_criteria else 'rejected'
+        self.tracker.mark_processed(post, status, analysis, local_path)
+        
+        # Clean up temp file if using GCS (queued uploads delete it themselves)
+        if (self.use_gcs and meets_criteria and not self.uploads and delete_after_upload
+                and os.path.exists(local_path)):
+            os.remove(local_path)
+        
+        return result
     
     def _save_batch_results(self, results: Dict[str, Any]):
         """Save batch processing results to file."""
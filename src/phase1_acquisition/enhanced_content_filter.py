@@ -6,10 +6,11 @@ Combines Google Vision API with intelligent category matching and quality assess
 
 import os
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 from PIL import Image
 import numpy as np
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 # Google Vision API imports
 try:
@@ -19,7 +20,14 @@ try:
 except ImportError:
     GOOGLE_VISION_AVAILABLE = False
 
+from .. import config
 from .video_detector import VideoThumbnailDetector
+from ..utils.decoded_image import DecodedImage, as_decoded_image
+from ..utils.vision_cache import get_vision_cache, vision_feature_key
+from ..utils.image_utils import prepare_vision_payload
+
+# Google Vision accepts at most 16 images per synchronous batch request
+VISION_MAX_BATCH_SIZE = 16
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -62,6 +70,12 @@ class EnhancedContentFilter:
                 logger.error(f"Error initializing Google Vision API: {e}")
                 self.use_google_vision = False
         
+        # Cheap-first cascade used by meets_content_criteria (built on first use)
+        self.cascade = None
+        
+        # Persistent Vision result cache (None when disabled)
+        self.vision_cache = get_vision_cache() if self.use_google_vision else None
+        
         # Enhanced photography categories with semantic understanding
         self.photography_categories = {
             'landscape': {
@@ -104,34 +118,29 @@ class EnhancedContentFilter:
         
         logger.info(f"Enhanced content filter initialized. Google Vision: {self.use_google_vision}")
     
-    def analyze_image_content(self, image_path: str) -> Dict[str, Any]:
+    def analyze_image_content(self, image_path: str, image: DecodedImage = None,
+                              vision_results: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Comprehensive image content analysis.
         
         Args:
             image_path: Path to the image file.
+            image: Already loaded image to analyze. If None, the file at
+                   image_path is read once and shared by every stage.
+            vision_results: Precomputed Google Vision results (e.g. from a
+                            batch request). If None, Vision is called directly.
             
         Returns:
             Dictionary with comprehensive analysis results.
         """
-        analysis = {
-            'image_path': image_path,
-            'is_video_thumbnail': False,
-            'video_confidence': 0.0,
-            'google_vision_labels': [],
-            'google_vision_objects': [],
-            'category_matches': {},
-            'quality_score': 0.0,
-            'print_suitability': 0.0,
-            'overall_score': 0.0
-        }
+        analysis = self.new_analysis(image_path)
         
         try:
+            if image is None:
+                image = DecodedImage.from_path(image_path)
+            
             # 1. Check if it's a video thumbnail
-            video_results = self.video_detector.detect_video_indicators(image_path)
-            analysis['is_video_thumbnail'] = video_results['is_likely_video']
-            analysis['video_confidence'] = video_results['confidence_score']
-            analysis['video_indicators'] = video_results['indicators']
+            self.detect_video(analysis, image_path, image)
             
             # Skip further analysis if it's a video thumbnail
             if analysis['is_video_thumbnail']:
@@ -139,23 +148,11 @@ class EnhancedContentFilter:
                 return analysis
             
             # 2. Google Vision API analysis
-            if self.use_google_vision and self.vision_client:
-                vision_results = self._analyze_with_google_vision(image_path)
-                analysis['google_vision_labels'] = vision_results.get('labels', [])
-                analysis['google_vision_objects'] = vision_results.get('objects', [])
-                analysis['google_vision_colors'] = vision_results.get('colors', [])
+            if vision_results is None and self.use_google_vision and self.vision_client:
+                vision_results = self._analyze_with_google_vision(image)
             
-            # 3. Category matching
-            analysis['category_matches'] = self._match_categories(analysis)
-            
-            # 4. Quality assessment
-            analysis['quality_score'] = self._assess_image_quality(image_path)
-            
-            # 5. Print suitability
-            analysis['print_suitability'] = self._assess_print_suitability(image_path, analysis)
-            
-            # 6. Calculate overall score
-            analysis['overall_score'] = self._calculate_overall_score(analysis)
+            # 3-6. Category matching, quality, print suitability and overall score
+            self.score_analysis(analysis, image, vision_results)
             
             return analysis
             
@@ -163,70 +160,211 @@ class EnhancedContentFilter:
             logger.error(f"Error analyzing image content for {image_path}: {e}")
             return analysis
     
-    def _analyze_with_google_vision(self, image_path: str) -> Dict[str, Any]:
-        """Analyze image with Google Vision API."""
+    def new_analysis(self, image_path: str) -> Dict[str, Any]:
+        """Create an empty analysis result."""
+        return {
+            'image_path': image_path,
+            'is_video_thumbnail': False,
+            'video_confidence': 0.0,
+            'google_vision_labels': [],
+            'google_vision_objects': [],
+            'category_matches': {},
+            'quality_score': 0.0,
+            'print_suitability': 0.0,
+            'overall_score': 0.0
+        }
+    
+    def detect_video(self, analysis: Dict[str, Any], image_path: str, image: DecodedImage):
+        """Run video thumbnail detection and record it in the analysis."""
+        video_results = self.video_detector.detect_video_indicators(image_path, image=image)
+        analysis['is_video_thumbnail'] = video_results['is_likely_video']
+        analysis['video_confidence'] = video_results['confidence_score']
+        analysis['video_indicators'] = video_results['indicators']
+    
+    def score_analysis(self, analysis: Dict[str, Any], image: DecodedImage, vision_results: Optional[Dict[str, Any]]):
+        """Fill in Vision results, category matches and scores for a non-video image."""
+        if vision_results:
+            analysis['google_vision_labels'] = vision_results.get('labels', [])
+            analysis['google_vision_objects'] = vision_results.get('objects', [])
+            analysis['google_vision_colors'] = vision_results.get('colors', [])
+        
+        # 3. Category matching
+        analysis['category_matches'] = self._match_categories(analysis)
+        
+        # 4. Quality assessment
+        analysis['quality_score'] = self.assess_image_quality(image)
+        
+        # 5. Print suitability
+        analysis['print_suitability'] = self._assess_print_suitability(image, analysis)
+        
+        # 6. Calculate overall score
+        analysis['overall_score'] = self._calculate_overall_score(analysis)
+    
+    def _vision_features(self) -> list:
+        """Google Vision features requested for every image."""
+        return [
+            vision.Feature(type_=vision.Feature.Type.LABEL_DETECTION, max_results=20),
+            vision.Feature(type_=vision.Feature.Type.OBJECT_LOCALIZATION, max_results=10),
+            vision.Feature(type_=vision.Feature.Type.IMAGE_PROPERTIES),
+        ]
+    
+    def _vision_payload(self, image: DecodedImage) -> bytes:
+        """Downscaled bytes sent to Vision for an image (quality scoring keeps the original)."""
+        return prepare_vision_payload(
+            image,
+            max_edge=getattr(config, 'VISION_MAX_EDGE', 1024),
+            quality=getattr(config, 'VISION_JPEG_QUALITY', 85)
+        )
+    
+    def _vision_cache_key(self) -> str:
+        """Cache key describing the Vision features this filter requests."""
+        return vision_feature_key('enhanced', self._vision_features())
+    
+    def _analyze_with_google_vision(self, image: Union[str, DecodedImage]) -> Dict[str, Any]:
+        """Analyze image with Google Vision API, consulting the result cache first."""
         try:
-            with open(image_path, 'rb') as image_file:
-                content = image_file.read()
+            content = self._vision_payload(as_decoded_image(image))
             
-            image = vision.Image(content=content)
+            if self.vision_cache:
+                cached = self.vision_cache.get(content, self._vision_cache_key())
+                if cached is not None:
+                    return cached
             
-            # Request multiple features
-            features = [
-                vision.Feature(type_=vision.Feature.Type.LABEL_DETECTION, max_results=20),
-                vision.Feature(type_=vision.Feature.Type.OBJECT_LOCALIZATION, max_results=10),
-                vision.Feature(type_=vision.Feature.Type.IMAGE_PROPERTIES),
-            ]
+            image = vision.Image(content=content)
             
             response = self.vision_client.annotate_image({
                 'image': image,
-                'features': features
+                'features': self._vision_features()
             })
             
-            results = {}
-            
-            # Extract labels
-            if response.label_annotations:
-                results['labels'] = [
-                    {
-                        'description': label.description.lower(),
-                        'score': label.score,
-                        'topicality': label.topicality
-                    }
-                    for label in response.label_annotations
-                ]
-            
-            # Extract objects
-            if response.localized_object_annotations:
-                results['objects'] = [
-                    {
-                        'name': obj.name.lower(),
-                        'score': obj.score
-                    }
-                    for obj in response.localized_object_annotations
-                ]
-            
-            # Extract colors
-            if response.image_properties_annotation:
-                results['colors'] = [
-                    {
-                        'color': {
-                            'red': color.color.red,
-                            'green': color.color.green,
-                            'blue': color.color.blue
-                        },
-                        'score': color.score,
-                        'pixel_fraction': color.pixel_fraction
-                    }
-                    for color in response.image_properties_annotation.dominant_colors.colors[:5]
-                ]
-            
+            results = self._parse_vision_response(response)
+            if self.vision_cache:
+                self.vision_cache.put(content, self._vision_cache_key(), results)
             return results
             
         except Exception as e:
             logger.error(f"Error with Google Vision analysis: {e}")
             return {}
     
+    def analyze_with_google_vision_batch(self, images: List[DecodedImage]) -> List[Dict[str, Any]]:
+        """
+        Analyze images with batched Google Vision requests.
+        
+        Cached results are used where available; the remaining images are
+        grouped into batch_annotate_images calls of up to VISION_BATCH_SIZE
+        images, and several calls run concurrently.
+        
+        Returns:
+            List of Vision result dicts, aligned with images ({} on failure).
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+        cache_key = self._vision_cache_key() if self.vision_cache else None
+        payloads = [self._vision_payload(image) for image in images]
+        
+        misses = []
+        for index, image in enumerate(images):
+            if self.vision_cache:
+                try:
+                    results[index] = self.vision_cache.get(payloads[index], cache_key)
+                except Exception as e:
+                    logger.warning(f"Vision cache lookup failed for {image.path}: {e}")
+            if results[index] is None:
+                misses.append(index)
+        
+        if self.vision_cache:
+            logger.info(f"Vision cache: {len(images) - len(misses)} hit(s), {len(misses)} miss(es)")
+        
+        if misses:
+            batch_size = max(1, min(getattr(config, 'VISION_BATCH_SIZE', VISION_MAX_BATCH_SIZE), VISION_MAX_BATCH_SIZE))
+            concurrency = max(1, getattr(config, 'VISION_BATCH_CONCURRENCY', 4))
+            
+            batches = [misses[i:i + batch_size] for i in range(0, len(misses), batch_size)]
+            logger.info(f"Annotating {len(misses)} images with Google Vision in {len(batches)} batch request(s)")
+            
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as executor:
+                batch_results = list(executor.map(
+                    lambda batch: self._annotate_batch([images[i] for i in batch], [payloads[i] for i in batch]),
+                    batches
+                ))
+            
+            for batch, batch_result in zip(batches, batch_results):
+                for index, image_results in zip(batch, batch_result):
+                    if image_results is None:
+                        continue
+                    results[index] = image_results
+                    if self.vision_cache:
+                        self.vision_cache.put(payloads[index], cache_key, image_results)
+        
+        return [image_results if image_results is not None else {} for image_results in results]
+    
+    def _annotate_batch(self, images: List[DecodedImage], payloads: List[bytes]) -> List[Optional[Dict[str, Any]]]:
+        """Send one batch_annotate_images request and parse each response (None on failure)."""
+        try:
+            features = self._vision_features()
+            annotate_requests = [
+                vision.AnnotateImageRequest(image=vision.Image(content=payload), features=features)
+                for payload in payloads
+            ]
+            response = self.vision_client.batch_annotate_images(requests=annotate_requests)
+        except Exception as e:
+            logger.error(f"Error with Google Vision batch analysis: {e}")
+            return [None for _ in images]
+        
+        results = []
+        for image, image_response in zip(images, response.responses):
+            if image_response.error.message:
+                logger.error(f"Google Vision error for {image.path}: {image_response.error.message}")
+                results.append(None)
+                continue
+            try:
+                results.append(self._parse_vision_response(image_response))
+            except Exception as e:
+                logger.error(f"Error parsing Google Vision response for {image.path}: {e}")
+                results.append(None)
+        return results
+    
+    def _parse_vision_response(self, response) -> Dict[str, Any]:
+        """Extract labels, objects and dominant colors from a Vision response."""
+        results = {}
+        
+        # Extract labels
+        if response.label_annotations:
+            results['labels'] = [
+                {
+                    'description': label.description.lower(),
+                    'score': label.score,
+                    'topicality': label.topicality
+                }
+                for label in response.label_annotations
+            ]
+        
+        # Extract objects
+        if response.localized_object_annotations:
+            results['objects'] = [
+                {
+                    'name': obj.name.lower(),
+                    'score': obj.score
+                }
+                for obj in response.localized_object_annotations
+            ]
+        
+        # Extract colors
+        if response.image_properties_annotation:
+            results['colors'] = [
+                {
+                    'color': {
+                        'red': color.color.red,
+                        'green': color.color.green,
+                        'blue': color.color.blue
+                    },
+                    'score': color.score,
+                    'pixel_fraction': color.pixel_fraction
+                }
+                for color in response.image_properties_annotation.dominant_colors.colors[:5]
+            ]
+        
+        return results
+    
     def _match_categories(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """
         Intelligent category matching using semantic understanding.
@@ -308,74 +446,72 @@ class EnhancedContentFilter:
         
         return category_scores
     
-    def _assess_image_quality(self, image_path: str) -> float:
+    def assess_image_quality(self, image: Union[str, DecodedImage]) -> float:
         """
         Assess technical image quality.
         """
         try:
-            with Image.open(image_path) as img:
-                width, height = img.size
-                
-                # Basic quality factors
-                resolution_score = min(1.0, (width * height) / (1920 * 1080))  # Normalize to 1080p
-                aspect_ratio = width / height
-                aspect_score = 1.0 if 0.5 <= aspect_ratio <= 2.0 else 0.5  # Prefer reasonable ratios
-                
-                # Size score (prefer larger images for print)
-                min_dimension = min(width, height)
-                size_score = min(1.0, min_dimension / 1200)  # Prefer at least 1200px on shortest side
-                
-                # Combine scores
-                quality_score = (resolution_score * 0.4 + aspect_score * 0.3 + size_score * 0.3)
-                
-                return quality_score
-                
+            width, height = as_decoded_image(image).size
+            
+            # Basic quality factors
+            resolution_score = min(1.0, (width * height) / (1920 * 1080))  # Normalize to 1080p
+            aspect_ratio = width / height
+            aspect_score = 1.0 if 0.5 <= aspect_ratio <= 2.0 else 0.5  # Prefer reasonable ratios
+            
+            # Size score (prefer larger images for print)
+            min_dimension = min(width, height)
+            size_score = min(1.0, min_dimension / 1200)  # Prefer at least 1200px on shortest side
+            
+            # Combine scores
+            quality_score = (resolution_score * 0.4 + aspect_score * 0.3 + size_score * 0.3)
+            
+            return quality_score
+            
         except Exception as e:
             logger.error(f"Error assessing image quality: {e}")
             return 0.0
     
-    def _assess_print_suitability(self, image_path: str, analysis: Dict[str, Any]) -> float:
+    def _assess_print_suitability(self, image: Union[str, DecodedImage], analysis: Dict[str, Any]) -> float:
         """
         Assess suitability for printing as wall art.
         """
         try:
-            with Image.open(image_path) as img:
-                width, height = img.size
-                
-                # Print resolution requirements
-                min_dpi = 150  # Minimum for decent print quality
-                max_print_width = width / min_dpi  # Max print width in inches
-                max_print_height = height / min_dpi
-                
-                # Score based on maximum printable size
-                max_print_size = max(max_print_width, max_print_height)
-                print_size_score = min(1.0, max_print_size / 24)  # Prefer images that can print at 24+ inches
-                
-                # Aspect ratio suitability for wall art
-                aspect_ratio = width / height
-                if 0.7 <= aspect_ratio <= 1.5:  # Square to moderate landscape/portrait
-                    aspect_suitability = 1.0
-                elif 0.5 <= aspect_ratio <= 2.0:  # Wider range but lower score
-                    aspect_suitability = 0.8
-                else:
-                    aspect_suitability = 0.5
-                
-                # Content suitability (based on category matches)
-                content_suitability = 0.0
-                category_matches = analysis.get('category_matches', {})
-                for category, match_info in category_matches.items():
-                    if match_info['score'] > 0.5:  # Strong category match
-                        content_suitability = max(content_suitability, match_info['score'])
-                
-                # Combine factors
-                print_suitability = (
-                    print_size_score * 0.4 +
-                    aspect_suitability * 0.3 +
-                    content_suitability * 0.3
-                )
-                
-                return print_suitability
-                
+            width, height = as_decoded_image(image).size
+            
+            # Print resolution requirements
+            min_dpi = 150  # Minimum for decent print quality
+            max_print_width = width / min_dpi  # Max print width in inches
+            max_print_height = height / min_dpi
+            
+            # Score based on maximum printable size
+            max_print_size = max(max_print_width, max_print_height)
+            print_size_score = min(1.0, max_print_size / 24)  # Prefer images that can print at 24+ inches
+            
+            # Aspect ratio suitability for wall art
+            aspect_ratio = width / height
+            if 0.7 <= aspect_ratio <= 1.5:  # Square to moderate landscape/portrait
+                aspect_suitability = 1.0
+            elif 0.5 <= aspect_ratio <= 2.0:  # Wider range but lower score
+                aspect_suitability = 0.8
+            else:
+                aspect_suitability = 0.5
+            
+            # Content suitability (based on category matches)
+            content_suitability = 0.0
+            category_matches = analysis.get('category_matches', {})
+            for category, match_info in category_matches.items():
+                if match_info['score'] > 0.5:  # Strong category match
+                    content_suitability = max(content_suitability, match_info['score'])
+            
+            # Combine factors
+            print_suitability = (
+                print_size_score * 0.4 +
+                aspect_suitability * 0.3 +
+                content_suitability * 0.3
+            )
+            
+            return print_suitability
+            
         except Exception as e:
             logger.error(f"Error assessing print suitability: {e}")
             return 0.0
@@ -413,7 +549,8 @@ class EnhancedContentFilter:
                               content_categories: List[str] = None,
                               min_quality_score: float = 0.5,
                               min_category_score: float = 0.5,
-                              min_overall_score: float = 0.6) -> Tuple[bool, Dict[str, Any]]:
+                              min_overall_score: float = 0.6,
+                              image: DecodedImage = None) -> Tuple[bool, Dict[str, Any]]:
         """
         Check if image meets content criteria.
         
@@ -423,19 +560,68 @@ class EnhancedContentFilter:
             min_quality_score: Minimum quality score required.
             min_category_score: Minimum category match score required.
             min_overall_score: Minimum overall score required.
+            image: Already loaded image, to avoid re-reading image_path.
             
         Returns:
             Tuple of (meets_criteria, analysis_results)
         """
-        analysis = self.analyze_image_content(image_path)
+        return self.meets_content_criteria_batch(
+            [image_path], content_categories, min_quality_score, min_category_score,
+            min_overall_score, images=[image]
+        )[0]
+    
+    def meets_content_criteria_batch(self, image_paths: List[str],
+                                     content_categories: List[str] = None,
+                                     min_quality_score: float = 0.5,
+                                     min_category_score: float = 0.5,
+                                     min_overall_score: float = 0.6,
+                                     images: List[DecodedImage] = None) -> List[Tuple[bool, Dict[str, Any]]]:
+        """
+        Check many images against the content criteria using batched Vision requests.
         
+        Checks run cheapest first (quality, then video detection, then Vision)
+        and stop at the first failing stage, so rejected images never reach Vision.
+        
+        Args:
+            image_paths: Paths to the images.
+            content_categories: List of desired content categories.
+            min_quality_score: Minimum quality score required.
+            min_category_score: Minimum category match score required.
+            min_overall_score: Minimum overall score required.
+            images: Optional already loaded images, aligned with image_paths.
+            
+        Returns:
+            List of (meets_criteria, analysis_results) tuples, aligned with image_paths.
+        """
+        return self._get_cascade(content_categories, min_quality_score, min_category_score,
+                                 min_overall_score).evaluate(image_paths, images)
+    
+    def _get_cascade(self, content_categories: List[str], min_quality_score: float,
+                     min_category_score: float, min_overall_score: float):
+        """Get the filter cascade for these thresholds, reusing it (and its stats) when unchanged."""
+        from .filter_cascade import FilterCascade
+        
+        cascade = FilterCascade(
+            self, content_categories, min_quality_score, min_category_score, min_overall_score,
+            min_landscape_ratio=None, min_short_edge=0
+        )
+        if self.cascade is None or self.cascade.settings() != cascade.settings():
+            self.cascade = cascade
+        return self.cascade
+    
+    def check_criteria(self, analysis: Dict[str, Any],
+                       content_categories: List[str],
+                       min_quality_score: float,
+                       min_category_score: float,
+                       min_overall_score: float) -> bool:
+        """Apply the acceptance thresholds to a finished analysis."""
         # Reject video thumbnails immediately
         if analysis.get('is_video_thumbnail', False):
-            return False, analysis
+            return False
         
         # Check quality score
         if analysis.get('quality_score', 0.0) < min_quality_score:
-            return False, analysis
+            return False
         
         # Check category matching if categories specified
         if content_categories:
@@ -446,13 +632,13 @@ class EnhancedContentFilter:
                     best_match_score = max(best_match_score, category_score)
             
             if best_match_score < min_category_score:
-                return False, analysis
+                return False
         
         # Check overall score
         if analysis.get('overall_score', 0.0) < min_overall_score:
-            return False, analysis
+            return False
         
-        return True, analysis
+        return True
 
 def test_enhanced_filter(image_dir: str = "data/raw/original", 
                         content_categories: List[str] = None) -> None:
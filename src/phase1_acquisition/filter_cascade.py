@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Cheap-First Filter Cascade
+
+Runs the acceptance checks for an image in order of cost, stopping at the
+first stage that rejects it:
+
+1. metadata   - Apify post fields (isVideo, dimensions), before downloading
+2. header     - resolution/aspect rules from a partial download of the image header
+3. dimensions - the same rules on the downloaded image
+4. quality    - local quality score
+5. video      - OpenCV video thumbnail detection
+6. vision     - Google Vision (batched), category matching and final scoring
+
+Each stage keeps evaluation/rejection counters and cumulative timing, so it is
+visible where images are rejected and where time goes.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .. import config
+from ..utils.decoded_image import DecodedImage
+from ..utils.image_utils import get_post_dimensions, is_landscape_dimensions, resolve_image_dimensions
+from .enhanced_content_filter import EnhancedContentFilter
+
+logger = logging.getLogger(__name__)
+
+CASCADE_STAGES = ('metadata', 'header', 'dimensions', 'quality', 'video', 'vision')
+
+class FilterCascade:
+    """
+    Ordered, short-circuiting image filter built on EnhancedContentFilter.
+    """
+
+    def __init__(self,
+                 enhanced_filter: EnhancedContentFilter,
+                 content_categories: List[str] = None,
+                 min_quality_score: float = 0.5,
+                 min_category_score: float = 0.5,
+                 min_overall_score: float = 0.6,
+                 min_landscape_ratio: float = 1.2,
+                 min_short_edge: int = None):
+        """
+        Initialize the cascade.
+
+        Args:
+            enhanced_filter: Filter providing video detection, Vision and scoring.
+            content_categories: List of desired content categories.
+            min_quality_score: Minimum quality score required.
+            min_category_score: Minimum category match score required.
+            min_overall_score: Minimum overall score required.
+            min_landscape_ratio: Minimum width/height ratio to consider as landscape.
+                                 None disables the orientation rule.
+            min_short_edge: Minimum length in pixels of the shorter image side.
+                            Defaults to config value (0 disables).
+        """
+        self.enhanced_filter = enhanced_filter
+        self.content_categories = content_categories
+        self.min_quality_score = min_quality_score
+        self.min_category_score = min_category_score
+        self.min_overall_score = min_overall_score
+        self.min_landscape_ratio = min_landscape_ratio
+        if min_short_edge is None:
+            min_short_edge = getattr(config, 'MIN_IMAGE_SHORT_EDGE', 0)
+        self.min_short_edge = min_short_edge
+
+        self.stats = {
+            stage: {'evaluated': 0, 'rejected': 0, 'seconds': 0.0}
+            for stage in CASCADE_STAGES
+        }
+        # check_post may run on download threads
+        self._stats_lock = threading.Lock()
+
+    def settings(self) -> Tuple:
+        """Thresholds this cascade was built with (to decide whether it can be reused)."""
+        return (
+            tuple(self.content_categories or ()), self.min_quality_score, self.min_category_score,
+            self.min_overall_score, self.min_landscape_ratio, self.min_short_edge
+        )
+
+    def _record(self, stage: str, started: float, rejected: bool, count: int = 1):
+        """Update the counters and timing for a stage."""
+        seconds = time.perf_counter() - started
+        with self._stats_lock:
+            self.stats[stage]['evaluated'] += count
+            self.stats[stage]['seconds'] += seconds
+            if rejected:
+                self.stats[stage]['rejected'] += 1
+
+    def _dimension_rules(self, dimensions: Tuple[int, int]) -> Optional[str]:
+        """Apply the orientation and resolution rules to (width, height)."""
+        width, height = dimensions
+        if self.min_landscape_ratio and not is_landscape_dimensions(dimensions, self.min_landscape_ratio):
+            return 'not landscape'
+        if self.min_short_edge and min(width, height) < self.min_short_edge:
+            return f"resolution {width}x{height} below {self.min_short_edge}px"
+        return None
+
+    def check_post(self, post: Dict[str, Any], image_url: str = None, probe: bool = None) -> Optional[Tuple[str, str]]:
+        """
+        Run the stages that need no downloaded pixels.
+
+        The metadata stage rejects video posts and applies the dimension rules to
+        Apify's dimensions. If Apify has no dimensions and probing is enabled,
+        the header stage reads them from a partial download of image_url.
+
+        Args:
+            post: Apify post data.
+            image_url: URL of the post image, for the header probe.
+            probe: Whether to probe the image header. Defaults to config value.
+
+        Returns:
+            (stage, rejection reason) if the post is rejected, otherwise None.
+        """
+        started = time.perf_counter()
+        reason = None
+        if post.get('isVideo', False):
+            reason = 'video post'
+        else:
+            dimensions = get_post_dimensions(post)
+            if dimensions:
+                reason = self._dimension_rules(dimensions)
+        self._record('metadata', started, reason is not None)
+        if reason:
+            return 'metadata', reason
+
+        if probe is None:
+            probe = getattr(config, 'PROBE_DIMENSIONS_BEFORE_DOWNLOAD', True)
+        if image_url and probe and not get_post_dimensions(post):
+            started = time.perf_counter()
+            dimensions = resolve_image_dimensions(image_url, probe=True)
+            reason = self._dimension_rules(dimensions) if dimensions else None
+            self._record('header', started, reason is not None)
+            if reason:
+                return 'header', reason
+
+        return None
+
+    def _check_local(self, image_path: str, image: DecodedImage, analysis: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Run the dimensions, quality and video stages on a downloaded image."""
+        started = time.perf_counter()
+        reason = self._dimension_rules(image.size)
+        self._record('dimensions', started, reason is not None)
+        if reason:
+            return 'dimensions', reason
+
+        started = time.perf_counter()
+        analysis['quality_score'] = self.enhanced_filter.assess_image_quality(image)
+        reason = None
+        if analysis['quality_score'] < self.min_quality_score:
+            reason = f"quality score {analysis['quality_score']:.3f} < {self.min_quality_score}"
+        self._record('quality', started, reason is not None)
+        if reason:
+            return 'quality', reason
+
+        started = time.perf_counter()
+        self.enhanced_filter.detect_video(analysis, image_path, image)
+        reason = 'video thumbnail' if analysis['is_video_thumbnail'] else None
+        self._record('video', started, reason is not None)
+        if reason:
+            return 'video', reason
+
+        return None
+
+    def evaluate(self, image_paths: List[str], images: List[DecodedImage] = None) -> List[Tuple[bool, Dict[str, Any]]]:
+        """
+        Run the downloaded-image stages for many images.
+
+        Images that pass the local stages are sent to Google Vision together,
+        in batched requests, then scored and checked against the thresholds.
+
+        Args:
+            image_paths: Paths to the images.
+            images: Optional already loaded images, aligned with image_paths.
+
+        Returns:
+            List of (meets_criteria, analysis) tuples, aligned with image_paths.
+            Rejected analyses carry 'rejected_stage' and 'rejection_reason'.
+        """
+        if images is None:
+            images = [None] * len(image_paths)
+
+        results = []
+        pending = []  # (index, analysis, image) still needing Vision + scoring
+
+        for image_path, image in zip(image_paths, images):
+            analysis = self.enhanced_filter.new_analysis(image_path)
+            results.append((False, analysis))
+            try:
+                if image is None:
+                    image = DecodedImage.from_path(image_path)
+                rejection = self._check_local(image_path, image, analysis)
+            except Exception as e:
+                logger.error(f"Error analyzing image content for {image_path}: {e}")
+                rejection = ('error', str(e))
+            if rejection:
+                analysis['rejected_stage'], analysis['rejection_reason'] = rejection
+                continue
+            pending.append((len(results) - 1, analysis, image))
+
+        if pending:
+            started = time.perf_counter()
+            vision_results = [None] * len(pending)
+            if self.enhanced_filter.use_google_vision and self.enhanced_filter.vision_client:
+                vision_results = self.enhanced_filter.analyze_with_google_vision_batch(
+                    [image for _, _, image in pending]
+                )
+
+            rejected = 0
+            for (index, analysis, image), image_results in zip(pending, vision_results):
+                try:
+                    self.enhanced_filter.score_analysis(analysis, image, image_results)
+                    meets_criteria = self.enhanced_filter.check_criteria(
+                        analysis, self.content_categories, self.min_quality_score,
+                        self.min_category_score, self.min_overall_score
+                    )
+                except Exception as e:
+                    logger.error(f"Error analyzing image content for {analysis['image_path']}: {e}")
+                    meets_criteria = False
+                if not meets_criteria:
+                    rejected += 1
+                    analysis['rejected_stage'] = 'vision'
+                results[index] = (meets_criteria, analysis)
+
+            seconds = time.perf_counter() - started
+            with self._stats_lock:
+                self.stats['vision']['evaluated'] += len(pending)
+                self.stats['vision']['rejected'] += rejected
+                self.stats['vision']['seconds'] += seconds
+
+        return results
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-stage counters and timing.
+
+        Returns:
+            Dictionary keyed by stage with evaluated, rejected, seconds and
+            average milliseconds per evaluated image.
+        """
+        stats = {}
+        for stage in CASCADE_STAGES:
+            with self._stats_lock:
+                stage_stats = dict(self.stats[stage])
+            evaluated = stage_stats['evaluated']
+            stage_stats['avg_ms'] = (stage_stats['seconds'] / evaluated * 1000) if evaluated > 0 else 0
+            stats[stage] = stage_stats
+        return stats
+
+    def log_stats(self):
+        """Log a one-line summary per stage."""
+        for stage, stage_stats in self.get_stats().items():
+            logger.info(
+                f"Filter stage {stage}: evaluated={stage_stats['evaluated']}, "
+                f"rejected={stage_stats['rejected']}, time={stage_stats['seconds']:.2f}s "
+                f"({stage_stats['avg_ms']:.1f}ms/image)"
+            )
@@ -1,6 +1,6 @@
 import os
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 from PIL import Image
 import numpy as np
 import json
@@ -16,7 +16,9 @@ except ImportError:
     GOOGLE_VISION_AVAILABLE = False
 
 from .. import config
-from ..utils.image_utils import download_image
+from ..utils.image_utils import download_image, prepare_vision_payload
+from ..utils.decoded_image import DecodedImage
+from ..utils.vision_cache import get_vision_cache, vision_feature_key
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -52,6 +54,9 @@ class ImageContentFilter:
                 logger.error(f"Error initializing Google Vision API client: {e}")
                 self.use_google_vision = False
         
+        # Persistent Vision result cache (None when disabled)
+        self.vision_cache = get_vision_cache() if self.use_google_vision else None
+        
         # Get content filter list from config
         self.content_filters = config.CV_CONTENT_DESCRIPTIONS_FILTER or []
         if not self.content_filters:
@@ -60,14 +65,15 @@ class ImageContentFilter:
         logger.info(f"Image content filter initialized. Using Google Vision: {self.use_google_vision}")
         logger.info(f"Content filters: {self.content_filters}")
         
-    def analyze_image(self, image_path: str = None, image_url: str = None, image_data: bytes = None) -> Dict[str, Any]:
+    def analyze_image(self, image_path: str = None, image_url: str = None,
+                      image_data: Union[bytes, DecodedImage] = None) -> Dict[str, Any]:
         """
         Analyze an image to detect its content.
         
         Args:
             image_path: Path to the local image file.
             image_url: URL of the image to analyze.
-            image_data: Binary image data.
+            image_data: Binary image data, or an already loaded DecodedImage.
             
         Returns:
             A dictionary containing analysis results including:
@@ -78,7 +84,9 @@ class ImageContentFilter:
             - safe_search: Safe search annotations if available
         """
         # Ensure we have image data to analyze
-        if image_data is None:
+        if isinstance(image_data, DecodedImage):
+            image_data = image_data.data
+        elif image_data is None:
             if image_path:
                 with open(image_path, 'rb') as f:
                     image_data = f.read()
@@ -107,6 +115,13 @@ class ImageContentFilter:
             Dictionary of analysis results.
         """
         try:
+            # Downscale large originals before upload; labels don't need full resolution
+            image_data = prepare_vision_payload(
+                image_data,
+                max_edge=getattr(config, 'VISION_MAX_EDGE', 1024),
+                quality=getattr(config, 'VISION_JPEG_QUALITY', 85)
+            )
+            
             # Create image object
             image = vision.Image(content=image_data)
             
@@ -119,6 +134,13 @@ class ImageContentFilter:
                 vision.Feature(type_=vision.Feature.Type.SAFE_SEARCH_DETECTION)
             ]
             
+            # Reuse cached results for identical image bytes
+            cache_key = vision_feature_key('basic', features)
+            if self.vision_cache:
+                cached = self.vision_cache.get(image_data, cache_key)
+                if cached is not None:
+                    return cached
+            
             # Send request
             response = self.vision_client.annotate_image({
                 'image': image,
@@ -192,6 +214,9 @@ class ImageContentFilter:
                     'racy': vision.SafeSearchAnnotation.Likelihood.Name(response.safe_search_annotation.racy)
                 }
                 
+            if self.vision_cache:
+                self.vision_cache.put(image_data, cache_key, results)
+            
             return results
             
         except Exception as e:
@@ -1,11 +1,22 @@
 import os
 import json
+import time
+import queue
+import threading
 import logging
-from typing import List, Dict, Optional, Any, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Tuple
+from urllib.parse import urlparse
 from apify_client import ApifyClient
 from .. import config
-from ..utils.image_utils import download_image, is_landscape, get_image_metadata, create_storage_structure
+from ..utils.image_utils import (
+    download_image, is_landscape, is_landscape_dimensions, resolve_image_dimensions,
+    get_image_metadata, create_storage_structure
+)
 from ..utils.gcs_storage import GCSStorage
+from ..utils.upload_queue import UploadQueue, get_upload_queue
+from ..utils.download_engine import DownloadEngine
+from ..utils.decoded_image import DecodedImage
 from ..utils.image_tracker import ImageTracker
 from .image_filter import ImageContentFilter
 from .enhanced_content_filter import EnhancedContentFilter
@@ -86,12 +97,28 @@ if not config.APIFY_API_TOKEN:
     logger.error("APIFY_API_TOKEN not found. Please set it in your .env file.")
     # Depending on execution context, might want to raise an exception or exit
 
+# Actor run statuses after which the run's dataset no longer changes
+TERMINAL_RUN_STATUSES = ('SUCCEEDED', 'FAILED', 'TIMED-OUT', 'ABORTED')
+
 def initialize_apify_client():
     """Initializes and returns the ApifyClient with the API token."""
     if not config.APIFY_API_TOKEN:
         raise ValueError("APIFY_API_TOKEN is not configured.")
     return ApifyClient(config.APIFY_API_TOKEN)
 
+def profile_username(profile_url: str) -> str:
+    """
+    Get the username from an Instagram profile URL.
+    
+    Args:
+        profile_url: Profile URL (e.g. https://www.instagram.com/username/) or a bare username.
+        
+    Returns:
+        The lowercased username.
+    """
+    path = urlparse(profile_url).path if '://' in profile_url else profile_url
+    return path.strip('/').split('/')[0].lstrip('@').lower()
+
 def extract_hashtags(caption: str) -> List[str]:
     """
     Extract hashtags from a post caption.
@@ -138,7 +165,9 @@ def extract_post_metadata(post: Dict[str, Any]) -> Dict[str, Any]:
     
     return metadata
 
-def run_instagram_scraper_for_profiles(client: ApifyClient, profile_urls: List[str], max_posts_per_profile: int = 100):
+def run_instagram_scraper_for_profiles(client: ApifyClient, profile_urls: List[str], max_posts_per_profile: int = 100,
+                                       only_posts_newer_than: str = None, memory_mbytes: int = None,
+                                       timeout_secs: int = 300, wait: bool = True):
     """
     Runs the apify/instagram-scraper Actor to fetch posts from a list of Instagram profile URLs.
 
@@ -146,6 +175,12 @@ def run_instagram_scraper_for_profiles(client: ApifyClient, profile_urls: List[s
         client: An initialized ApifyClient instance.
         profile_urls: A list of Instagram profile URLs to scrape.
         max_posts_per_profile: Maximum number of recent posts to retrieve from each profile.
+        only_posts_newer_than: Only fetch posts published after this date or ISO timestamp
+                               (applies to every profile in the run).
+        memory_mbytes: Memory for the actor run in megabytes (actor default if None).
+        timeout_secs: Timeout of the actor run in seconds.
+        wait: Whether to wait for the run to finish. If False the run is only
+              started, and its dataset fills while it is in progress.
 
     Returns:
         The Actor run object containing details about the scraping run, or None if an error occurs.
@@ -161,19 +196,330 @@ def run_instagram_scraper_for_profiles(client: ApifyClient, profile_urls: List[s
         "resultsType": "posts", # We want the post details
         "resultsLimit": max_posts_per_profile, # Max posts from each URL provided in directUrls
         # "searchLimit" and "searchType" are not primary for direct URL scraping of profiles.
-        # Other useful params could be: "isUserTaggedFeedURL", "isUserReelFeedURL", "onlyPostsNewerThan"
+        # Other useful params could be: "isUserTaggedFeedURL", "isUserReelFeedURL"
     }
+    if only_posts_newer_than:
+        actor_input["onlyPostsNewerThan"] = only_posts_newer_than
+        print(f"Only fetching posts newer than {only_posts_newer_than}")
 
     try:
         # Ensure you have the correct Actor ID if it's not the generic one or if you're using a specific version
         actor = client.actor("apify/instagram-scraper") 
-        run = actor.call(run_input=actor_input, timeout_secs=300) # Wait up to 5 minutes for potentially larger scrapes
+        if not wait:
+            run = actor.start(run_input=actor_input, memory_mbytes=memory_mbytes or None, timeout_secs=timeout_secs)
+            print(f"Scraping run for profiles started. Run ID: {run.get('id')}, Dataset ID: {run.get('defaultDatasetId')}")
+            return run
+        run = actor.call(run_input=actor_input, memory_mbytes=memory_mbytes or None, timeout_secs=timeout_secs)
         print(f"Scraping run for profiles finished. Run ID: {run.get('id')}, Dataset ID: {run.get('defaultDatasetId')}")
         return run
     except Exception as e:
         print(f"Error running Instagram scraper for profiles {profile_urls}: {e}")
         return None
 
+def _run_scraper_shard(client: ApifyClient, shard: Dict[str, Any],
+                       memory_mbytes: int = None, timeout_secs: int = 300) -> Optional[str]:
+    """Make one shard's actor run; returns its dataset ID, or None if the run failed."""
+    run = run_instagram_scraper_for_profiles(
+        client,
+        shard['profile_urls'],
+        shard.get('max_posts', 100),
+        shard.get('only_posts_newer_than'),
+        memory_mbytes=memory_mbytes,
+        timeout_secs=timeout_secs
+    )
+    if not run or not run.get('defaultDatasetId'):
+        return None
+    if run.get('status') not in (None, 'SUCCEEDED'):
+        # A timed-out or aborted run has a partial dataset; the retry fetches it whole
+        logger.warning(f"Actor run {run.get('id')} for {', '.join(shard['profile_urls'])} ended {run.get('status')}")
+        return None
+    return run['defaultDatasetId']
+
+def run_instagram_scraper_shards(client: ApifyClient,
+                                 shards: List[Dict[str, Any]],
+                                 max_parallel: int = None,
+                                 memory_mbytes: int = None,
+                                 timeout_secs: int = None,
+                                 max_retries: int = None,
+                                 stream: bool = False) -> Iterator[Tuple[Dict[str, Any], Optional[Iterable[Dict[str, Any]]]]]:
+    """
+    Run scraper shards as concurrent actor runs, yielding each shard's posts as its run finishes.
+    
+    A slow or large profile only holds up its own shard, and a shard whose
+    run fails or times out is retried on its own without re-running the others.
+    
+    Args:
+        client: An initialized ApifyClient instance.
+        shards: Actor runs to make, each a dict with 'profile_urls', 'max_posts' and
+                optionally 'only_posts_newer_than'. Other keys are passed back untouched.
+        max_parallel: Maximum concurrent actor runs. Defaults to config value.
+        memory_mbytes: Memory per actor run in megabytes. Defaults to config value (0 = actor default).
+        timeout_secs: Timeout per actor run in seconds. Defaults to config value.
+        max_retries: Retries per failed shard. Defaults to config value.
+        stream: Yield each finished shard's posts as a lazy iterator over its dataset
+                pages (see iterate_scraped_data) instead of a list. A dataset read
+                that fails part way then raises from the iterator rather than
+                being retried.
+        
+    Yields:
+        Tuples of (shard, posts) in completion order; posts is None for a shard
+        that still failed after its retries.
+    """
+    if max_parallel is None:
+        max_parallel = getattr(config, 'APIFY_MAX_PARALLEL_RUNS', 4)
+    if memory_mbytes is None:
+        memory_mbytes = getattr(config, 'APIFY_RUN_MEMORY_MB', 0)
+    if timeout_secs is None:
+        timeout_secs = getattr(config, 'APIFY_RUN_TIMEOUT_SECS', 300)
+    if max_retries is None:
+        max_retries = getattr(config, 'APIFY_SHARD_RETRIES', 2)
+    
+    if not shards:
+        return
+    
+    logger.info(f"Running {len(shards)} scraper shards, up to {max_parallel} at a time")
+    
+    def attempt(shard, delay=0):
+        time.sleep(delay)
+        try:
+            dataset_id = _run_scraper_shard(client, shard, memory_mbytes, timeout_secs)
+            if dataset_id is None or stream:
+                return dataset_id
+            return get_scraped_data(client, dataset_id)
+        except Exception as e:
+            logger.error(f"Error running scraper shard {', '.join(shard['profile_urls'])}: {e}")
+            return None
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(shards))),
+                            thread_name_prefix='apify-run') as executor:
+        pending = {executor.submit(attempt, shard): (shard, 0) for shard in shards}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard, retries = pending.pop(future)
+                posts = future.result()
+                if posts is None and retries < max_retries:
+                    logger.warning(f"Retrying scraper shard {', '.join(shard['profile_urls'])} "
+                                   f"(retry {retries + 1}/{max_retries})")
+                    pending[executor.submit(attempt, shard, min(30, 2 ** retries))] = (shard, retries + 1)
+                    continue
+                if posts is None:
+                    logger.error(f"Scraper shard {', '.join(shard['profile_urls'])} failed after {retries + 1} attempts")
+                elif stream:
+                    posts = iterate_scraped_data(client, posts)
+                yield shard, posts
+
+def make_profile_shards(profile_urls: List[str], max_posts_per_profile: int,
+                        shard_size: int = None) -> List[Dict[str, Any]]:
+    """
+    Split profiles into scraper shards.
+    
+    Args:
+        profile_urls: Instagram profile URLs to scrape.
+        max_posts_per_profile: Maximum number of recent posts to retrieve from each profile.
+        shard_size: Profiles per actor run. Defaults to config value (0 = all in one run).
+        
+    Returns:
+        Shards for run_instagram_scraper_shards.
+    """
+    if shard_size is None:
+        shard_size = getattr(config, 'APIFY_SHARD_SIZE', 0)
+    shard_size = shard_size or len(profile_urls) or 1
+    return [
+        {'profile_urls': profile_urls[i:i + shard_size], 'max_posts': max_posts_per_profile}
+        for i in range(0, len(profile_urls), shard_size)
+    ]
+
+def stream_instagram_scraper_shards(client: ApifyClient,
+                                    shards: List[Dict[str, Any]],
+                                    max_parallel: int = None,
+                                    memory_mbytes: int = None,
+                                    timeout_secs: int = None,
+                                    max_retries: int = None,
+                                    poll_interval: float = None) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    Start scraper shards and yield their posts while the actor runs are still in progress.
+    
+    Each shard's run is started without waiting and its dataset is polled for
+    newly appended items on a pool thread (see iterate_live_scraped_data), so
+    downstream stages work on the first posts while the actors keep scraping.
+    A failed run is retried; posts already yielded from an earlier attempt
+    are not yielded again.
+    
+    Args:
+        client: An initialized ApifyClient instance.
+        shards: Actor runs to make, as for run_instagram_scraper_shards.
+        max_parallel: Maximum concurrent actor runs. Defaults to config value.
+        memory_mbytes: Memory per actor run in megabytes. Defaults to config value (0 = actor default).
+        timeout_secs: Timeout per actor run in seconds. Defaults to config value.
+        max_retries: Retries per failed shard. Defaults to config value.
+        poll_interval: Seconds between dataset polls while a run is in progress. Defaults to config value.
+        
+    Yields:
+        Tuples of (shard, post) as posts arrive, and (shard, None) once for a
+        shard that still failed after its retries.
+    """
+    if max_parallel is None:
+        max_parallel = getattr(config, 'APIFY_MAX_PARALLEL_RUNS', 4)
+    if memory_mbytes is None:
+        memory_mbytes = getattr(config, 'APIFY_RUN_MEMORY_MB', 0)
+    if timeout_secs is None:
+        timeout_secs = getattr(config, 'APIFY_RUN_TIMEOUT_SECS', 300)
+    if max_retries is None:
+        max_retries = getattr(config, 'APIFY_SHARD_RETRIES', 2)
+    
+    if not shards:
+        return
+    
+    logger.info(f"Streaming {len(shards)} scraper shards, up to {max_parallel} at a time")
+    
+    # Bounded, so polling pauses while the consumer is behind
+    results = queue.Queue(maxsize=getattr(config, 'APIFY_DATASET_PAGE_SIZE', 500))
+    stopped = threading.Event()
+    shard_done = object()
+    
+    def put(item):
+        while not stopped.is_set():
+            try:
+                results.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def scrape(shard):
+        """Run one shard with retries, queueing its posts (runs on a pool thread)."""
+        profiles = ', '.join(shard['profile_urls'])
+        seen = set()
+        for attempt in range(max_retries + 1):
+            if attempt > 0:
+                logger.warning(f"Retrying scraper shard {profiles} (retry {attempt}/{max_retries})")
+                time.sleep(min(30, 2 ** (attempt - 1)))
+            try:
+                run = run_instagram_scraper_for_profiles(
+                    client,
+                    shard['profile_urls'],
+                    shard.get('max_posts', 100),
+                    shard.get('only_posts_newer_than'),
+                    memory_mbytes=memory_mbytes,
+                    timeout_secs=timeout_secs,
+                    wait=False
+                )
+                if not run or not run.get('defaultDatasetId'):
+                    continue
+                for post in iterate_live_scraped_data(client, run, poll_interval):
+                    key = post.get('shortCode') or post.get('id')
+                    if key is not None:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    if not put((shard, post)):
+                        return
+                put((shard, shard_done))
+                return
+            except Exception as e:
+                logger.error(f"Error streaming scraper shard {profiles}: {e}")
+        logger.error(f"Scraper shard {profiles} failed after {max_retries + 1} attempts")
+        put((shard, None))
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(shards))),
+                            thread_name_prefix='apify-run') as executor:
+        for shard in shards:
+            executor.submit(scrape, shard)
+        
+        try:
+            remaining = len(shards)
+            while remaining:
+                shard, post = results.get()
+                if post is shard_done:
+                    remaining -= 1
+                    continue
+                if post is None:
+                    remaining -= 1
+                yield shard, post
+        finally:
+            # Lets the pool threads exit if the consumer stops early
+            stopped.set()
+
+def iterate_live_scraped_data(client: ApifyClient, run: Dict[str, Any],
+                              poll_interval: float = None, page_size: int = None) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the dataset of an Actor run that may still be in progress.
+    
+    Items are yielded as soon as the run appends them; between polls the
+    run is watched so a finished run is drained without waiting out the
+    poll interval.
+    
+    Args:
+        client: An initialized ApifyClient instance.
+        run: The Actor run object, e.g. from run_instagram_scraper_for_profiles(wait=False).
+        poll_interval: Seconds between dataset polls while the run is in progress. Defaults to config value.
+        page_size: Items fetched per request. Defaults to config value.
+        
+    Yields:
+        Dataset items in stored order.
+        
+    Raises:
+        RuntimeError: If the run ends other than SUCCEEDED (after every item it
+                      produced has been yielded).
+    """
+    if poll_interval is None:
+        poll_interval = getattr(config, 'APIFY_POLL_INTERVAL_SECS', 5)
+    
+    run_client = client.run(run['id'])
+    dataset_id = run['defaultDatasetId']
+    offset = 0
+    status = run.get('status')
+    while True:
+        # Status is read before the dataset, so the read after a terminal status is complete
+        finished = status in TERMINAL_RUN_STATUSES
+        for item in iterate_scraped_data(client, dataset_id, page_size, offset):
+            offset += 1
+            yield item
+        if finished:
+            break
+        # Returns early when the run finishes
+        run = run_client.wait_for_finish(wait_secs=max(1, int(poll_interval))) or run
+        status = run.get('status')
+    
+    logger.info(f"Actor run {run.get('id')} ended {status} after {offset} items")
+    if status != 'SUCCEEDED':
+        raise RuntimeError(f"Actor run {run.get('id')} ended {status}")
+
+def iterate_scraped_data(client: ApifyClient, dataset_id: str, page_size: int = None,
+                         offset: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the items of an Actor run's dataset, fetching one page at a time.
+    
+    Only one page is held in memory, and callers can start working on the
+    first items while later pages are still to be fetched.
+    
+    Args:
+        client: An initialized ApifyClient instance.
+        dataset_id: The ID of the dataset.
+        page_size: Items fetched per request. Defaults to config value.
+        offset: Number of items to skip at the start of the dataset.
+        
+    Yields:
+        Dataset items in stored order.
+        
+    Raises:
+        Exception: If fetching a page fails.
+    """
+    if page_size is None:
+        page_size = getattr(config, 'APIFY_DATASET_PAGE_SIZE', 500)
+    
+    dataset = client.dataset(dataset_id)
+    while True:
+        # ListPage.total lags behind a just-finished run, so read until a short page instead
+        page = dataset.list_items(offset=offset, limit=page_size)
+        items = page.items
+        logger.debug(f"Fetched {len(items)} items at offset {offset} from dataset {dataset_id}")
+        yield from items
+        offset += len(items)
+        if len(items) < page_size:
+            break
+
 def get_scraped_data(client: ApifyClient, run_id: str) -> Optional[List[Dict[str, Any]]]:
     """
     Fetches items from the dataset produced by an Actor run.
@@ -191,28 +537,47 @@ def get_scraped_data(client: ApifyClient, run_id: str) -> Optional[List[Dict[str
         
     logger.info(f"Fetching dataset for run ID: {run_id}...")
     try:
-        dataset_items = client.dataset(run_id).list_items().items
+        dataset_items = list(iterate_scraped_data(client, run_id))
         logger.info(f"Successfully fetched {len(dataset_items)} items from dataset {run_id}.")
         return dataset_items
     except Exception as e:
         logger.error(f"Error fetching dataset items for run ID {run_id}: {e}")
         return None
         
-def download_images_from_posts(posts: List[Dict[str, Any]], 
+def download_images_from_posts(posts: Iterable[Dict[str, Any]], 
                                base_dir: str = 'data',
                                min_landscape_ratio: float = 1.2,
                                landscape_only: bool = True,
-                               use_gcs: bool = True) -> List[Dict[str, Any]]:
+                               use_gcs: bool = True,
+                               max_workers: int = None,
+                               max_per_host: int = None,
+                               probe_dimensions: bool = None,
+                               image_cache: Dict[str, DecodedImage] = None) -> List[Dict[str, Any]]:
     """
     Download images from Instagram posts, filter for landscape orientation if specified,
     and store metadata.
     
+    Downloads run concurrently; each image is landscape-checked, written and
+    uploaded as soon as its download completes. A failure on one post never
+    affects the others. Posts are consumed lazily, so they may be streamed
+    from the dataset while earlier images are downloading.
+    
     Args:
-        posts: List of Instagram post data from Apify.
+        posts: Instagram post data from Apify (any iterable, e.g. a dataset page iterator).
         base_dir: Base directory for local storage.
         min_landscape_ratio: Minimum width/height ratio to consider as landscape.
         landscape_only: Whether to filter for landscape images only.
         use_gcs: Whether to upload images to Google Cloud Storage.
+        max_workers: Maximum concurrent downloads. Defaults to config value.
+        max_per_host: Maximum concurrent downloads per host. Defaults to config value.
+        probe_dimensions: Whether to reject non-landscape images from Apify's
+                          dimensions or an HTTP header probe before downloading
+                          them in full. Defaults to config value.
+        image_cache: Optional dict that receives the downloaded image of each
+                     kept post, keyed by local path, so later stages can reuse
+                     it instead of reading the file back from disk. Images are
+                     only added while the cache holds less than
+                     DOWNLOAD_IMAGE_CACHE_MB of image bytes.
         
     Returns:
         A list of processed post dictionaries with local paths and metadata.
@@ -226,83 +591,183 @@ def download_images_from_posts(posts: List[Dict[str, Any]],
         logger.warning("GCS client not available. Falling back to local storage only.")
         use_gcs = False
     
-    processed_posts = []
+    # Uploads run in the background rather than between downloads
+    uploads = get_upload_queue(gcs) if use_gcs else None
     
-    for i, post in enumerate(posts):
-        try:
-            # This function should only be called with photo posts, but double-check anyway
-            if post.get('isVideo', False):
-                logger.info(f"Skipping video post: {post.get('shortCode')}")
+    processed_by_index = {}
+    jobs = {}
+    post_count = 0
+    cache_budget = getattr(config, 'DOWNLOAD_IMAGE_CACHE_MB', 256) * 1024 * 1024
+    cached_bytes = 0
+
+    if max_workers is None:
+        max_workers = getattr(config, 'DOWNLOAD_MAX_WORKERS', 8)
+    if max_per_host is None:
+        max_per_host = getattr(config, 'DOWNLOAD_MAX_PER_HOST', 4)
+
+    def download_jobs():
+        """Yield (index, url, payload) download jobs for every usable post."""
+        nonlocal post_count
+        for i, post in enumerate(posts):
+            post_count += 1
+            try:
+                # This function should only be called with photo posts, but double-check anyway
+                if post.get('isVideo', False):
+                    logger.info(f"Skipping video post: {post.get('shortCode')}")
+                    continue
+
+                # Get image URL - prefer displayUrl for highest quality
+                image_url = post.get('displayUrl')
+                if not image_url and 'images' in post and post['images']:
+                    # Fallback to first image in images array
+                    image_url = post['images'][0]
+
+                if not image_url:
+                    logger.warning(f"No image URL found for post {post.get('shortCode')}")
+                    continue
+
+                # Extract post metadata
+                post_metadata = extract_post_metadata(post)
+                shortcode = post.get('shortCode', f"unknown_{i}")
+
+                # Generate local filename and path
+                local_filename = f"{post_metadata['owner_username']}_{shortcode}.jpg"
+                local_path = os.path.join(storage_paths['original'], local_filename)
+
+                jobs[i] = {
+                    'post': post,
+                    'post_metadata': post_metadata,
+                    'shortcode': shortcode,
+                    'local_filename': local_filename,
+                    'local_path': local_path
+                }
+                yield i, image_url, jobs[i]
+            except Exception as e:
+                logger.error(f"Error processing post {post.get('shortCode', 'unknown')}: {e}")
                 continue
-                
-            # Get image URL - prefer displayUrl for highest quality
-            image_url = post.get('displayUrl')
-            if not image_url and 'images' in post and post['images']:
-                # Fallback to first image in images array
-                image_url = post['images'][0]
-                
-            if not image_url:
-                logger.warning(f"No image URL found for post {post.get('shortCode')}")
+
+    if probe_dimensions is None:
+        probe_dimensions = getattr(config, 'PROBE_DIMENSIONS_BEFORE_DOWNLOAD', True)
+
+    def fetch(image_url: str, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Download a single post image (runs on a pool thread)."""
+        # Reject portrait/square images from Apify dimensions or the image header first
+        if landscape_only and probe_dimensions:
+            dimensions = resolve_image_dimensions(image_url, job['post'])
+            if dimensions and not is_landscape_dimensions(dimensions, min_landscape_ratio):
+                return {'image_data': None, 'probe_rejected': True, 'dimensions': dimensions}
+        return {'image_data': download_image(image_url, job['local_path']), 'probe_rejected': False}
+
+    # Downloads run concurrently; each one is post-processed here as soon as it lands
+    engine = DownloadEngine(max_workers=max_workers, max_per_host=max_per_host)
+    for index, fetched, error in engine.run(download_jobs(), fetch):
+        job = jobs.pop(index)
+        shortcode = job['shortcode']
+        try:
+            if error is not None:
+                raise error
+
+            if fetched['probe_rejected']:
+                width, height = fetched['dimensions']
+                logger.info(f"Skipping non-landscape image for post {shortcode} ({width}x{height}, not downloaded)")
                 continue
-                
-            # Extract post metadata
-            post_metadata = extract_post_metadata(post)
-            shortcode = post.get('shortCode', f"unknown_{i}")
-            
-            # Generate local filename and path
-            local_filename = f"{post_metadata['owner_username']}_{shortcode}.jpg"
-            local_path = os.path.join(storage_paths['original'], local_filename)
-            
-            # Download image
-            image_data = download_image(image_url, local_path)
+
+            image_data = fetched['image_data']
             if not image_data:
                 logger.warning(f"Failed to download image for post {shortcode}")
                 continue
-                
-            # Check if landscape orientation
-            landscape = is_landscape(image_data, min_landscape_ratio)
-            post_metadata['is_landscape'] = landscape
-            
-            # Skip if not landscape and we only want landscape images
-            if landscape_only and not landscape:
-                logger.info(f"Skipping non-landscape image for post {shortcode}")
-                # Delete the downloaded file
-                if os.path.exists(local_path):
-                    os.remove(local_path)
-                continue
-                
-            # Extract image metadata
-            image_metadata = get_image_metadata(image_data)
-            post_metadata['image_metadata'] = image_metadata
-            post_metadata['local_path'] = local_path
-            
-            # Save metadata to JSON file
-            metadata_path = os.path.join(storage_paths['metadata'], f"{shortcode}_metadata.json")
-            with open(metadata_path, 'w') as f:
-                json.dump(post_metadata, f, indent=2)
-                
-            # Upload to GCS if configured
-            if use_gcs:
-                # Upload image
-                gcs_image_path = f"images/original/{local_filename}"
-                if gcs.upload_file(local_path, gcs_image_path):
-                    post_metadata['gcs_path'] = gcs_image_path
-                
-                # Upload metadata
-                gcs_metadata_path = f"metadata/{shortcode}_metadata.json"
-                gcs.upload_file(metadata_path, gcs_metadata_path)
-                
-            # Add to processed posts
-            processed_posts.append(post_metadata)
-            logger.info(f"Successfully processed post {shortcode}")
-            
+
+            image = DecodedImage.from_bytes(image_data, path=job['local_path'])
+            post_metadata = _finalize_downloaded_post(
+                job, image, storage_paths, min_landscape_ratio, landscape_only,
+                gcs if use_gcs else None, uploads
+            )
+            if post_metadata is not None:
+                processed_by_index[index] = post_metadata
+                if image_cache is not None and cached_bytes + len(image_data) <= cache_budget:
+                    image.release()
+                    image_cache[job['local_path']] = image
+                    cached_bytes += len(image_data)
+                logger.info(f"Successfully processed post {shortcode}")
+
         except Exception as e:
-            logger.error(f"Error processing post {post.get('shortCode', 'unknown')}: {e}")
+            logger.error(f"Error processing post {shortcode}: {e}")
             continue
-            
-    logger.info(f"Downloaded {len(processed_posts)} images out of {len(posts)} posts.")
+
+    # Keep results in the same order as the input posts
+    processed_posts = [processed_by_index[index] for index in sorted(processed_by_index)]
+
+    logger.info(f"Downloaded {len(processed_posts)} images out of {post_count} posts.")
     return processed_posts
 
+def _finalize_downloaded_post(job: Dict[str, Any],
+                              image: DecodedImage,
+                              storage_paths: Dict[str, str],
+                              min_landscape_ratio: float,
+                              landscape_only: bool,
+                              gcs: Optional[GCSStorage],
+                              uploads: Optional[UploadQueue] = None) -> Optional[Dict[str, Any]]:
+    """
+    Run the landscape check, metadata write and GCS upload for a downloaded post.
+
+    Args:
+        job: Download job built by download_images_from_posts.
+        image: The downloaded image.
+        storage_paths: Local storage directories.
+        min_landscape_ratio: Minimum width/height ratio to consider as landscape.
+        landscape_only: Whether to filter for landscape images only.
+        gcs: GCS client to upload with, or None to keep files local.
+        uploads: Background upload queue to use instead of uploading inline.
+
+    Returns:
+        The post metadata dictionary, or None if the post was skipped.
+    """
+    post_metadata = job['post_metadata']
+    shortcode = job['shortcode']
+    local_path = job['local_path']
+    local_filename = job['local_filename']
+
+    # Check if landscape orientation
+    landscape = is_landscape(image, min_landscape_ratio)
+    post_metadata['is_landscape'] = landscape
+
+    # Skip if not landscape and we only want landscape images
+    if landscape_only and not landscape:
+        logger.info(f"Skipping non-landscape image for post {shortcode}")
+        # Delete the downloaded file
+        if os.path.exists(local_path):
+            os.remove(local_path)
+        return None
+
+    # Extract image metadata
+    image_metadata = get_image_metadata(image)
+    post_metadata['image_metadata'] = image_metadata
+    post_metadata['local_path'] = local_path
+
+    # Save metadata to JSON file
+    metadata_path = os.path.join(storage_paths['metadata'], f"{shortcode}_metadata.json")
+    with open(metadata_path, 'w') as f:
+        json.dump(post_metadata, f, indent=2)
+
+    # Upload to GCS if configured
+    if gcs is not None:
+        gcs_image_path = f"images/original/{local_filename}"
+        gcs_metadata_path = f"metadata/{shortcode}_metadata.json"
+        if uploads is not None:
+            # The journal guarantees the upload completes, in this run or the next
+            uploads.enqueue(local_path, gcs_image_path)
+            uploads.enqueue(metadata_path, gcs_metadata_path)
+            post_metadata['gcs_path'] = gcs_image_path
+        else:
+            # Upload image
+            if gcs.upload_file(local_path, gcs_image_path):
+                post_metadata['gcs_path'] = gcs_image_path
+
+            # Upload metadata
+            gcs.upload_file(metadata_path, gcs_metadata_path)
+
+    return post_metadata
+
 def process_instagram_posts(profile_urls: List[str] = None, 
                             max_posts: int = 100,
                             landscape_only: bool = True, 
@@ -315,7 +780,8 @@ def process_instagram_posts(profile_urls: List[str] = None,
                             content_categories: List[str] = None,
                             min_quality_score: float = None,
                             min_category_score: float = None,
-                            min_overall_score: float = None) -> List[Dict[str, Any]]:
+                            min_overall_score: float = None,
+                            async_scrape: bool = None) -> List[Dict[str, Any]]:
     """
     Complete workflow to scrape Instagram posts, download images, and process metadata.
     
@@ -334,6 +800,8 @@ def process_instagram_posts(profile_urls: List[str] = None,
         min_quality_score: Minimum quality score for enhanced filtering. Defaults to config value.
         min_category_score: Minimum category score for enhanced filtering. Defaults to config value.
         min_overall_score: Minimum overall score for enhanced filtering. Defaults to config value.
+        async_scrape: Start downloading posts while the actor runs are still in progress,
+                      instead of once each run has finished. Defaults to config value.
         
     Returns:
         A list of processed posts with image paths and metadata.
@@ -356,54 +824,74 @@ def process_instagram_posts(profile_urls: List[str] = None,
         logger.error(f"Failed to initialize Apify client: {e}")
         return []
     
-    # Run scraper
-    logger.info(f"Starting Instagram scraping process for profiles: {profile_urls}")
-    scraper_run = run_instagram_scraper_for_profiles(client, profile_urls, max_posts)
+    if async_scrape is None:
+        async_scrape = getattr(config, 'APIFY_ASYNC_SCRAPE', False)
     
-    if not scraper_run:
-        logger.error("Scraping failed: No run object returned.")
-        return []
-        
-    if not scraper_run.get('defaultDatasetId'):
-        logger.error(f"Scraping did not produce a dataset. Run details: {scraper_run}")
-        return []
-        
-    # Get scraped data
-    dataset_id = scraper_run['defaultDatasetId']
-    logger.info(f"Fetching data from dataset ID: {dataset_id}")
-    posts = get_scraped_data(client, dataset_id)
+    # Run scraper; profiles are sharded across concurrent actor runs. Posts are streamed into
+    # the downloads page by page, as each run finishes or, in async mode, while it is running
+    logger.info(f"Starting Instagram scraping process for profiles: {profile_urls}")
+    shards = make_profile_shards(profile_urls, max_posts)
+    counts = {'posts': 0, 'videos': 0, 'images': 0}
+    failed_profiles = []
     
-    if not posts:
-        logger.error("No posts found in scraped data.")
-        return []
-        
-    logger.info(f"Retrieved {len(posts)} posts from Instagram.")
+    def scraped_posts():
+        """Yield (shard, post) pairs, with post None for a shard that failed."""
+        if async_scrape:
+            yield from stream_instagram_scraper_shards(client, shards)
+            return
+        for shard, shard_posts in run_instagram_scraper_shards(client, shards, stream=True):
+            if shard_posts is None:
+                yield shard, None
+                continue
+            try:
+                for post in shard_posts:
+                    yield shard, post
+            except Exception as e:
+                logger.error(f"Error fetching scraped data for {', '.join(shard['profile_urls'])}: {e}")
+                yield shard, None
     
-    # Filter out video posts at the API level
-    photo_posts = [post for post in posts if not post.get('isVideo', False)]
-    logger.info(f"Filtered {len(posts)} posts to {len(photo_posts)} photo posts (excluded {len(posts) - len(photo_posts)} videos).")
+    def photo_posts():
+        """Yield the photo posts of every shard as they arrive."""
+        for shard, post in scraped_posts():
+            if post is None:
+                failed_profiles.extend(shard['profile_urls'])
+                continue
+            counts['posts'] += 1
+            # Filter out video posts at the API level
+            if post.get('isVideo', False):
+                counts['videos'] += 1
+                continue
+            if post.get('displayUrl') or post.get('images'):
+                counts['images'] += 1
+            yield post
     
-    # Before filtering, check if we have images in the photo posts
-    image_count = sum(1 for post in photo_posts if post.get('displayUrl') or (post.get('images') and post['images']))
-    logger.info(f"Found {image_count} images in {len(photo_posts)} photo posts.")
+    # Determine which filtering approach to use
+    if use_enhanced_filtering is None:
+        use_enhanced_filtering = getattr(config, 'USE_ENHANCED_FILTERING', True)
     
-    if image_count == 0:
-        logger.error("No images found in the retrieved posts.")
-        return []
-        
     # Download and process images
-    logger.info(f"Starting to download and process {image_count} images with settings: landscape_only={landscape_only}, min_ratio={min_landscape_ratio}")
+    logger.info(f"Starting to download and process images with settings: landscape_only={landscape_only}, min_ratio={min_landscape_ratio}")
+    # Keep downloaded images in memory (up to a byte budget) for the enhanced filter so they aren't read back from disk
+    image_cache = {} if use_enhanced_filtering else None
     processed_posts = download_images_from_posts(
-        photo_posts, 
+        photo_posts(), 
         base_dir=base_dir,
         min_landscape_ratio=min_landscape_ratio,
         landscape_only=landscape_only,
-        use_gcs=use_gcs
+        use_gcs=use_gcs,
+        image_cache=image_cache
     )
     
-    # Determine which filtering approach to use
-    if use_enhanced_filtering is None:
-        use_enhanced_filtering = getattr(config, 'USE_ENHANCED_FILTERING', True)
+    if failed_profiles:
+        logger.error(f"Scraping failed for profiles: {', '.join(failed_profiles)}")
+    
+    if not counts['posts']:
+        logger.error("No posts found in scraped data.")
+        return []
+    
+    logger.info(f"Retrieved {counts['posts']} posts from Instagram "
+                f"({counts['posts'] - counts['videos']} photo posts, excluded {counts['videos']} videos).")
+    logger.info(f"Found {counts['images']} images in {counts['posts'] - counts['videos']} photo posts.")
     
     # Apply content filtering if requested
     if (use_content_filter or use_enhanced_filtering) and processed_posts:
@@ -433,22 +921,31 @@ def process_instagram_posts(profile_urls: List[str] = None,
             
             # Filter posts with enhanced system
             enhanced_filtered_posts = []
+            filter_posts = []
             for post in processed_posts:
                 image_path = post.get('local_path')
                 if not image_path or not os.path.exists(image_path):
                     logger.warning(f"Missing local path for post {post.get('shortcode')}. Skipping enhanced filtering.")
                     continue
-                    
+                filter_posts.append(post)
+            
+            # Analyze images cheapest check first; survivors share batched Vision requests.
+            # Chunks of a few full Vision rounds bound how many images are held at once.
+            chunk_size = max(getattr(config, 'VISION_BATCH_SIZE', 16) * getattr(config, 'VISION_BATCH_CONCURRENCY', 4), 1)
+            criteria_results = []
+            for start in range(0, len(filter_posts), chunk_size):
+                chunk = filter_posts[start:start + chunk_size]
+                criteria_results.extend(enhanced_filter.meets_content_criteria_batch(
+                    [post['local_path'] for post in chunk],
+                    content_categories=content_categories,
+                    min_quality_score=min_quality_score,
+                    min_category_score=min_category_score,
+                    min_overall_score=min_overall_score,
+                    images=[image_cache.pop(post['local_path'], None) for post in chunk]
+                ))
+            
+            for post, (meets_criteria, analysis) in zip(filter_posts, criteria_results):
                 try:
-                    # Analyze image with enhanced filter
-                    meets_criteria, analysis = enhanced_filter.meets_content_criteria(
-                        image_path=image_path,
-                        content_categories=content_categories,
-                        min_quality_score=min_quality_score,
-                        min_category_score=min_category_score,
-                        min_overall_score=min_overall_score
-                    )
-                    
                     # Add enhanced analysis to post metadata
                     post['enhanced_filter_results'] = {
                         'meets_criteria': meets_criteria,
@@ -484,6 +981,8 @@ def process_instagram_posts(profile_urls: List[str] = None,
                         
                         if is_video:
                             logger.info(f"Post {post.get('shortcode')} rejected: Video thumbnail detected")
+                        elif analysis.get('rejection_reason'):
+                            logger.info(f"Post {post.get('shortcode')} rejected at {analysis.get('rejected_stage')} stage: {analysis['rejection_reason']}")
                         else:
                             logger.info(f"Post {post.get('shortcode')} rejected: overall={overall_score:.3f} (min={min_overall_score}), quality={quality_score:.3f} (min={min_quality_score})")
                         
@@ -497,6 +996,8 @@ def process_instagram_posts(profile_urls: List[str] = None,
                     enhanced_filtered_posts.append(post)
             
             logger.info(f"Enhanced filtering complete. Kept {len(enhanced_filtered_posts)} out of {len(processed_posts)} posts.")
+            if enhanced_filter.cascade:
+                enhanced_filter.cascade.log_stats()
             processed_posts = enhanced_filtered_posts
             
         else:
@@ -560,8 +1061,8 @@ def process_instagram_posts(profile_urls: List[str] = None,
         log_file.write(f"Instagram Scraping Results\n")
         log_file.write(f"==========================\n")
         log_file.write(f"Profiles scraped: {', '.join(profile_urls)}\n")
-        log_file.write(f"Total posts retrieved: {len(posts)}\n")
-        log_file.write(f"Images found: {image_count}\n")
+        log_file.write(f"Total posts retrieved: {counts['posts']}\n")
+        log_file.write(f"Images found: {counts['images']}\n")
         log_file.write(f"Images processed: {len(processed_posts)}\n")
         log_file.write(f"Landscape filtering: {landscape_only} (min ratio: {min_landscape_ratio})\n\n")
         
@@ -8,9 +8,26 @@ import os
 import cv2
 import numpy as np
 import logging
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional
 from PIL import Image, ImageDraw
 import json
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ..utils.decoded_image import DecodedImage, as_decoded_image
+
+# Long edge of the grayscale frame the detectors work on. Overlays are large
+# and high-contrast, so they survive downscaling; full resolution is never needed.
+ANALYSIS_MAX_EDGE = 720
+
+# Scaled templates smaller than this carry too little structure to match
+MIN_TEMPLATE_SIZE = 8
+
+# Number of Instagram-style corner icon templates at the start of the template list
+INSTAGRAM_ICON_TEMPLATE_COUNT = 5
+
+# Detector instance reused by each worker process in detect_batch
+_worker_detector = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -21,9 +38,18 @@ class VideoThumbnailDetector:
     Detects if an image is likely a video thumbnail based on visual cues.
     """
     
-    def __init__(self):
-        """Initialize the video thumbnail detector."""
+    def __init__(self, analysis_max_edge: int = ANALYSIS_MAX_EDGE):
+        """
+        Initialize the video thumbnail detector.
+        
+        Args:
+            analysis_max_edge: Long edge of the downscaled grayscale frame used
+                               for detection.
+        """
+        self.analysis_max_edge = analysis_max_edge
         self.play_button_templates = self._create_play_button_templates()
+        # Templates resized per analysis scale, keyed by rounded scale
+        self._scaled_templates: Dict[float, list] = {}
         logger.info("Video thumbnail detector initialized")
     
     def _create_play_button_templates(self) -> list:
@@ -84,50 +110,132 @@ class VideoThumbnailDetector:
         
         return templates
     
-    def detect_play_button(self, image_path: str, threshold: float = 0.6) -> Tuple[bool, float, Dict[str, Any]]:
+    def _analysis_frame(self, image: DecodedImage) -> Tuple[np.ndarray, float]:
+        """
+        Build the downscaled grayscale frame the detectors work on.
+        
+        The image is decoded once at reduced scale (the carrier caches the
+        decode, see DecodedImage.draft_gray) and then halved with a Gaussian
+        pyramid until it fits analysis_max_edge.
+        
+        Args:
+            image: The image to analyze.
+            
+        Returns:
+            Tuple of (grayscale frame, scale relative to full resolution).
+        """
+        frame = image.draft_gray(self.analysis_max_edge)
+        while max(frame.shape) > self.analysis_max_edge and min(frame.shape) > 1:
+            frame = cv2.pyrDown(frame)
+        
+        return frame, frame.shape[1] / image.width
+    
+    def _templates_for_scale(self, scale: float) -> list:
+        """
+        Get play button templates resized to an analysis scale.
+        
+        Returns:
+            List of (template index, template) pairs; templates that would be
+            too small to match reliably are dropped.
+        """
+        key = round(scale, 3)
+        if key not in self._scaled_templates:
+            scaled = []
+            for i, template in enumerate(self.play_button_templates):
+                size = int(round(template.shape[0] * scale))
+                if size < MIN_TEMPLATE_SIZE:
+                    continue
+                if size != template.shape[0]:
+                    template = cv2.resize(template, (size, size), interpolation=cv2.INTER_AREA)
+                scaled.append((i, template))
+            self._scaled_templates[key] = scaled
+        return self._scaled_templates[key]
+    
+    def _overlay_regions(self, frame: np.ndarray, scale: float) -> Dict[str, Tuple[int, int, int, int]]:
+        """
+        Regions of the frame where Instagram overlays appear, as (x, y, w, h).
+        
+        - top_right: the corner video/reel icon (at most 100px at full resolution)
+        - center: a centred play button
+        """
+        height, width = frame.shape
+        corner_size = max(1, min(width // 4, height // 4, int(round(100 * scale))))
+        center_w, center_h = width // 2, height // 2
+        return {
+            'top_right': (width - corner_size, 0, corner_size, corner_size),
+            'center': ((width - center_w) // 2, (height - center_h) // 2, center_w, center_h)
+        }
+    
+    def _match_templates(self, frame: np.ndarray, region: Tuple[int, int, int, int],
+                         templates: list) -> Tuple[float, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """
+        Match templates inside one region of the frame.
+        
+        Returns:
+            Tuple of (best score, best location in frame coordinates, template shape).
+        """
+        x, y, w, h = region
+        roi = frame[y:y + h, x:x + w]
+        
+        best_match = 0.0
+        best_location = None
+        best_template_size = None
+        
+        for _, template in templates:
+            if template.shape[0] > roi.shape[0] or template.shape[1] > roi.shape[1]:
+                continue  # Skip templates that are too large for the region
+            
+            result = cv2.matchTemplate(roi, template, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            
+            if max_val > best_match:
+                best_match = max_val
+                best_location = (max_loc[0] + x, max_loc[1] + y)
+                best_template_size = template.shape
+        
+        return best_match, best_location, best_template_size
+    
+    def detect_play_button(self, image_path: str, threshold: float = 0.6,
+                           image: DecodedImage = None) -> Tuple[bool, float, Dict[str, Any]]:
         """
         Detect if image contains a play button using template matching.
         
+        Instagram-style icon templates are matched in the top-right corner and
+        circular play button templates in the centre of the downscaled frame.
+        
         Args:
             image_path: Path to the image file.
             threshold: Confidence threshold for play button detection.
+            image: Already loaded image, to avoid re-reading image_path.
             
         Returns:
             Tuple of (has_play_button, confidence, detection_details)
         """
         try:
-            # Load image
-            image = cv2.imread(image_path)
-            if image is None:
-                logger.error(f"Could not load image: {image_path}")
-                return False, 0.0, {}
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            frame, scale = self._analysis_frame(as_decoded_image(image or image_path))
+            templates = self._templates_for_scale(scale)
+            regions = self._overlay_regions(frame, scale)
             
-            best_match = 0.0
-            best_location = None
-            best_template_size = None
+            icon_templates = [t for t in templates if t[0] < INSTAGRAM_ICON_TEMPLATE_COUNT]
+            circular_templates = [t for t in templates if t[0] >= INSTAGRAM_ICON_TEMPLATE_COUNT]
             
-            # Try each template
-            for i, template in enumerate(self.play_button_templates):
-                # Template matching
-                result = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
-                _, max_val, _, max_loc = cv2.minMaxLoc(result)
-                
-                if max_val > best_match:
-                    best_match = max_val
-                    best_location = max_loc
-                    best_template_size = template.shape
+            best_match, best_location, best_template_size = 0.0, None, None
+            best_region = None
+            for region_name, region_templates in (('top_right', icon_templates), ('center', circular_templates)):
+                match, location, template_size = self._match_templates(frame, regions[region_name], region_templates)
+                if match > best_match:
+                    best_match, best_location, best_template_size = match, location, template_size
+                    best_region = region_name
             
             # Check if we found a good match
             has_play_button = best_match >= threshold
             
             detection_details = {
                 'confidence': float(best_match),
-                'location': best_location,
-                'template_size': best_template_size,
-                'threshold_used': threshold
+                'location': self._to_full_resolution(best_location, scale),
+                'template_size': self._to_full_resolution(best_template_size, scale),
+                'threshold_used': threshold,
+                'search_region': best_region
             }
             
             if has_play_button:
@@ -139,58 +247,34 @@ class VideoThumbnailDetector:
             logger.error(f"Error detecting play button in {image_path}: {e}")
             return False, 0.0, {}
     
-    def detect_instagram_video_icon(self, image_path: str, threshold: float = 0.4) -> Tuple[bool, float, Dict[str, Any]]:
+    def detect_instagram_video_icon(self, image_path: str, threshold: float = 0.4,
+                                    image: DecodedImage = None) -> Tuple[bool, float, Dict[str, Any]]:
         """
         Specifically detect Instagram video icon in top-right corner.
         
         Args:
             image_path: Path to the image file.
             threshold: Confidence threshold for icon detection.
+            image: Already loaded image, to avoid re-reading image_path.
             
         Returns:
             Tuple of (has_video_icon, confidence, detection_details)
         """
         try:
-            # Load image
-            image = cv2.imread(image_path)
-            if image is None:
-                logger.error(f"Could not load image: {image_path}")
-                return False, 0.0, {}
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            height, width = gray.shape
+            frame, scale = self._analysis_frame(as_decoded_image(image or image_path))
+            icon_templates = [t for t in self._templates_for_scale(scale) if t[0] < INSTAGRAM_ICON_TEMPLATE_COUNT]
+            region = self._overlay_regions(frame, scale)['top_right']
             
-            # Focus on top-right corner (where Instagram video icons appear)
-            corner_size = min(width // 4, height // 4, 100)  # Max 100px corner region
-            top_right_region = gray[0:corner_size, width-corner_size:width]
-            
-            best_match = 0.0
-            best_location = None
-            best_template_size = None
-            
-            # Try Instagram icon templates (first 5 templates are Instagram-style)
-            for i, template in enumerate(self.play_button_templates[:5]):
-                if template.shape[0] > corner_size or template.shape[1] > corner_size:
-                    continue  # Skip templates that are too large for the corner region
-                
-                # Template matching in top-right corner
-                result = cv2.matchTemplate(top_right_region, template, cv2.TM_CCOEFF_NORMED)
-                _, max_val, _, max_loc = cv2.minMaxLoc(result)
-                
-                if max_val > best_match:
-                    best_match = max_val
-                    # Adjust location to full image coordinates
-                    best_location = (max_loc[0] + width - corner_size, max_loc[1])
-                    best_template_size = template.shape
+            best_match, best_location, best_template_size = self._match_templates(frame, region, icon_templates)
             
             # Check if we found a good match
             has_video_icon = best_match >= threshold
             
+            corner_size = int(round(region[2] / scale))
             detection_details = {
                 'confidence': float(best_match),
-                'location': best_location,
-                'template_size': best_template_size,
+                'location': self._to_full_resolution(best_location, scale),
+                'template_size': self._to_full_resolution(best_template_size, scale),
                 'threshold_used': threshold,
                 'search_region': f"top-right corner ({corner_size}x{corner_size})"
             }
@@ -204,12 +288,21 @@ class VideoThumbnailDetector:
             logger.error(f"Error detecting Instagram video icon in {image_path}: {e}")
             return False, 0.0, {}
     
-    def detect_video_indicators(self, image_path: str) -> Dict[str, Any]:
+    @staticmethod
+    def _to_full_resolution(point: Optional[Tuple[int, int]], scale: float) -> Optional[Tuple[int, int]]:
+        """Map a frame coordinate or size back to full-resolution pixels."""
+        if point is None:
+            return None
+        return tuple(int(round(v / scale)) for v in point)
+    
+    def detect_video_indicators(self, image_path: str, image: DecodedImage = None) -> Dict[str, Any]:
         """
         Detect various indicators that suggest an image is a video thumbnail.
         
         Args:
             image_path: Path to the image file.
+            image: Already loaded image. If None, image_path is read once and
+                   shared by every check.
             
         Returns:
             Dictionary with detection results for various video indicators.
@@ -221,13 +314,16 @@ class VideoThumbnailDetector:
         }
         
         try:
+            if image is None:
+                image = DecodedImage.from_path(image_path)
+            
             # 1. Check filename for video indicators
             filename = os.path.basename(image_path).lower()
             filename_indicators = self._check_filename_indicators(filename)
             results['indicators']['filename'] = filename_indicators
             
             # 2. Check for play button
-            has_play_button, play_confidence, play_details = self.detect_play_button(image_path)
+            has_play_button, play_confidence, play_details = self.detect_play_button(image_path, image=image)
             results['indicators']['play_button'] = {
                 'detected': has_play_button,
                 'confidence': play_confidence,
@@ -235,11 +331,11 @@ class VideoThumbnailDetector:
             }
             
             # 3. Check for video UI elements (progress bars, time stamps, etc.)
-            ui_indicators = self._detect_video_ui_elements(image_path)
+            ui_indicators = self._detect_video_ui_elements(image_path, image=image)
             results['indicators']['ui_elements'] = ui_indicators
             
             # 4. Check aspect ratio (videos often have specific ratios)
-            aspect_ratio_info = self._check_aspect_ratio(image_path)
+            aspect_ratio_info = self._check_aspect_ratio(image_path, image=image)
             results['indicators']['aspect_ratio'] = aspect_ratio_info
             
             # 5. Calculate overall confidence
@@ -253,6 +349,39 @@ class VideoThumbnailDetector:
             logger.error(f"Error detecting video indicators in {image_path}: {e}")
             return results
     
+    def detect_batch(self, image_paths: List[str], max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Detect video indicators for many images using a process pool.
+        
+        Template matching is CPU-bound, so images are spread across worker
+        processes. Falls back to sequential detection if the pool cannot be
+        used.
+        
+        Args:
+            image_paths: Paths of the images to check.
+            max_workers: Number of worker processes (default: CPU count).
+            
+        Returns:
+            Dictionary mapping each image path to its detect_video_indicators result.
+        """
+        if len(image_paths) < 2 or max_workers == 1:
+            return {path: self.detect_video_indicators(path) for path in image_paths}
+        
+        results = {}
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     initializer=_init_worker_detector,
+                                     initargs=(self.analysis_max_edge,)) as executor:
+                for path, path_results in zip(image_paths, executor.map(_detect_in_worker, image_paths)):
+                    results[path] = path_results
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Process pool unavailable for video detection, running sequentially: {e}")
+            for path in image_paths:
+                if path not in results:
+                    results[path] = self.detect_video_indicators(path)
+        
+        return results
+    
     def _check_filename_indicators(self, filename: str) -> Dict[str, Any]:
         """Check filename for video-related indicators."""
         indicators = {
@@ -277,7 +406,7 @@ class VideoThumbnailDetector:
         
         return indicators
     
-    def _detect_video_ui_elements(self, image_path: str) -> Dict[str, Any]:
+    def _detect_video_ui_elements(self, image_path: str, image: DecodedImage = None) -> Dict[str, Any]:
         """Detect video UI elements like progress bars, timestamps, etc."""
         ui_elements = {
             'progress_bar_detected': False,
@@ -286,17 +415,11 @@ class VideoThumbnailDetector:
         }
         
         try:
-            # Load image
-            image = cv2.imread(image_path)
-            if image is None:
-                return ui_elements
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            height, width = gray.shape
+            frame, _ = self._analysis_frame(as_decoded_image(image or image_path))
+            height, width = frame.shape
             
             # Look for horizontal lines in bottom area (progress bars)
-            bottom_region = gray[int(height * 0.8):, :]
+            bottom_region = frame[int(height * 0.8):, :]
             
             # Use HoughLines to detect horizontal lines
             edges = cv2.Canny(bottom_region, 50, 150)
@@ -304,8 +427,9 @@ class VideoThumbnailDetector:
             
             if lines is not None:
                 horizontal_lines = []
-                for line in lines:
-                    x1, y1, x2, y2 = line[0]
+                # OpenCV returns (N, 1, 4) or (N, 4) depending on version
+                for line in lines.reshape(-1, 4):
+                    x1, y1, x2, y2 = line
                     # Check if line is roughly horizontal
                     if abs(y2 - y1) < 5 and abs(x2 - x1) > width // 6:
                         horizontal_lines.append(line)
@@ -321,7 +445,7 @@ class VideoThumbnailDetector:
         
         return ui_elements
     
-    def _check_aspect_ratio(self, image_path: str) -> Dict[str, Any]:
+    def _check_aspect_ratio(self, image_path: str, image: DecodedImage = None) -> Dict[str, Any]:
         """Check if aspect ratio suggests video content."""
         aspect_info = {
             'ratio': 0.0,
@@ -330,26 +454,25 @@ class VideoThumbnailDetector:
         }
         
         try:
-            with Image.open(image_path) as img:
-                width, height = img.size
-                ratio = width / height
-                aspect_info['ratio'] = ratio
-                
-                # Common video aspect ratios
-                video_ratios = {
-                    '16:9': (16/9, 0.1),      # Standard widescreen
-                    '4:3': (4/3, 0.1),        # Traditional TV
-                    '21:9': (21/9, 0.1),      # Ultra-wide
-                    '9:16': (9/16, 0.1),      # Vertical video (stories, reels)
-                    '1:1': (1.0, 0.1),        # Square (Instagram posts)
-                }
-                
-                for ratio_name, (target_ratio, tolerance) in video_ratios.items():
-                    if abs(ratio - target_ratio) <= tolerance:
-                        aspect_info['is_video_ratio'] = True
-                        aspect_info['ratio_type'] = ratio_name
-                        break
-                        
+            width, height = as_decoded_image(image or image_path).size
+            ratio = width / height
+            aspect_info['ratio'] = ratio
+            
+            # Common video aspect ratios
+            video_ratios = {
+                '16:9': (16/9, 0.1),      # Standard widescreen
+                '4:3': (4/3, 0.1),        # Traditional TV
+                '21:9': (21/9, 0.1),      # Ultra-wide
+                '9:16': (9/16, 0.1),      # Vertical video (stories, reels)
+                '1:1': (1.0, 0.1),        # Square (Instagram posts)
+            }
+            
+            for ratio_name, (target_ratio, tolerance) in video_ratios.items():
+                if abs(ratio - target_ratio) <= tolerance:
+                    aspect_info['is_video_ratio'] = True
+                    aspect_info['ratio_type'] = ratio_name
+                    break
+                    
         except Exception as e:
             logger.error(f"Error checking aspect ratio: {e}")
         
@@ -384,6 +507,15 @@ class VideoThumbnailDetector:
         # Cap at 1.0
         return min(confidence, 1.0)
 
+def _init_worker_detector(analysis_max_edge: int):
+    """Create the detector used by a detect_batch worker process."""
+    global _worker_detector
+    _worker_detector = VideoThumbnailDetector(analysis_max_edge)
+
+def _detect_in_worker(image_path: str) -> Dict[str, Any]:
+    """Run video detection for one image inside a detect_batch worker process."""
+    return _worker_detector.detect_video_indicators(image_path)
+
 def test_video_detection(image_dir: str = "data/raw/original") -> None:
     """Test video detection on images in a directory."""
     detector = VideoThumbnailDetector()
@@ -403,11 +535,12 @@ def test_video_detection(image_dir: str = "data/raw/original") -> None:
     
     results = []
     
-    for image_file in image_files:
-        image_path = os.path.join(image_dir, image_file)
-        
-        # Detect video indicators
-        detection_results = detector.detect_video_indicators(image_path)
+    # Detect video indicators across a process pool
+    image_paths = [os.path.join(image_dir, image_file) for image_file in image_files]
+    batch_results = detector.detect_batch(image_paths)
+    
+    for image_file, image_path in zip(image_files, image_paths):
+        detection_results = batch_results[image_path]
         
         results.append({
             'filename': image_file,
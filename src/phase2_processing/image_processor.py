@@ -7,11 +7,18 @@ from typing import Dict, Any, List, Tuple, Optional, Union
 from PIL import Image, ImageEnhance, ImageFilter
 import numpy as np
 import io
+import shutil
+import tempfile
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 from .. import config
 from ..utils.image_utils import get_image_metadata
 from ..utils.gcs_storage import GCSStorage
+from ..utils.variant_cache import get_variant_cache, hash_file
+from ..utils.upload_queue import get_upload_queue
+from .tiff_writer import write_strip_tiff
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -70,15 +77,40 @@ MATERIAL_PRESETS = {
     }
 }
 
+# File extension for each output format
+FORMAT_EXTENSIONS = {
+    'TIFF': '.tiff',
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'BMP': '.bmp'
+}
+
+# Uncompressed bytes per strip in tiled rendering
+STRIP_TARGET_BYTES = 8 * 1024 * 1024
+
+# Rough per-worker memory for the source, enhanced copy and interpreter (MB)
+WORKER_BASE_MEMORY_MB = 300
+
+# ITU-R 601-2 luma weights, as used by PIL's RGB to L conversion
+LUMA_WEIGHTS = (0.299, 0.587, 0.114)
+
+# Part of every variant cache key; bump when resizing or encoding output changes
+VARIANT_RENDER_VERSION = 1
+
+# Processor instance reused by each worker process in parallel batch processing
+_worker_processor = None
+
 class ImageProcessor:
     """Class for processing and enhancing images for high-quality printing."""
     
-    def __init__(self, use_gcs: bool = True):
+    def __init__(self, use_gcs: bool = True, upload_async: bool = True):
         """
         Initialize the image processor.
         
         Args:
             use_gcs: Whether to use Google Cloud Storage for storing processed images.
+            upload_async: Whether to upload through the shared background upload
+                          queue rather than inline.
         """
         self.use_gcs = use_gcs
         self.gcs = GCSStorage() if use_gcs else None
@@ -86,6 +118,8 @@ class ImageProcessor:
         if use_gcs and not self.gcs.is_available():
             logger.warning("GCS client not available. Falling back to local storage only.")
             self.use_gcs = False
+        
+        self.uploads = get_upload_queue(self.gcs) if self.use_gcs and upload_async else None
             
         # Default enhancement parameters
         self.default_params = {
@@ -96,6 +130,9 @@ class ImageProcessor:
             'saturation': 1.05,   # Slight saturation boost
         }
         
+        # Resize/encode counts from the last generate_print_variants call
+        self.variant_stats = {}
+        
         logger.info(f"Image processor initialized. Using GCS: {self.use_gcs}")
         
     def load_image(self, image_path: str) -> Optional[Image.Image]:
@@ -115,7 +152,8 @@ class ImageProcessor:
             logger.error(f"Error loading image from {image_path}: {e}")
             return None
             
-    def enhance_image(self, img: Image.Image, params: Dict[str, float] = None) -> Image.Image:
+    def enhance_image(self, img: Image.Image, params: Dict[str, float] = None,
+                      engine: str = None) -> Image.Image:
         """
         Enhance an image using various adjustments.
         
@@ -127,6 +165,9 @@ class ImageProcessor:
                    - color: Color factor (1.0 is original)
                    - sharpness: Sharpness factor (1.0 is original)
                    - saturation: Saturation factor (1.0 is original)
+            engine: 'fused' (lookup table, color matrix and a single sharpening
+                    kernel) or 'pil' (chained ImageEnhance passes). Defaults to
+                    config value.
                    
         Returns:
             Enhanced PIL Image object.
@@ -134,11 +175,21 @@ class ImageProcessor:
         # Use default params if none provided
         if params is None:
             params = self.default_params
+        if engine is None:
+            engine = getattr(config, 'ENHANCEMENT_ENGINE', 'pil')
             
         # Convert to RGB if needed
         if img.mode != 'RGB':
             img = img.convert('RGB')
-            
+        
+        if engine == 'fused':
+            return self._enhance_image_fused(img, params)
+        if engine != 'pil':
+            logger.warning(f"Unknown enhancement engine: {engine}. Using 'pil'.")
+        return self._enhance_image_pil(img, params)
+    
+    def _enhance_image_pil(self, img: Image.Image, params: Dict[str, float]) -> Image.Image:
+        """Enhance an RGB image with one ImageEnhance pass per adjustment."""
         # Apply brightness adjustment
         if 'brightness' in params:
             enhancer = ImageEnhance.Brightness(img)
@@ -163,6 +214,55 @@ class ImageProcessor:
             img = enhancer.enhance(params['sharpness'])
             
         return img
+    
+    def _enhance_image_fused(self, img: Image.Image, params: Dict[str, float]) -> Image.Image:
+        """
+        Enhance an RGB image with the same adjustments as _enhance_image_pil in fewer passes.
+        
+        ImageEnhance blends each adjustment with a full-size degenerate image
+        (black, mean grey, grayscale, smoothed). Brightness and contrast are
+        per-channel affine maps, so together they become one 256-entry lookup
+        table; the contrast mean comes from the channel histograms rather than
+        a grayscale copy. Color is a linear blend with luma, applied as one
+        RGB matrix conversion, and sharpness is a blend with PIL's 3x3 SMOOTH
+        filter, applied as one combined convolution kernel. Each pass runs in
+        PIL's C code and allocates a single output image.
+        """
+        brightness = params.get('brightness', 1.0)
+        contrast = params.get('contrast', 1.0)
+        color = params['color'] if 'color' in params else params.get('saturation', 1.0)
+        sharpness = params.get('sharpness', 1.0)
+        
+        if brightness != 1.0 or contrast != 1.0:
+            levels = np.arange(256, dtype=np.float64)
+            bright_levels = np.clip(np.rint(levels * brightness), 0, 255)
+            
+            # Mean luma after brightness, as ImageEnhance.Contrast measures it
+            hist = np.array(img.histogram(), dtype=np.float64).reshape(3, 256)
+            channel_means = (hist * bright_levels).sum(axis=1) / max(hist[0].sum(), 1)
+            mean = int(np.dot(LUMA_WEIGHTS, channel_means) + 0.5)
+            
+            lut = np.clip(np.rint(mean + (bright_levels - mean) * contrast), 0, 255).astype(np.uint8)
+            img = img.point(lut.tolist() * 3)
+        
+        if color != 1.0:
+            # out = luma + (in - luma) * color, with luma a weighted sum of R, G, B
+            matrix = []
+            for channel in range(3):
+                row = [(1 - color) * weight for weight in LUMA_WEIGHTS]
+                row[channel] += color
+                matrix.extend(row + [0])
+            img = img.convert('RGB', tuple(matrix))
+        
+        if sharpness != 1.0:
+            # out = smooth + (in - smooth) * sharpness, with smooth the SMOOTH kernel
+            smooth = ImageFilter.SMOOTH.filterargs[3]
+            smooth_scale = ImageFilter.SMOOTH.filterargs[1]
+            kernel = [(1 - sharpness) * weight / smooth_scale for weight in smooth]
+            kernel[4] += sharpness
+            img = img.filter(ImageFilter.Kernel((3, 3), kernel, scale=1))
+        
+        return img
         
     def ai_enhance_image(self, image_path: str, output_dir: str) -> Optional[str]:
         """
@@ -256,12 +356,51 @@ class ImageProcessor:
         Returns:
             Resized PIL Image object.
         """
+        if fit_method not in ('contain', 'cover', 'stretch'):
+            logger.warning(f"Unknown fit method: {fit_method}. Using 'contain'.")
+            fit_method = 'contain'
+        
         # Calculate pixel dimensions based on print size and DPI
         target_width_px = int(print_size[0] * dpi)
         target_height_px = int(print_size[1] * dpi)
         
-        # Get current image dimensions
-        orig_width, orig_height = img.size
+        new_width, new_height, offset_x, offset_y = self._fit_geometry(
+            img.size, (target_width_px, target_height_px), fit_method
+        )
+        resized_img = img.resize((new_width, new_height), Image.LANCZOS)
+        
+        if fit_method == 'contain':
+            # Paste the resized image centered on a blank canvas of the target size
+            canvas = Image.new('RGB', (target_width_px, target_height_px), color='white')
+            canvas.paste(resized_img, (offset_x, offset_y))
+            return canvas
+            
+        elif fit_method == 'cover':
+            # Crop the overflowing resized image to the target size
+            left, top = -offset_x, -offset_y
+            return resized_img.crop((left, top, left + target_width_px, top + target_height_px))
+            
+        # Stretch/squash to the target dimensions
+        return resized_img
+    
+    def _fit_geometry(self, image_size: Tuple[int, int],
+                      target_size: Tuple[int, int],
+                      fit_method: str) -> Tuple[int, int, int, int]:
+        """
+        Work out how an image is resized and placed on a print canvas.
+        
+        Args:
+            image_size: Source (width, height) in pixels.
+            target_size: Canvas (width, height) in pixels.
+            fit_method: 'contain', 'cover' or 'stretch'.
+            
+        Returns:
+            Tuple of (resized width, resized height, x offset, y offset), where
+            the offsets place the resized image on the canvas (negative when
+            'cover' crops it).
+        """
+        orig_width, orig_height = image_size
+        target_width_px, target_height_px = target_size
         orig_aspect = orig_width / orig_height
         target_aspect = target_width_px / target_height_px
         
@@ -275,18 +414,9 @@ class ImageProcessor:
                 # Image is taller than target aspect, constrain by height
                 new_height = target_height_px
                 new_width = int(new_height * orig_aspect)
-                
-            resized_img = img.resize((new_width, new_height), Image.LANCZOS)
-            
-            # Create a blank canvas of the target size
-            canvas = Image.new('RGB', (target_width_px, target_height_px), color='white')
             
-            # Paste the resized image centered on the canvas
-            paste_x = (target_width_px - new_width) // 2
-            paste_y = (target_height_px - new_height) // 2
-            canvas.paste(resized_img, (paste_x, paste_y))
-            
-            return canvas
+            # Centered on the canvas
+            return new_width, new_height, (target_width_px - new_width) // 2, (target_height_px - new_height) // 2
             
         elif fit_method == 'cover':
             # Resize to cover the dimensions, maintaining aspect ratio (may crop)
@@ -298,27 +428,121 @@ class ImageProcessor:
                 # Image is taller than target aspect, constrain by width
                 new_width = target_width_px
                 new_height = int(new_width / orig_aspect)
-                
-            resized_img = img.resize((new_width, new_height), Image.LANCZOS)
-            
-            # Calculate crop coordinates
-            left = (new_width - target_width_px) // 2
-            top = (new_height - target_height_px) // 2
-            right = left + target_width_px
-            bottom = top + target_height_px
-            
-            # Crop to target size
-            cropped_img = resized_img.crop((left, top, right, bottom))
-            return cropped_img
             
-        elif fit_method == 'stretch':
-            # Simply stretch/squash to the target dimensions
-            return img.resize((target_width_px, target_height_px), Image.LANCZOS)
+            # Centered crop
+            return new_width, new_height, -((new_width - target_width_px) // 2), -((new_height - target_height_px) // 2)
+        
+        return target_width_px, target_height_px, 0, 0
+    
+    def render_print_tiled(self, img: Image.Image,
+                           print_size: Tuple[int, int],
+                           dpi: int,
+                           fit_method: str,
+                           output_path: str,
+                           rows_per_strip: int = None) -> Tuple[int, int]:
+        """
+        Resize an image for printing and write it as a TIFF, one strip at a time.
+        
+        Produces the same pixels as resize_for_print, but each strip of output
+        rows is resampled straight from the source (resize with a source box)
+        and written to disk before the next one, so memory use is bounded by
+        the strip size however large the print is. With more than one strip,
+        the filter positions Pillow derives from each box can round differently,
+        so a few pixels may differ by one level.
+        
+        Args:
+            img: PIL Image object to resize.
+            print_size: Tuple of (width, height) in inches.
+            dpi: Target dots per inch (resolution).
+            fit_method: How to fit the image ('contain', 'cover', 'stretch').
+            output_path: Path of the TIFF file to write.
+            rows_per_strip: Output rows per strip. Defaults to about 8 MB per strip.
             
-        else:
+        Returns:
+            The (width, height) of the written image in pixels.
+        """
+        if fit_method not in ('contain', 'cover', 'stretch'):
             logger.warning(f"Unknown fit method: {fit_method}. Using 'contain'.")
-            # Default to contain method
-            return self.resize_for_print(img, print_size, dpi, 'contain')
+            fit_method = 'contain'
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        target_width_px = int(print_size[0] * dpi)
+        target_height_px = int(print_size[1] * dpi)
+        new_width, new_height, offset_x, offset_y = self._fit_geometry(
+            img.size, (target_width_px, target_height_px), fit_method
+        )
+        scale_x = img.width / new_width
+        scale_y = img.height / new_height
+        
+        if rows_per_strip is None:
+            rows_per_strip = max(1, min(target_height_px, STRIP_TARGET_BYTES // (target_width_px * 3)))
+        
+        # Columns of the resized image that land on the canvas
+        col_start = max(0, -offset_x)
+        col_end = min(new_width, target_width_px - offset_x)
+        
+        def strips():
+            for y0 in range(0, target_height_px, rows_per_strip):
+                y1 = min(target_height_px, y0 + rows_per_strip)
+                strip = Image.new('RGB', (target_width_px, y1 - y0), color='white')
+                
+                # Rows of the resized image that land in this strip
+                row_start = max(0, y0 - offset_y)
+                row_end = min(new_height, y1 - offset_y)
+                if row_end > row_start and col_end > col_start:
+                    part = img.resize(
+                        (col_end - col_start, row_end - row_start),
+                        Image.LANCZOS,
+                        box=(col_start * scale_x, row_start * scale_y, col_end * scale_x, row_end * scale_y)
+                    )
+                    strip.paste(part, (col_start + offset_x, row_start + offset_y - y0))
+                
+                yield np.asarray(strip)
+        
+        write_strip_tiff(output_path, target_width_px, target_height_px, strips(),
+                         rows_per_strip, dpi=(dpi, dpi))
+        return target_width_px, target_height_px
+    
+    def _should_render_tiled(self, pixels: Tuple[int, int]) -> bool:
+        """Whether a print of this pixel size should be rendered strip by strip."""
+        min_megapixels = getattr(config, 'PROCESSING_TILED_MIN_MEGAPIXELS', 48)
+        return min_megapixels > 0 and pixels[0] * pixels[1] >= min_megapixels * 1_000_000
+    
+    def estimate_worker_memory_mb(self, size_categories: List[str] = None,
+                                  materials: List[str] = None,
+                                  fit_method: str = 'contain') -> float:
+        """
+        Estimate the peak memory needed to process one image.
+        
+        Geometries rendered in memory hold roughly the canvas, the resized
+        image and the encoded output at once; tiled TIFF geometries only hold
+        a few strips.
+        
+        Args:
+            size_categories: List of size categories to include.
+            materials: List of materials to generate variants for.
+            fit_method: How to fit the image.
+            
+        Returns:
+            Estimated peak memory in MB.
+        """
+        if size_categories is None:
+            size_categories = ['small', 'medium', 'large']
+        if materials is None:
+            materials = list(MATERIAL_PRESETS.keys())
+        
+        peak_bytes = 0
+        for group in self.plan_print_variants(size_categories, materials, fit_method):
+            width, height = group['pixels']
+            formats = {variant['format'] for variant in group['variants']}
+            if self._should_render_tiled(group['pixels']) and formats == {'TIFF'}:
+                group_bytes = STRIP_TARGET_BYTES * 4
+            else:
+                group_bytes = width * height * 3 * 2.5
+            peak_bytes = max(peak_bytes, group_bytes)
+        
+        return peak_bytes / (1024 * 1024) + WORKER_BASE_MEMORY_MB
             
     def apply_borders(self, img: Image.Image, 
                      border_width: Union[int, Tuple[int, int, int, int]] = 0, 
@@ -371,43 +595,201 @@ class ImageProcessor:
         # Ensure format is uppercase
         format_name = format_name.upper()
         
-        # Map format to extension
-        format_extensions = {
-            'TIFF': '.tiff',
-            'JPEG': '.jpg',
-            'PNG': '.png',
-            'BMP': '.bmp'
-        }
-        
         # Get file extension
-        file_ext = format_extensions.get(format_name, f'.{format_name.lower()}')
+        file_ext = FORMAT_EXTENSIONS.get(format_name, f'.{format_name.lower()}')
         
         # Convert to bytes
         img_byte_arr = io.BytesIO()
+        img.save(img_byte_arr, format=format_name, **self._print_save_options(format_name, quality))
+            
+        img_byte_arr.seek(0)
+        return img_byte_arr.getvalue(), file_ext
+    
+    def save_print_format(self, img: Image.Image,
+                          output: Union[str, io.IOBase],
+                          format_name: str = 'TIFF',
+                          quality: int = 95) -> str:
+        """
+        Encode an image in a print-ready format straight to a file or sink.
         
-        # Handle format-specific save options
+        Unlike convert_to_print_format, the encoded image is never held in
+        memory as bytes. Paths are written to a temporary file in the same
+        directory and renamed into place, so a crash never leaves a partial
+        file at output. File-like sinks that cannot seek (e.g. a GCS blob
+        writer) are fed through an on-disk temporary file for formats whose
+        encoder needs to seek.
+        
+        Args:
+            img: PIL Image object.
+            output: Destination file path or writable binary file-like object.
+            format_name: Target format ('TIFF', 'PNG', 'JPEG', etc.).
+            quality: Quality level for formats that support it.
+            
+        Returns:
+            The file extension for the format.
+        """
+        format_name = format_name.upper()
+        file_ext = FORMAT_EXTENSIONS.get(format_name, f'.{format_name.lower()}')
+        save_options = self._print_save_options(format_name, quality)
+        
+        if isinstance(output, (str, os.PathLike)):
+            temp_path = f"{output}.tmp"
+            try:
+                img.save(temp_path, format=format_name, **save_options)
+                os.replace(temp_path, output)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        elif getattr(output, 'seekable', lambda: False)():
+            img.save(output, format=format_name, **save_options)
+        else:
+            with tempfile.TemporaryFile() as spool:
+                img.save(spool, format=format_name, **save_options)
+                spool.seek(0)
+                shutil.copyfileobj(spool, output)
+        
+        return file_ext
+    
+    def _print_save_options(self, format_name: str, quality: int) -> Dict[str, Any]:
+        """PIL save options for a print format."""
         if format_name == 'JPEG':
-            img.save(img_byte_arr, format=format_name, quality=quality)
+            return {'quality': quality}
         elif format_name == 'TIFF':
-            img.save(img_byte_arr, format=format_name, compression='tiff_lzw')
+            return {'compression': 'tiff_lzw'}
         elif format_name == 'PNG':
-            img.save(img_byte_arr, format=format_name, compress_level=int(quality / 10))
-        else:
-            img.save(img_byte_arr, format=format_name)
+            return {'compress_level': int(quality / 10)}
+        return {}
+        
+    def plan_print_variants(self, size_categories: List[str],
+                            materials: List[str],
+                            fit_method: str = 'contain') -> List[Dict[str, Any]]:
+        """
+        Group requested print variants by output geometry.
+        
+        Variants whose size and material DPI give the same pixel dimensions
+        (e.g. canvas, photo_paper and metal are all 300 DPI) share one resize.
+        
+        Args:
+            size_categories: List of size categories to include.
+            materials: List of materials to generate variants for.
+            fit_method: How to fit the image ('contain', 'cover', 'stretch').
             
-        img_byte_arr.seek(0)
-        return img_byte_arr.getvalue(), file_ext
+        Returns:
+            List of geometry groups, each with the target 'pixels', the
+            'size_inches'/'dpi' to resize with, 'fit_method' and the
+            'variants' (size category, size name, material, format) it serves.
+        """
+        groups = {}
+        for size_cat in size_categories:
+            if size_cat not in PRINT_SIZES:
+                continue
+            for size_name, size_inches in PRINT_SIZES[size_cat].items():
+                for material in materials:
+                    if material not in MATERIAL_PRESETS:
+                        continue
+                    mat_settings = MATERIAL_PRESETS[material]
+                    dpi = mat_settings['recommended_dpi']
+                    pixels = (int(size_inches[0] * dpi), int(size_inches[1] * dpi))
+                    
+                    group = groups.setdefault((pixels, fit_method), {
+                        'pixels': pixels,
+                        'size_inches': size_inches,
+                        'dpi': dpi,
+                        'fit_method': fit_method,
+                        'variants': []
+                    })
+                    group['variants'].append({
+                        'size_category': size_cat,
+                        'size_name': size_name,
+                        'size_inches': size_inches,
+                        'material': material,
+                        'format': mat_settings['format']
+                    })
+        return list(groups.values())
         
+    def _upload(self, local_path: str, gcs_path: str):
+        """Upload a file to GCS, in the background if the upload queue is enabled."""
+        if self.uploads:
+            self.uploads.enqueue(local_path, gcs_path)
+        else:
+            self.gcs.upload_file(local_path, gcs_path)
+    
+    def _variant_render_params(self, group: Dict[str, Any], format_name: str,
+                               tiled: bool, enhancement_params: Dict[str, float]) -> Dict[str, Any]:
+        """Every parameter that affects a rendered variant file, for its cache key."""
+        return {
+            'version': VARIANT_RENDER_VERSION,
+            'enhancement': enhancement_params,
+            'enhancement_engine': getattr(config, 'ENHANCEMENT_ENGINE', 'pil'),
+            'size_inches': list(group['size_inches']),
+            'dpi': group['dpi'],
+            'pixels': list(group['pixels']),
+            'fit_method': group['fit_method'],
+            'format': format_name,
+            'save_options': self._print_save_options(format_name, 95),
+            'tiled': tiled and format_name == 'TIFF'
+        }
+    
+    def _reuse_cached_render(self, variant_cache, render_key: str,
+                             output_path: str, gcs_path: Optional[str]) -> bool:
+        """
+        Put an earlier render of render_key at output_path (and gcs_path), if there is one.
+        
+        Returns:
+            True if the variant was reused, False if it has to be rendered.
+        """
+        while True:
+            cached = variant_cache.get(render_key, output_path)
+            if cached is None:
+                return False
+            
+            cached_local = cached['local_path']
+            cached_gcs = cached['gcs_path']
+            if os.path.exists(cached_local):
+                if cached_local != output_path:
+                    _copy_file_atomic(cached_local, output_path)
+                elif gcs_path == cached_gcs:
+                    return True
+                if gcs_path:
+                    self._upload(output_path, gcs_path)
+                variant_cache.put(render_key, output_path, gcs_path)
+                return True
+            
+            if self.use_gcs and cached_gcs and self.gcs.file_exists(cached_gcs):
+                # Bring the local copy back; the blob is only re-uploaded if it belongs elsewhere
+                if self.gcs.download_file(cached_gcs, output_path):
+                    if gcs_path and gcs_path != cached_gcs:
+                        self._upload(output_path, gcs_path)
+                    variant_cache.put(render_key, output_path, gcs_path)
+                    return True
+            
+            # This copy is gone; try any other
+            variant_cache.delete(render_key, cached_local)
+    
     def generate_print_variants(self, img: Image.Image, 
                                metadata: Dict[str, Any],
                                size_categories: List[str] = None,
                                materials: List[str] = None,
                                fit_method: str = 'contain',
                                base_dir: str = 'data',
-                               base_filename: str = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+                               base_filename: str = None,
+                               enhance: bool = True,
+                               enhancement_params: Dict[str, float] = None,
+                               source_hash: str = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
         """
         Generate print variants for different sizes and materials.
         
+        The image is enhanced once, each unique output geometry is resized once
+        (see plan_print_variants), and each resized image is encoded once per
+        output format; only the written files differ per material.
+        
+        If source_hash is given (and the variant cache is enabled), every
+        variant is keyed by the source hash and its render parameters, and
+        variants already rendered with the same key, locally or in GCS, are
+        reused instead of rendered. The image is only enhanced if some
+        variant has to be rendered.
+        
         Args:
             img: PIL Image object.
             metadata: Original image metadata.
@@ -416,6 +798,12 @@ class ImageProcessor:
             fit_method: How to fit the image ('contain', 'cover', 'stretch').
             base_dir: Base directory for output files.
             base_filename: Base filename for output files.
+            enhance: Whether to apply enhancements first. Pass False if img is
+                     already enhanced.
+            enhancement_params: Enhancement parameters when enhance is True.
+                                Defaults to the default parameters.
+            source_hash: Hash of the source image file, to look up and record
+                         renders in the variant cache (see utils.variant_cache).
             
         Returns:
             Dictionary of generated variants with paths and metadata.
@@ -434,80 +822,139 @@ class ImageProcessor:
         processed_dir = os.path.join(base_dir, 'processed')
         os.makedirs(processed_dir, exist_ok=True)
         
-        # Dictionary to store results
-        results = {}
+        if self.use_gcs:
+            # One listing of this image's objects, so unchanged files are not re-uploaded
+            self.gcs.load_remote_index(f"processed/{base_filename}_")
+            self.gcs.load_remote_index(f"metadata/{base_filename}_")
         
-        # Track the best variant for each size
-        best_variants = {}
+        for size_cat in size_categories:
+            if size_cat not in PRINT_SIZES:
+                logger.warning(f"Unknown size category: {size_cat}. Skipping.")
+        for material in materials:
+            if material not in MATERIAL_PRESETS:
+                logger.warning(f"Unknown material: {material}. Skipping.")
         
-        # Process each size category
+        # Dictionary to store results, in requested size/material order
+        results = {}
         for size_cat in size_categories:
             results[size_cat] = {}
+            for size_name in PRINT_SIZES.get(size_cat, {}):
+                results[size_cat][size_name] = {}
+        
+        if enhancement_params is None:
+            enhancement_params = self.default_params
+        
+        # Renders are only cached when this call controls the enhancement
+        variant_cache = get_variant_cache() if source_hash and enhance else None
+        
+        # Enhanced once, when the first variant has to be rendered
+        enhanced_img = None
+        
+        plan = self.plan_print_variants(size_categories, materials, fit_method)
+        variant_count = sum(len(group['variants']) for group in plan)
+        encode_count = 0
+        resize_count = 0
+        cached_count = 0
+        
+        for group in plan:
+            # Large TIFF outputs are rendered strip by strip straight to disk
+            tiled = self._should_render_tiled(group['pixels'])
+            actual_width, actual_height = group['pixels']
+            resized_img = None
             
-            if size_cat not in PRINT_SIZES:
-                logger.warning(f"Unknown size category: {size_cat}. Skipping.")
-                continue
+            # Encode once per format; materials sharing a format copy the first file
+            encoded_paths = {}
+            
+            for variant in group['variants']:
+                size_cat = variant['size_category']
+                size_name = variant['size_name']
+                material = variant['material']
+                format_name = variant['format']
+                size_inches = variant['size_inches']
                 
-            # Process each size in the category
-            for size_name, size_inches in PRINT_SIZES[size_cat].items():
-                results[size_cat][size_name] = {}
+                # Generate output filename
+                file_ext = FORMAT_EXTENSIONS.get(format_name, f'.{format_name.lower()}')
+                output_filename = f"{base_filename}_{size_name}_{material}{file_ext}"
+                output_path = os.path.join(processed_dir, output_filename)
+                gcs_path = f"processed/{output_filename}" if self.use_gcs else None
                 
-                # Process each material
-                for material in materials:
-                    if material not in MATERIAL_PRESETS:
-                        logger.warning(f"Unknown material: {material}. Skipping.")
-                        continue
-                        
-                    # Get material settings
-                    mat_settings = MATERIAL_PRESETS[material]
-                    dpi = mat_settings['recommended_dpi']
-                    format_name = mat_settings['format']
-                    
-                    # Enhanced image (apply basic enhancements)
-                    enhanced_img = self.enhance_image(img)
-                    
-                    # Resize for print
-                    resized_img = self.resize_for_print(enhanced_img, size_inches, dpi, fit_method)
-                    
-                    # Convert to print format
-                    img_data, file_ext = self.convert_to_print_format(resized_img, format_name)
-                    
-                    # Generate output filename
-                    output_filename = f"{base_filename}_{size_name}_{material}{file_ext}"
-                    output_path = os.path.join(processed_dir, output_filename)
+                render_params = None
+                if variant_cache:
+                    render_params = self._variant_render_params(group, format_name, tiled, enhancement_params)
+                    render_key = variant_cache.make_key(source_hash, render_params)
+                
+                cached = False
+                if format_name in encoded_paths:
+                    _copy_file_atomic(encoded_paths[format_name], output_path)
+                elif variant_cache and self._reuse_cached_render(variant_cache, render_key, output_path, gcs_path):
+                    cached = True
+                    cached_count += 1
+                else:
+                    if enhanced_img is None:
+                        enhanced_img = self.enhance_image(img, enhancement_params) if enhance else img
                     
-                    # Save locally
-                    with open(output_path, 'wb') as f:
-                        f.write(img_data)
+                    if tiled and format_name == 'TIFF':
+                        self.render_print_tiled(enhanced_img, group['size_inches'], group['dpi'],
+                                                fit_method, output_path)
+                        resize_count += 1
+                    else:
+                        # Resize once per unique geometry
+                        if resized_img is None:
+                            resized_img = self.resize_for_print(enhanced_img, group['size_inches'], group['dpi'], fit_method)
+                            resize_count += 1
                         
+                        # Encode straight to disk
+                        self.save_print_format(resized_img, output_path, format_name)
+                    encoded_paths[format_name] = output_path
+                    encode_count += 1
+                    
+                if not cached:
                     # Upload to GCS if enabled
-                    gcs_path = None
                     if self.use_gcs:
-                        gcs_path = f"processed/{output_filename}"
-                        self.gcs.upload_file(output_path, gcs_path)
-                        
-                    # Calculate print resolution
-                    actual_width, actual_height = resized_img.size
-                    actual_width_inches, actual_height_inches = size_inches
-                    actual_dpi_w = actual_width / actual_width_inches
-                    actual_dpi_h = actual_height / actual_height_inches
+                        self._upload(output_path, gcs_path)
+                    if variant_cache:
+                        variant_cache.put(render_key, output_path, gcs_path, render_params)
                     
-                    # Store variant details
-                    variant_details = {
-                        'local_path': output_path,
-                        'gcs_path': gcs_path,
-                        'size_inches': size_inches,
-                        'size_pixels': (actual_width, actual_height),
-                        'dpi': (actual_dpi_w, actual_dpi_h),
-                        'material': material,
-                        'format': format_name,
-                        'fit_method': fit_method
-                    }
-                    
-                    results[size_cat][size_name][material] = variant_details
-                    
-                    # Track best variant for this size (prefer higher DPI and better materials)
-                    size_key = f"{size_cat}_{size_name}"
+                # Calculate print resolution
+                actual_width_inches, actual_height_inches = size_inches
+                actual_dpi_w = actual_width / actual_width_inches
+                actual_dpi_h = actual_height / actual_height_inches
+                
+                # Store variant details
+                results[size_cat][size_name][material] = {
+                    'local_path': output_path,
+                    'gcs_path': gcs_path,
+                    'size_inches': size_inches,
+                    'size_pixels': (actual_width, actual_height),
+                    'dpi': (actual_dpi_w, actual_dpi_h),
+                    'material': material,
+                    'format': format_name,
+                    'fit_method': fit_method,
+                    'cached': cached
+                }
+            
+            del resized_img
+        
+        self.variant_stats = {
+            'variants': variant_count,
+            'resizes': resize_count,
+            'resizes_deduplicated': variant_count - cached_count - resize_count,
+            'encodes': encode_count,
+            'encodes_deduplicated': variant_count - cached_count - encode_count,
+            'cached': cached_count
+        }
+        logger.info(
+            f"Generated {variant_count} variants with {resize_count} resizes "
+            f"({self.variant_stats['resizes_deduplicated']} deduplicated), {encode_count} encodes "
+            f"and {cached_count} reused from the variant cache"
+        )
+        
+        # Track the best variant for each size (prefer higher DPI and better materials)
+        best_variants = {}
+        for size_cat, sizes in results.items():
+            for size_name, variants in sizes.items():
+                size_key = f"{size_cat}_{size_name}"
+                for variant_details in variants.values():
                     if size_key not in best_variants:
                         best_variants[size_key] = variant_details
                     else:
@@ -524,7 +971,8 @@ class ImageProcessor:
         metadata_dict = {
             'original_metadata': metadata,
             'variants': results,
-            'best_variants': best_variants
+            'best_variants': best_variants,
+            'variant_stats': self.variant_stats
         }
         
         with open(metadata_path, 'w') as f:
@@ -533,16 +981,218 @@ class ImageProcessor:
         # Upload metadata to GCS
         if self.use_gcs:
             gcs_metadata_path = f"metadata/{base_filename}_print_variants.json"
-            self.gcs.upload_file(metadata_path, gcs_metadata_path)
+            self._upload(metadata_path, gcs_metadata_path)
+            
+            # Queued uploads may still need the listings; the store drops the oldest itself
+            if not self.uploads:
+                self.gcs.drop_remote_index(f"processed/{base_filename}_")
+                self.gcs.drop_remote_index(f"metadata/{base_filename}_")
             
         return results
         
+    def create_variant_manifest(self, img: Image.Image,
+                                metadata: Dict[str, Any],
+                                size_categories: List[str] = None,
+                                materials: List[str] = None,
+                                fit_method: str = 'contain',
+                                base_dir: str = 'data',
+                                base_filename: str = None,
+                                enhance: bool = True) -> Dict[str, Any]:
+        """
+        Store the enhanced master and a variant manifest instead of rendering variants.
+        
+        This is the lazy alternative to generate_print_variants: each variant
+        is described (size, material, format, pixels and where its file goes)
+        but only rendered by render_variant when it is first needed, e.g.
+        when an order for it is routed.
+        
+        Args:
+            img: PIL Image object.
+            metadata: Original image metadata.
+            size_categories: List of size categories to include ('small', 'medium', 'large').
+            materials: List of materials to generate variants for.
+            fit_method: How to fit the image ('contain', 'cover', 'stretch').
+            base_dir: Base directory for output files.
+            base_filename: Base filename for output files.
+            enhance: Whether to apply the default enhancements first. Pass False
+                     if img is already enhanced.
+            
+        Returns:
+            The manifest, with the master paths, 'manifest_path' and 'variants'
+            keyed like the result of generate_print_variants.
+        """
+        if size_categories is None:
+            size_categories = ['small', 'medium', 'large']
+            
+        if materials is None:
+            materials = list(MATERIAL_PRESETS.keys())
+            
+        if base_filename is None:
+            base_filename = f"processed_image_{hash(img)}"
+        
+        # Store the enhanced master losslessly
+        enhanced_img = self.enhance_image(img) if enhance else img
+        master_dir = os.path.join(base_dir, 'masters')
+        os.makedirs(master_dir, exist_ok=True)
+        master_path = os.path.join(master_dir, f"{base_filename}_master.tiff")
+        self.save_print_format(enhanced_img, master_path, 'TIFF')
+        
+        master_gcs_path = None
+        if self.use_gcs:
+            master_gcs_path = f"masters/{base_filename}_master.tiff"
+            self._upload(master_path, master_gcs_path)
+        
+        processed_dir = os.path.join(base_dir, 'processed')
+        variants = {}
+        for group in self.plan_print_variants(size_categories, materials, fit_method):
+            for variant in group['variants']:
+                file_ext = FORMAT_EXTENSIONS.get(variant['format'], f".{variant['format'].lower()}")
+                output_filename = f"{base_filename}_{variant['size_name']}_{variant['material']}{file_ext}"
+                variants.setdefault(variant['size_category'], {}).setdefault(variant['size_name'], {})[variant['material']] = {
+                    'local_path': os.path.join(processed_dir, output_filename),
+                    'gcs_path': f"processed/{output_filename}" if self.use_gcs else None,
+                    'size_inches': variant['size_inches'],
+                    'size_pixels': group['pixels'],
+                    'dpi': (group['dpi'], group['dpi']),
+                    'material': variant['material'],
+                    'format': variant['format'],
+                    'fit_method': fit_method,
+                    'rendered': False
+                }
+        
+        manifest_path = os.path.join(base_dir, 'metadata', f"{base_filename}_variant_manifest.json")
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        manifest = {
+            'base_filename': base_filename,
+            'master_path': master_path,
+            'master_gcs_path': master_gcs_path,
+            'master_size': enhanced_img.size,
+            'manifest_path': manifest_path,
+            'manifest_gcs_path': f"metadata/{base_filename}_variant_manifest.json" if self.use_gcs else None,
+            'original_metadata': metadata,
+            'variants': variants
+        }
+        
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            
+        if self.use_gcs:
+            self._upload(manifest_path, manifest['manifest_gcs_path'])
+        
+        variant_count = sum(len(materials) for sizes in variants.values() for materials in sizes.values())
+        self.variant_stats = {
+            'variants': variant_count,
+            'resizes': 0,
+            'encodes': 0,
+            'deferred': variant_count
+        }
+        logger.info(f"Stored master and manifest for {variant_count} deferred variants: {manifest_path}")
+        
+        return manifest
+    
+    def load_variant_manifest(self, manifest_ref: str, base_dir: str = 'data') -> Optional[Dict[str, Any]]:
+        """
+        Load a variant manifest from a local path or its GCS path.
+        
+        Args:
+            manifest_ref: Local manifest path, or GCS blob name (downloaded into
+                          base_dir/metadata if not present locally).
+            base_dir: Base directory for downloaded manifests.
+            
+        Returns:
+            The manifest, or None if it cannot be found.
+        """
+        local_path = manifest_ref
+        if not os.path.exists(local_path):
+            local_path = os.path.join(base_dir, 'metadata', os.path.basename(manifest_ref))
+            if not os.path.exists(local_path):
+                if not self.use_gcs or not self.gcs.download_file(manifest_ref, local_path):
+                    logger.error(f"Variant manifest not found: {manifest_ref}")
+                    return None
+        
+        with open(local_path, 'r') as f:
+            return json.load(f)
+    
+    def render_variant(self, manifest: Union[Dict[str, Any], str],
+                       size_name: str,
+                       material: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the print file for one variant, rendering it from the master on first use.
+        
+        A variant already rendered locally, or found in GCS, is reused as is.
+        Otherwise the master is loaded (downloaded from GCS if needed),
+        resized and encoded once, and the file is uploaded to GCS for reuse.
+        
+        Args:
+            manifest: Manifest from create_variant_manifest, or a reference for
+                      load_variant_manifest.
+            size_name: Print size name (e.g. '16x20').
+            material: Material name (e.g. 'canvas').
+            
+        Returns:
+            The variant details with 'rendered': True, or None if the variant
+            is not in the manifest or could not be rendered.
+        """
+        if isinstance(manifest, str):
+            manifest = self.load_variant_manifest(manifest)
+            if manifest is None:
+                return None
+        
+        details = None
+        for sizes in manifest['variants'].values():
+            if material in sizes.get(size_name, {}):
+                details = dict(sizes[size_name][material])
+                break
+        if details is None:
+            logger.error(f"Variant {size_name} {material} not in manifest for {manifest.get('base_filename')}")
+            return None
+        
+        output_path = details['local_path']
+        gcs_path = details.get('gcs_path')
+        details['rendered'] = True
+        
+        # Reuse an earlier render
+        if os.path.exists(output_path):
+            return details
+        if gcs_path and self.use_gcs and self.gcs.file_exists(gcs_path):
+            if self.gcs.download_file(gcs_path, output_path):
+                return details
+        
+        master_path = manifest['master_path']
+        if not os.path.exists(master_path):
+            master_gcs_path = manifest.get('master_gcs_path')
+            if not (master_gcs_path and self.use_gcs and self.gcs.download_file(master_gcs_path, master_path)):
+                logger.error(f"Master image not found for {manifest.get('base_filename')}: {master_path}")
+                return None
+        
+        master = self.load_image(master_path)
+        if master is None:
+            return None
+        
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        size_inches = tuple(details['size_inches'])
+        dpi = details['dpi'][0]
+        format_name = details['format']
+        if format_name == 'TIFF' and self._should_render_tiled(tuple(details['size_pixels'])):
+            self.render_print_tiled(master, size_inches, dpi, details['fit_method'], output_path)
+        else:
+            resized_img = self.resize_for_print(master, size_inches, dpi, details['fit_method'])
+            self.save_print_format(resized_img, output_path, format_name)
+            del resized_img
+        logger.info(f"Rendered variant {size_name} {material} for {manifest.get('base_filename')}")
+        
+        if gcs_path and self.use_gcs:
+            self._upload(output_path, gcs_path)
+        
+        return details
+        
     def process_image(self, image_path: str, 
                      size_categories: List[str] = None,
                      materials: List[str] = None,
                      fit_method: str = 'contain',
                      enhancement_params: Dict[str, float] = None,
-                     base_dir: str = 'data') -> Dict[str, Any]:
+                     base_dir: str = 'data',
+                     lazy: bool = None) -> Dict[str, Any]:
         """
         Process an image through the full pipeline.
         
@@ -553,6 +1203,8 @@ class ImageProcessor:
             fit_method: How to fit the image.
             enhancement_params: Custom enhancement parameters.
             base_dir: Base directory for output files.
+            lazy: Whether to store only the enhanced master and a variant manifest,
+                  rendering variants on demand. Defaults to config value.
             
         Returns:
             Dictionary with processing results and variant information.
@@ -570,27 +1222,51 @@ class ImageProcessor:
         # Get base filename
         base_filename = os.path.splitext(os.path.basename(image_path))[0]
         
-        # Apply enhancements
-        enhanced_img = self.enhance_image(img, enhancement_params)
-        
-        # Generate print variants
-        variants = self.generate_print_variants(
-            enhanced_img,
-            original_metadata,
-            size_categories,
-            materials,
-            fit_method,
-            base_dir,
-            base_filename
-        )
+        if lazy is None:
+            lazy = getattr(config, 'PROCESSING_LAZY_VARIANTS', False)
+        
+        manifest_path = None
+        if lazy:
+            # Defer rendering to render_variant
+            manifest = self.create_variant_manifest(
+                self.enhance_image(img, enhancement_params),
+                original_metadata,
+                size_categories,
+                materials,
+                fit_method,
+                base_dir,
+                base_filename,
+                enhance=False
+            )
+            variants = manifest['variants']
+            manifest_path = manifest['manifest_path']
+        else:
+            # Variants already rendered from this exact source and parameters are reused
+            source_hash = hash_file(image_path) if get_variant_cache() else None
+            
+            # Enhanced inside, only if some variant has to be rendered
+            variants = self.generate_print_variants(
+                img,
+                original_metadata,
+                size_categories,
+                materials,
+                fit_method,
+                base_dir,
+                base_filename,
+                enhancement_params=enhancement_params,
+                source_hash=source_hash
+            )
         
         # Build result
         result = {
             'success': True,
             'original_path': image_path,
             'original_metadata': original_metadata,
-            'variants': variants
+            'variants': variants,
+            'variant_stats': self.variant_stats
         }
+        if manifest_path:
+            result['manifest_path'] = manifest_path
         
         logger.info(f"Successfully processed image: {image_path}")
         
@@ -601,7 +1277,10 @@ class ImageProcessor:
                            materials: List[str] = None,
                            fit_method: str = 'contain',
                            enhancement_params: Dict[str, float] = None,
-                           base_dir: str = 'data') -> Dict[str, Any]:
+                           base_dir: str = 'data',
+                           parallel: bool = None,
+                           max_workers: int = None,
+                           lazy: bool = None) -> Dict[str, Any]:
         """
         Process multiple images in batch.
         
@@ -612,46 +1291,85 @@ class ImageProcessor:
             fit_method: How to fit the image.
             enhancement_params: Custom enhancement parameters.
             base_dir: Base directory for output files.
+            parallel: Whether to process images across a process pool.
+                      Defaults to config value.
+            max_workers: Number of worker processes. Defaults to config value
+                         (0 means one per CPU).
+            lazy: Whether to defer variant rendering to order time (see
+                  process_image). Defaults to config value.
             
         Returns:
             Dictionary with processing results for each image.
         """
-        results = {}
-        successful = 0
-        failed = 0
+        if parallel is None:
+            parallel = getattr(config, 'PROCESSING_PARALLEL', False)
+        if max_workers is None:
+            max_workers = getattr(config, 'PROCESSING_MAX_WORKERS', 0)
+        if not max_workers:
+            max_workers = os.cpu_count() or 1
         
-        for path in image_paths:
-            try:
-                result = self.process_image(
-                    path,
-                    size_categories,
-                    materials,
-                    fit_method,
-                    enhancement_params,
-                    base_dir
-                )
-                
-                results[path] = result
-                if result.get('success', False):
-                    successful += 1
-                else:
-                    failed += 1
-                    
-                logger.info(f"Processed {successful + failed}/{len(image_paths)} images")
-            except Exception as e:
-                logger.error(f"Error processing image {path}: {e}")
-                results[path] = {
-                    'success': False,
-                    'error': str(e)
-                }
-                failed += 1
+        if lazy is None:
+            lazy = getattr(config, 'PROCESSING_LAZY_VARIANTS', False)
+        
+        process_args = (size_categories, materials, fit_method, enhancement_params, base_dir, lazy)
+        
+        # Upload and variant cache counters of this batch; workers report theirs with each result
+        counters_before = _batch_counters(self)
+        worker_counters = dict.fromkeys(counters_before, 0)
+        
+        if parallel and not lazy:
+            # Run no more workers than the memory budget allows
+            budget_mb = getattr(config, 'PROCESSING_MEMORY_BUDGET_MB', 4096)
+            worker_mb = self.estimate_worker_memory_mb(size_categories, materials, fit_method)
+            if budget_mb:
+                memory_workers = max(1, int(budget_mb // worker_mb))
+                if memory_workers < max_workers:
+                    logger.info(f"Limiting to {memory_workers} workers: ~{worker_mb:.0f} MB per image, budget {budget_mb} MB")
+                    max_workers = memory_workers
+        
+        if parallel and len(image_paths) > 1 and max_workers > 1:
+            results = self._batch_process_parallel(image_paths, process_args, max_workers, worker_counters)
+        else:
+            results = {}
+            for path in image_paths:
+                try:
+                    results[path] = self.process_image(path, *process_args)
+                except Exception as e:
+                    logger.error(f"Error processing image {path}: {e}")
+                    results[path] = {
+                        'success': False,
+                        'error': str(e)
+                    }
+                logger.info(f"Processed {len(results)}/{len(image_paths)} images")
+        
+        if self.uploads:
+            logger.info(f"Waiting for {self.uploads.pending_count()} GCS uploads to finish")
+            self.uploads.wait()
+            logger.info(f"Upload queue: {self.uploads.get_stats()}")
+        counters_after = _batch_counters(self)
+        counters = {
+            name: counters_after[name] - counters_before[name] + worker_counters[name]
+            for name in counters_before
+        }
+        if self.use_gcs:
+            logger.info(
+                f"GCS uploads: {counters['uploaded']} uploaded, {counters['skipped']} unchanged "
+                f"({counters['bytes_saved'] / (1024 * 1024):.1f} MB not re-sent)"
+            )
+        
+        successful = sum(1 for result in results.values() if result.get('success', False))
+        failed = len(results) - successful
+        variants_cached = sum(result.get('variant_stats', {}).get('cached', 0) for result in results.values())
                 
         # Create summary
         summary = {
             'total': len(image_paths),
             'successful': successful,
             'failed': failed,
-            'success_rate': successful / len(image_paths) if len(image_paths) > 0 else 0
+            'success_rate': successful / len(image_paths) if len(image_paths) > 0 else 0,
+            'variants_cached': variants_cached,
+            'upload_stats': {name: counters[name] for name in ('uploaded', 'skipped', 'bytes_uploaded', 'bytes_saved')},
+            'variant_cache': {'hits': counters['variant_cache_hits'], 'misses': counters['variant_cache_misses']}
         }
         
         # Save batch processing summary
@@ -672,3 +1390,108 @@ class ImageProcessor:
             'results': results,
             'summary_path': summary_path
         }
+    
+    def _batch_process_parallel(self, image_paths: List[str], process_args: tuple,
+                                max_workers: int, counters: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+        """
+        Process images across a process pool.
+        
+        If a worker process dies (e.g. killed for running out of memory), the
+        pool breaks and every unfinished image fails with BrokenProcessPool.
+        Those images are retried one at a time in fresh single-worker pools, so
+        only the image that actually crashes a worker is reported as failed.
+        
+        Args:
+            image_paths: Paths of the images to process.
+            process_args: Remaining process_image arguments.
+            max_workers: Number of worker processes.
+            counters: Batch counters (see _batch_counters), incremented with
+                      the uploads and variant cache lookups of the workers.
+        
+        Returns:
+            Dictionary of results keyed by image path, in input order.
+        """
+        results = {}
+        crashed = []
+        
+        logger.info(f"Processing {len(image_paths)} images with {max_workers} worker processes")
+        try:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(image_paths)),
+                                     initializer=_init_process_worker,
+                                     initargs=(self.use_gcs,)) as executor:
+                futures = {
+                    executor.submit(_process_image_worker, path, *process_args): path
+                    for path in image_paths
+                }
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        results[path], worker_counters = future.result()
+                        _add_counters(counters, worker_counters)
+                    except BrokenProcessPool:
+                        crashed.append(path)
+                        continue
+                    except Exception as e:
+                        logger.error(f"Error processing image {path}: {e}")
+                        results[path] = {'success': False, 'error': str(e)}
+                    logger.info(f"Processed {len(results)}/{len(image_paths)} images")
+        except BrokenProcessPool:
+            crashed.extend(path for path in image_paths if path not in results and path not in crashed)
+        
+        if crashed:
+            logger.warning(f"A worker process crashed; retrying {len(crashed)} unfinished images one at a time")
+        for path in crashed:
+            try:
+                with ProcessPoolExecutor(max_workers=1, initializer=_init_process_worker,
+                                         initargs=(self.use_gcs,)) as executor:
+                    results[path], worker_counters = executor.submit(_process_image_worker, path, *process_args).result()
+                    _add_counters(counters, worker_counters)
+            except BrokenProcessPool:
+                logger.error(f"Worker process crashed while processing image {path}")
+                results[path] = {'success': False, 'error': 'worker process crashed'}
+            except Exception as e:
+                logger.error(f"Error processing image {path}: {e}")
+                results[path] = {'success': False, 'error': str(e)}
+        
+        return {path: results[path] for path in image_paths}
+
+def _copy_file_atomic(source_path: str, destination_path: str):
+    """Copy a file via a temporary file and rename, so the destination is never partial."""
+    temp_path = f"{destination_path}.tmp"
+    try:
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, destination_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _init_process_worker(use_gcs: bool):
+    """Create the ImageProcessor used by a batch worker process."""
+    global _worker_processor
+    # Workers upload inline; the background queue and its journal belong to the parent
+    _worker_processor = ImageProcessor(use_gcs=use_gcs, upload_async=False)
+
+def _process_image_worker(image_path: str, *process_args) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """Process one image inside a batch worker process, returning its result and counters."""
+    before = _batch_counters(_worker_processor)
+    result = _worker_processor.process_image(image_path, *process_args)
+    after = _batch_counters(_worker_processor)
+    return result, {name: after[name] - before[name] for name in before}
+
+def _batch_counters(processor: 'ImageProcessor') -> Dict[str, int]:
+    """Upload and variant cache counters of this process, for per-batch deltas."""
+    counters = {'uploaded': 0, 'skipped': 0, 'bytes_uploaded': 0, 'bytes_saved': 0,
+                'variant_cache_hits': 0, 'variant_cache_misses': 0}
+    if processor.use_gcs:
+        counters.update(processor.gcs.get_upload_stats())
+    variant_cache = get_variant_cache()
+    if variant_cache:
+        counters['variant_cache_hits'] = variant_cache.hits
+        counters['variant_cache_misses'] = variant_cache.misses
+    return counters
+
+def _add_counters(counters: Dict[str, int], worker_counters: Dict[str, int]):
+    """Add a worker's counters to the batch totals."""
+    for name, value in worker_counters.items():
+        counters[name] = counters.get(name, 0) + value
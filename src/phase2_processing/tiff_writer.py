@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Streaming Strip TIFF Writer
+
+Writes an RGB TIFF one strip at a time, so an image of any size can be
+written while only a single strip of pixels is held in memory. Strips are
+Deflate-compressed with horizontal differencing (TIFF predictor 2), which
+any TIFF reader (PIL, libtiff, print lab RIPs) can decode.
+"""
+
+import os
+import struct
+import zlib
+import logging
+from typing import Iterable, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# TIFF field types
+SHORT = 3
+LONG = 4
+RATIONAL = 5
+
+# TIFF tag values
+COMPRESSION_DEFLATE = 8
+PHOTOMETRIC_RGB = 2
+PLANAR_CHUNKY = 1
+RESOLUTION_UNIT_INCH = 2
+PREDICTOR_HORIZONTAL = 2
+
+# Classic TIFF uses 32-bit offsets
+MAX_TIFF_OFFSET = 2 ** 32 - 1
+
+def _predict(strip: np.ndarray) -> np.ndarray:
+    """Apply TIFF horizontal differencing to an (rows, width, 3) uint8 strip."""
+    predicted = strip.copy()
+    predicted[:, 1:, :] -= strip[:, :-1, :]
+    return predicted
+
+def write_strip_tiff(output_path: str,
+                     width: int,
+                     height: int,
+                     strips: Iterable[np.ndarray],
+                     rows_per_strip: int,
+                     dpi: Tuple[float, float] = (300, 300),
+                     compression_level: int = 6) -> int:
+    """
+    Write an RGB TIFF from a sequence of pixel strips.
+
+    The file is written to a temporary path next to output_path and moved into
+    place once complete, so readers never see a partial file.
+
+    Args:
+        output_path: Destination file path.
+        width: Image width in pixels.
+        height: Image height in pixels.
+        strips: Strips from top to bottom, each a uint8 array of shape
+                (rows, width, 3); every strip but the last has rows_per_strip rows.
+        rows_per_strip: Rows per strip.
+        dpi: (x, y) resolution written to the file.
+        compression_level: zlib compression level (1-9).
+
+    Returns:
+        Size of the written file in bytes.
+    """
+    temp_path = f"{output_path}.tmp"
+    strip_offsets = []
+    strip_byte_counts = []
+    rows_written = 0
+
+    try:
+        with open(temp_path, 'wb') as f:
+            # Header; the IFD offset is patched in once the strips are written
+            f.write(b'II*\x00' + struct.pack('<I', 0))
+
+            for strip in strips:
+                if strip.dtype != np.uint8 or strip.ndim != 3 or strip.shape[1:] != (width, 3):
+                    raise ValueError(f"Strip has shape {strip.shape} and dtype {strip.dtype}, expected (rows, {width}, 3) uint8")
+                data = zlib.compress(_predict(strip).tobytes(), compression_level)
+                strip_offsets.append(f.tell())
+                strip_byte_counts.append(len(data))
+                f.write(data)
+                rows_written += strip.shape[0]
+
+            if rows_written != height:
+                raise ValueError(f"Strips contain {rows_written} rows, expected {height}")
+
+            ifd_offset = _write_ifd(f, width, height, rows_per_strip, strip_offsets, strip_byte_counts, dpi)
+            if f.tell() > MAX_TIFF_OFFSET:
+                raise ValueError("Image too large for a classic TIFF file")
+            f.seek(4)
+            f.write(struct.pack('<I', ifd_offset))
+
+        os.replace(temp_path, output_path)
+        return os.path.getsize(output_path)
+
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _write_ifd(f, width: int, height: int, rows_per_strip: int,
+               strip_offsets: list, strip_byte_counts: list,
+               dpi: Tuple[float, float]) -> int:
+    """Write the image file directory (and its out-of-line values) at the end of the file."""
+    # Word-align the IFD
+    if f.tell() % 2:
+        f.write(b'\x00')
+
+    # Out-of-line values are written first, then the IFD that points at them
+    def write_values(fmt: str, values) -> int:
+        offset = f.tell()
+        f.write(struct.pack(f'<{len(values)}{fmt}', *values))
+        return offset
+
+    bits_offset = write_values('H', [8, 8, 8])
+    x_res_offset = write_values('I', [int(round(dpi[0] * 1000)), 1000])
+    y_res_offset = write_values('I', [int(round(dpi[1] * 1000)), 1000])
+    strip_count = len(strip_offsets)
+    offsets_offset = write_values('I', strip_offsets) if strip_count > 1 else strip_offsets[0]
+    counts_offset = write_values('I', strip_byte_counts) if strip_count > 1 else strip_byte_counts[0]
+
+    # (tag, type, count, value or offset), sorted by tag
+    entries = [
+        (256, LONG, 1, width),
+        (257, LONG, 1, height),
+        (258, SHORT, 3, bits_offset),
+        (259, SHORT, 1, COMPRESSION_DEFLATE),
+        (262, SHORT, 1, PHOTOMETRIC_RGB),
+        (273, LONG, strip_count, offsets_offset),
+        (277, SHORT, 1, 3),
+        (278, LONG, 1, rows_per_strip),
+        (279, LONG, strip_count, counts_offset),
+        (282, RATIONAL, 1, x_res_offset),
+        (283, RATIONAL, 1, y_res_offset),
+        (284, SHORT, 1, PLANAR_CHUNKY),
+        (296, SHORT, 1, RESOLUTION_UNIT_INCH),
+        (317, SHORT, 1, PREDICTOR_HORIZONTAL),
+    ]
+
+    ifd_offset = f.tell()
+    f.write(struct.pack('<H', len(entries)))
+    for tag, field_type, count, value in entries:
+        if field_type == SHORT and count == 1:
+            f.write(struct.pack('<HHIHH', tag, field_type, count, value, 0))
+        else:
+            f.write(struct.pack('<HHII', tag, field_type, count, value))
+    f.write(struct.pack('<I', 0))  # No further IFDs
+    return ifd_offset
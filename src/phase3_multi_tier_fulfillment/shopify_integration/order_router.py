@@ -1,11 +1,13 @@
 import shopify
 import json
-from typing import Dict
+import re
+from typing import Dict, Optional
 from config import PrintStrategy
 
 class ShopifyOrderRouter:
     def __init__(self):
         self.setup_shopify_session()
+        self._image_processor = None
     
     def setup_shopify_session(self):
         """Initialize Shopify API session"""
@@ -39,13 +41,20 @@ class ShopifyOrderRouter:
                         'billing_address': order_data['billing_address']
                     }
                 
-                platform_orders[platform]['items'].append({
+                order_item = {
                     'product_id': fulfillment_info['platform_product_id'],
                     'variant_id': variant_id,
                     'quantity': item['quantity'],
                     'shopify_line_item_id': item['id'],
                     'sku': item['sku']
-                })
+                }
+                
+                # Render the print file now if processing deferred it
+                print_file = self._resolve_print_file(fulfillment_info['platform_data'], item)
+                if print_file:
+                    order_item['print_file'] = print_file
+                
+                platform_orders[platform]['items'].append(order_item)
             
             # Send orders to respective platforms
             fulfillment_results = {}
@@ -97,6 +106,34 @@ class ShopifyOrderRouter:
         
         return fulfillment_info
     
+    def _resolve_print_file(self, platform_data: Dict, item: Dict) -> Optional[Dict]:
+        """
+        Get the print file for a line item from the product's variant manifest.
+        
+        Products processed in lazy mode carry a 'variant_manifest' reference in
+        their platform_data; the ordered size and material are looked up in
+        'variant_specs' by Shopify variant id, falling back to the size in the
+        variant title and the product's default 'material'. The variant is
+        rendered on first order and reused afterwards.
+        """
+        manifest_ref = platform_data.get('variant_manifest')
+        if not manifest_ref:
+            return None
+        
+        spec = platform_data.get('variant_specs', {}).get(str(item.get('variant_id')), {})
+        size_name = spec.get('size_name')
+        if not size_name:
+            match = re.search(r'(\d+)\s*x\s*(\d+)', item.get('variant_title') or '')
+            size_name = f"{match.group(1)}x{match.group(2)}" if match else None
+        material = spec.get('material') or platform_data.get('material', 'fine_art_paper')
+        if not size_name:
+            return None
+        
+        if self._image_processor is None:
+            from ...phase2_processing.image_processor import ImageProcessor
+            self._image_processor = ImageProcessor()
+        return self._image_processor.render_variant(manifest_ref, size_name, material)
+    
     def _fulfill_via_creativehub(self, order_info: Dict) -> Dict:
         """Send order to CreativeHub for fulfillment"""
         from ..creativehub_integration.order_handler import CreativeHubOrderHandler
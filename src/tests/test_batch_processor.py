@@ -0,0 +1,87 @@
+def _posts(user, count, day=28):
+    return [{'shortCode': f"{user}{i}", 'ownerUsername': user,
+             'timestamp': f"2024-01-{day - i:02d}T00:00:00.000Z"} for i in range(count)]
+
+def _processor(tmp_path, monkeypatch, listings, failing=()):
+    """Batch processor over a fake actor returning each profile's listing, newest first"""
+    from src import config
+    from src.phase1_acquisition import batch_processor
+    from src.utils.image_tracker import ImageTracker
+
+    monkeypatch.setattr(config, 'SCRAPE_INCREMENTAL', True, raising=False)
+
+    def run_shards(client, shards):
+        for shard in shards:
+            if shard['profile'] in failing:
+                yield shard, None
+                continue
+            posts = listings[shard['profile']]
+            newer_than = shard.get('only_posts_newer_than')
+            if newer_than:
+                posts = [post for post in posts if post['timestamp'] > newer_than]
+            yield shard, posts[:shard['max_posts']]
+
+    monkeypatch.setattr(batch_processor, 'run_instagram_scraper_shards', run_shards)
+    processor = batch_processor.BatchProcessor.__new__(batch_processor.BatchProcessor)
+    processor.tracker = ImageTracker(base_dir=str(tmp_path))
+    processor.apify_client = object()
+    return processor
+
+def test_failed_shard_is_not_exhausted(tmp_path, monkeypatch):
+    """Test a failed profile keeps the batch going and leaves its watermark alone"""
+    processor = _processor(tmp_path, monkeypatch, {'alice': []}, failing={'bob'})
+    urls = ['https://www.instagram.com/alice/', 'https://www.instagram.com/bob/']
+
+    posts, updates = processor._scrape_posts_iteration(urls, 3)
+    assert posts == []
+    assert {update['profile']: update['exhausted'] for update in updates} == {'alice': True, 'bob': False}
+    assert not all(update['exhausted'] for update in updates)
+
+    processor._commit_watermarks(updates)
+    assert processor.tracker.get_profile_watermark('bob') is None
+
+def test_backfill_returns_only_the_new_page(tmp_path, monkeypatch):
+    """Test backfill walks one page deeper per run and only returns posts not walked before"""
+    from src import config
+
+    monkeypatch.setattr(config, 'SCRAPE_BACKFILL_MAX_DEPTH', 6, raising=False)
+    processor = _processor(tmp_path, monkeypatch, {'alice': _posts('alice', 8)})
+    urls = ['https://www.instagram.com/alice/']
+
+    pages = []
+    for _ in range(3):
+        posts, updates = processor._scrape_posts_iteration(urls, 3, backfill=True)
+        processor._commit_watermarks(updates)
+        pages.append([post['shortCode'] for post in posts])
+    assert pages == [['alice0', 'alice1', 'alice2'], ['alice3', 'alice4', 'alice5'], []]
+
+    # Stopped at the depth limit, not at the end of the listing
+    watermark = processor.tracker.get_profile_watermark('alice')
+    assert watermark['backfill_offset'] == 6
+    assert watermark['backfill_complete'] is False
+    assert updates == [{'profile': 'alice', 'posts': [], 'exhausted': True}]
+
+def test_truncated_incremental_page_skips_no_posts(tmp_path, monkeypatch):
+    """Test a full incremental page keeps the watermark until the posts below it are fetched"""
+    listings = {'alice': _posts('alice', 2, day=10)}
+    processor = _processor(tmp_path, monkeypatch, listings)
+    urls = ['https://www.instagram.com/alice/']
+
+    posts, updates = processor._scrape_posts_iteration(urls, 3)
+    processor._commit_watermarks(updates)
+
+    # Seven posts arrive between runs, more than one page
+    listings['alice'] = _posts('new', 7) + listings['alice']
+    fetched = set()
+    for _ in range(3):
+        posts, updates = processor._scrape_posts_iteration(urls, 3)
+        processor._commit_watermarks(updates)
+        fetched.update(post['shortCode'] for post in posts)
+
+    assert fetched == {f"new{i}" for i in range(7)}
+    watermark = processor.tracker.get_profile_watermark('alice')
+    assert watermark['newest_shortcode'] == 'new0'
+    assert watermark['gap_depth'] == 0
+
+    posts, updates = processor._scrape_posts_iteration(urls, 3)
+    assert posts == [] and updates[0]['exhausted']
@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+def test_results_flow_while_job_source_blocks():
+    """Test finished downloads are handed back while the job generator is still blocked"""
+    from src.utils.download_engine import DownloadEngine
+
+    first_result = threading.Event()
+    waits = []
+
+    def jobs():
+        yield 'a', 'https://cdn.example.com/a.jpg', 1
+        # Like a live dataset poll that only returns once the actor appends more items
+        waits.append(first_result.wait(timeout=2))
+        yield 'b', 'https://cdn.example.com/b.jpg', 2
+
+    def worker(url, payload):
+        time.sleep(0.05)
+        return payload * 10
+
+    results = {}
+    for key, result, error in DownloadEngine(max_workers=2).run(jobs(), worker):
+        results[key] = result
+        first_result.set()
+
+    assert waits == [True]
+    assert results == {'a': 10, 'b': 20}
+
+def test_job_errors_are_isolated():
+    """Test a failing job is reported without affecting the others, and job source errors propagate"""
+    from src.utils.download_engine import DownloadEngine
+
+    def worker(url, payload):
+        if payload == 'bad':
+            raise IOError('download failed')
+        return payload
+
+    jobs = [(i, f"https://cdn.example.com/{i}.jpg", 'bad' if i == 3 else i) for i in range(10)]
+    results = {key: (result, error) for key, result, error in DownloadEngine(max_workers=3).run(jobs, worker)}
+    assert len(results) == 10
+    assert isinstance(results[3][1], IOError)
+    assert all(results[i] == (i, None) for i in range(10) if i != 3)
+
+    def broken_jobs():
+        yield 0, 'https://cdn.example.com/0.jpg', 0
+        raise ValueError('dataset page failed')
+
+    with pytest.raises(ValueError, match='dataset page failed'):
+        list(DownloadEngine().run(broken_jobs(), worker))
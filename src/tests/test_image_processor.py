@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+def _image(width, height, seed=0):
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+@pytest.mark.parametrize('fit_method', ['contain', 'cover', 'stretch'])
+def test_tiled_render_matches_resize(tmp_path, fit_method):
+    """Test strip-by-strip TIFF rendering reproduces resize_for_print"""
+    from src.phase2_processing.image_processor import ImageProcessor
+
+    processor = ImageProcessor(use_gcs=False)
+    img = _image(317, 211)
+    expected = np.asarray(processor.resize_for_print(img, (3, 4), 50, fit_method), dtype=np.int16)
+
+    # One strip is pixel-for-pixel identical; strip boundaries may round a few pixels by one level
+    for rows_per_strip, tolerance in ((200, 0), (16, 1), (7, 1)):
+        output_path = str(tmp_path / f"{fit_method}_{rows_per_strip}.tiff")
+        size = processor.render_print_tiled(img, (3, 4), 50, fit_method, output_path, rows_per_strip)
+        assert size == (150, 200)
+        with Image.open(output_path) as rendered:
+            assert rendered.size == (150, 200)
+            difference = np.abs(np.asarray(rendered.convert('RGB'), dtype=np.int16) - expected)
+        assert difference.max() <= tolerance
+        assert (difference > 0).mean() < 0.001
+
+@pytest.mark.parametrize('params', [
+    None,
+    {'brightness': 1.2, 'contrast': 1.3, 'color': 0.8, 'sharpness': 1.5, 'saturation': 1.2},
+    {'brightness': 0.9, 'contrast': 0.9, 'color': 1.2, 'sharpness': 0.8, 'saturation': 0.9}
+])
+def test_fused_enhancement_matches_pil(params):
+    """Test the fused enhancement stays within a few levels of the ImageEnhance chain"""
+    from src.phase2_processing.image_processor import ImageProcessor
+
+    processor = ImageProcessor(use_gcs=False)
+    params = params or processor.default_params
+    y, x = np.mgrid[0:120, 0:160]
+    gradient = np.stack([x * 1.5, y * 2, x + y], axis=-1) + np.random.default_rng(1).normal(0, 20, (120, 160, 3))
+
+    for img in (Image.fromarray(np.clip(gradient, 0, 255).astype(np.uint8)), _image(160, 120)):
+        fused = np.asarray(processor._enhance_image_fused(img, params), dtype=np.int16)
+        pil = np.asarray(processor._enhance_image_pil(img, params), dtype=np.int16)
+        difference = np.abs(fused - pil)
+        assert difference.max() <= 8
+        assert difference.mean() <= 2
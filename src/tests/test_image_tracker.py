@@ -0,0 +1,72 @@
+import json
+import os
+
+def _post(shortcode):
+    return {
+        'shortCode': shortcode,
+        'id': f"id_{shortcode}",
+        'ownerUsername': 'testuser',
+        'timestamp': '2023-01-01T00:00:00Z',
+        'url': f"https://instagram.com/p/{shortcode}/",
+        'displayUrl': f"https://example.com/{shortcode}.jpg"
+    }
+
+def test_tracker_marks_and_counts(tmp_path):
+    """Test SQLite-backed tracking of processed posts"""
+    from src.utils.image_tracker import ImageTracker
+
+    tracker = ImageTracker(base_dir=str(tmp_path))
+    tracker.mark_processed(_post('a1'), 'accepted', {'overall_score': 0.8}, '/tmp/a1.jpg')
+    tracker.mark_processed(_post('b2'), 'rejected')
+    tracker.mark_processed(_post('c3'), 'error')
+
+    assert tracker.is_processed(_post('a1'))
+    assert not tracker.is_processed(_post('zz'))
+    assert tracker.get_processed_count() == 3
+    assert tracker.get_processed_count('accepted') == 1
+    assert [e['shortcode'] for e in tracker.get_accepted_images()] == ['a1']
+    assert tracker.get_accepted_images()[0]['analysis']['overall_score'] == 0.8
+    assert [p['shortCode'] for p in tracker.get_unprocessed_posts([_post('a1'), _post('new')])] == ['new']
+
+    stats = tracker.get_stats()
+    assert stats['total_processed'] == 3
+    assert stats['errors'] == 1
+
+def test_tracker_migrates_json(tmp_path):
+    """Test one-shot migration from the legacy JSON tracking file"""
+    from src.utils.image_tracker import ImageTracker
+
+    tracking_dir = tmp_path / 'tracking'
+    os.makedirs(tracking_dir)
+    legacy = {
+        'old1': {'image_id': 'old1', 'shortcode': 'old1', 'status': 'accepted',
+                 'processed_at': '2000-01-01T00:00:00'},
+        'new1': {'image_id': 'new1', 'shortcode': 'new1', 'status': 'rejected',
+                 'processed_at': '2999-01-01T00:00:00'}
+    }
+    (tracking_dir / 'processed_images.json').write_text(json.dumps(legacy))
+
+    tracker = ImageTracker(base_dir=str(tmp_path))
+    assert tracker.get_processed_count() == 2
+    assert (tracking_dir / 'processed_images.json.migrated').exists()
+
+    tracker.cleanup_old_entries(days=30)
+    assert set(tracker.processed_images) == {'new1'}
+
+def test_profile_watermark_advances(tmp_path):
+    """Test per-profile scraping watermarks only move outward"""
+    from src.utils.image_tracker import ImageTracker
+
+    tracker = ImageTracker(base_dir=str(tmp_path))
+    assert tracker.get_profile_watermark('someone') is None
+
+    posts = [dict(_post('n1'), timestamp='2024-03-01T00:00:00.000Z'),
+             dict(_post('o1'), timestamp='2024-01-01T00:00:00.000Z')]
+    tracker.update_profile_watermark('SomeOne', posts, backfill_offset=2, backfill_complete=False)
+    tracker.update_profile_watermark('someone', [dict(_post('m1'), timestamp='2024-02-01T00:00:00.000Z')])
+
+    watermark = tracker.get_profile_watermark('someone')
+    assert watermark['newest_shortcode'] == 'n1'
+    assert watermark['oldest_timestamp'] == '2024-01-01T00:00:00.000Z'
+    assert watermark['backfill_offset'] == 2
+    assert watermark['backfill_complete'] is False
@@ -0,0 +1,27 @@
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from src.utils.phash_index import PerceptualHashIndex, compute_hashes
+
+def _photo(seed):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (6, 9, 3), dtype=np.uint8)
+    return Image.fromarray(small).resize((900, 600), Image.BICUBIC)
+
+def test_near_duplicate_found_and_persisted(tmp_path):
+    db_path = str(tmp_path / 'phash.db')
+    index = PerceptualHashIndex(db_path, max_distance=6)
+    original = _photo(1)
+    index.add('orig', *compute_hashes(original), label='orig')
+
+    # Downscaled and slightly brightened repost
+    repost = ImageEnhance.Brightness(original.resize((640, 427))).enhance(1.05)
+    match = index.find_duplicate(*compute_hashes(repost))
+    assert match is not None and match['image_id'] == 'orig'
+
+    assert index.find_duplicate(*compute_hashes(_photo(2))) is None
+    index.close()
+
+    reopened = PerceptualHashIndex(db_path, max_distance=6)
+    assert len(reopened) == 1
+    assert reopened.find_duplicate(*compute_hashes(repost))['label'] == 'orig'
@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+def _pixels(width, height, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+def test_strip_tiff_round_trip(tmp_path):
+    """Test a strip-written TIFF reads back with identical pixels and resolution"""
+    from src.phase2_processing.tiff_writer import write_strip_tiff
+
+    pixels = _pixels(37, 50)
+    output_path = str(tmp_path / 'out.tiff')
+    strips = (pixels[top:top + 16] for top in range(0, 50, 16))
+    size = write_strip_tiff(output_path, 37, 50, strips, rows_per_strip=16, dpi=(240, 240))
+
+    assert size == os.path.getsize(output_path)
+    with Image.open(output_path) as img:
+        assert img.size == (37, 50)
+        assert round(img.info['dpi'][0]) == 240
+        assert np.array_equal(np.asarray(img.convert('RGB')), pixels)
+
+def test_strip_tiff_rejects_mismatched_strips(tmp_path):
+    """Test wrong strip shapes or row totals raise without leaving a file behind"""
+    from src.phase2_processing.tiff_writer import write_strip_tiff
+
+    pixels = _pixels(20, 30)
+    output_path = str(tmp_path / 'out.tiff')
+
+    with pytest.raises(ValueError, match='expected 30'):
+        write_strip_tiff(output_path, 20, 30, [pixels[:10], pixels[10:20]], rows_per_strip=10)
+    with pytest.raises(ValueError, match='expected \\(rows, 20, 3\\)'):
+        write_strip_tiff(output_path, 20, 30, [pixels[:10, :15]], rows_per_strip=10)
+
+    assert os.listdir(tmp_path) == []
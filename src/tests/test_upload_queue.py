@@ -0,0 +1,75 @@
+import json
+
+class FlakyGCS:
+    """Records uploads; fails the first `failures` attempts"""
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.uploaded = []
+
+    def upload_file(self, source, destination, content_type=None, chunk_size=None):
+        if self.failures > 0:
+            self.failures -= 1
+            return False
+        self.uploaded.append((destination, chunk_size))
+        return True
+
+def test_upload_queue_retries_and_chunks(tmp_path):
+    """Test retry after failures and chunked uploads for large files"""
+    from src.utils.upload_queue import UploadQueue
+
+    small = tmp_path / 'small.jpg'
+    small.write_bytes(b'x' * 100)
+    large = tmp_path / 'large.tiff'
+    large.write_bytes(b'x' * (600 * 1024))
+
+    gcs = FlakyGCS(failures=2)
+    queue = UploadQueue(gcs, str(tmp_path / 'journal.jsonl'), max_workers=1,
+                        backoff_factor=0, chunk_size=256 * 1024)
+    assert queue.enqueue(str(small), 'images/small.jpg').result() is True
+    assert queue.enqueue(str(large), 'images/large.tiff', delete_source=True).result() is True
+    queue.close()
+
+    assert gcs.uploaded == [('images/small.jpg', None), ('images/large.tiff', 256 * 1024)]
+    assert not large.exists()
+    stats = queue.get_stats()
+    assert stats['uploaded'] == 2 and stats['retries'] == 2 and stats['pending'] == 0
+
+def test_upload_queue_resumes_journal(tmp_path):
+    """Test that uploads left pending by an interrupted run are resumed"""
+    from src.utils.upload_queue import UploadQueue
+
+    image = tmp_path / 'a.jpg'
+    image.write_bytes(b'x')
+    journal = tmp_path / 'journal.jsonl'
+    records = [
+        {'op': 'add', 'id': '1', 'source': str(image), 'destination': 'images/a.jpg'},
+        {'op': 'add', 'id': '2', 'source': str(image), 'destination': 'images/done.jpg'},
+        {'op': 'done', 'id': '2'}
+    ]
+    journal.write_text(''.join(json.dumps(r) + '\n' for r in records) + '{"op": "add", "id"')
+
+    gcs = FlakyGCS()
+    queue = UploadQueue(gcs, str(journal), max_workers=1, backoff_factor=0)
+    queue.wait()
+    queue.close()
+
+    assert gcs.uploaded == [('images/a.jpg', None)]
+    assert queue.get_stats()['resumed'] == 1
+    assert UploadQueue(gcs, str(journal), resume=False)._compact_journal() == []
+
+def test_upload_queue_keeps_failed_uploads_pending(tmp_path):
+    """Test that uploads that exhaust their retries stay in the journal"""
+    from src.utils.upload_queue import UploadQueue
+
+    image = tmp_path / 'a.jpg'
+    image.write_bytes(b'x')
+    journal = tmp_path / 'journal.jsonl'
+
+    queue = UploadQueue(FlakyGCS(failures=10), str(journal), max_retries=1, backoff_factor=0)
+    assert queue.enqueue(str(image), 'images/a.jpg').result() is False
+    queue.close()
+
+    gcs = FlakyGCS()
+    queue = UploadQueue(gcs, str(journal), backoff_factor=0)
+    queue.close()
+    assert gcs.uploaded == [('images/a.jpg', None)]
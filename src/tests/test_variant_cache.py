@@ -0,0 +1,26 @@
+def test_variant_cache_keys_and_paths(tmp_path):
+    """Test canonical render keys and that overwriting a path forgets its old render"""
+    from src.utils.variant_cache import VariantCache, hash_file
+
+    source = tmp_path / 'source.jpg'
+    source.write_bytes(b'image-a')
+    source_hash = hash_file(str(source))
+
+    cache = VariantCache(str(tmp_path / 'variants.db'))
+    key = cache.make_key(source_hash, {'dpi': 300, 'format': 'TIFF'})
+    assert key == cache.make_key(source_hash, {'format': 'TIFF', 'dpi': 300})
+    assert key != cache.make_key(source_hash, {'dpi': 360, 'format': 'TIFF'})
+
+    cache.put(key, '/out/a_canvas.tiff')
+    cache.put(key, '/out/a_metal.tiff')
+    assert cache.get(key, '/out/a_canvas.tiff')['local_path'] == '/out/a_canvas.tiff'
+    assert cache.get(key, '/out/a_metal.tiff')['local_path'] == '/out/a_metal.tiff'
+
+    # Re-rendering canvas with other parameters overwrites its file
+    other_key = cache.make_key(source_hash, {'dpi': 240, 'format': 'TIFF'})
+    cache.put(other_key, '/out/a_canvas.tiff')
+    assert cache.get(key, '/out/a_canvas.tiff')['local_path'] == '/out/a_metal.tiff'
+
+    cache.delete(key, '/out/a_metal.tiff')
+    assert cache.get(key) is None
+    assert cache.get_stats()['entries'] == 1
@@ -0,0 +1,37 @@
+import time
+
+def test_vision_cache_hits_and_lru(tmp_path):
+    """Test content-addressed lookups, feature-set keys and LRU eviction"""
+    from src.utils.vision_cache import VisionResultCache
+
+    cache = VisionResultCache(str(tmp_path / 'vision.db'), max_entries=2, ttl_seconds=3600)
+    cache.put(b'image-a', 'labels', {'labels': [{'description': 'sea', 'score': 0.9}]})
+
+    assert cache.get(b'image-a', 'labels')['labels'][0]['description'] == 'sea'
+    assert cache.get(b'image-a', 'objects') is None
+    assert cache.get(b'image-b', 'labels') is None
+
+    cache.put(b'image-b', 'labels', {})
+    time.sleep(0.01)
+    cache.get(b'image-a', 'labels')
+    cache.put(b'image-c', 'labels', {})
+
+    # image-b was least recently used
+    assert cache.get(b'image-b', 'labels') is None
+    assert cache.get(b'image-a', 'labels') is not None
+
+    stats = cache.get_stats()
+    assert stats['entries'] == 2
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 3
+
+def test_vision_cache_ttl(tmp_path):
+    """Test that expired results are treated as misses"""
+    from src.utils.vision_cache import VisionResultCache
+
+    cache = VisionResultCache(str(tmp_path / 'vision.db'), ttl_seconds=0.01)
+    cache.put(b'image-a', 'labels', {'labels': []})
+    time.sleep(0.05)
+
+    assert cache.get(b'image-a', 'labels') is None
+    assert cache.get_stats()['expired'] == 1
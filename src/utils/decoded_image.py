@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Decoded Image Carrier
+
+Holds one image's raw bytes together with lazily computed, cached views
+(dimensions, PIL image, grayscale array, EXIF), so the acquisition and
+filtering stages can share a single read and a single decode per image.
+"""
+
+import logging
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ExifTags
+
+from .image_utils import get_partial_image_dimensions
+
+logger = logging.getLogger(__name__)
+
+class DecodedImage:
+    """
+    An image read at most once from disk and decoded at most once.
+
+    Every view is computed on first access and cached:
+    - data: raw encoded bytes
+    - size: (width, height), parsed from the header without decoding pixels
+    - pil: PIL image (decoded on first pixel access)
+    - rgb: RGB PIL image
+    - gray: grayscale uint8 numpy array
+    - draft_gray(max_edge): grayscale array decoded at reduced scale
+    - exif: EXIF tags keyed by name
+    """
+
+    def __init__(self, data: bytes = None, path: str = None):
+        """
+        Initialize the carrier.
+
+        Args:
+            data: Encoded image bytes. If None, they are read from path on first use.
+            path: Path of the image on disk, if any.
+        """
+        if data is None and path is None:
+            raise ValueError("DecodedImage needs image data or a path")
+        self.path = path
+        self._data = data
+        self._size: Optional[Tuple[int, int]] = None
+        self._pil: Optional[Image.Image] = None
+        self._rgb: Optional[Image.Image] = None
+        self._gray: Optional[np.ndarray] = None
+        self._draft_gray: Dict[int, np.ndarray] = {}
+        self._exif: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes, path: str = None) -> 'DecodedImage':
+        """Create a carrier from encoded bytes (e.g. a fresh download)."""
+        return cls(data=data, path=path)
+
+    @classmethod
+    def from_path(cls, path: str) -> 'DecodedImage':
+        """Create a carrier for a file on disk; the file is read on first use."""
+        return cls(path=path)
+
+    @property
+    def data(self) -> bytes:
+        """Raw encoded image bytes."""
+        if self._data is None:
+            with open(self.path, 'rb') as f:
+                self._data = f.read()
+        return self._data
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Image (width, height), read from the header when possible."""
+        if self._size is None:
+            self._size = get_partial_image_dimensions(self.data) or self.pil.size
+        return self._size
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @property
+    def aspect_ratio(self) -> float:
+        width, height = self.size
+        return width / height
+
+    @property
+    def pil(self) -> Image.Image:
+        """PIL image; pixels are decoded lazily by PIL on first access."""
+        if self._pil is None:
+            self._pil = Image.open(BytesIO(self.data))
+        return self._pil
+
+    @property
+    def format(self) -> Optional[str]:
+        return self.pil.format
+
+    @property
+    def mode(self) -> str:
+        return self.pil.mode
+
+    @property
+    def rgb(self) -> Image.Image:
+        """Decoded RGB PIL image."""
+        if self._rgb is None:
+            img = self.pil
+            self._rgb = img if img.mode == 'RGB' else img.convert('RGB')
+        return self._rgb
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale pixels as a uint8 numpy array of shape (height, width)."""
+        if self._gray is None:
+            self._gray = np.asarray(self.rgb.convert('L'))
+        return self._gray
+
+    def draft_gray(self, max_edge: int) -> np.ndarray:
+        """
+        Grayscale pixels decoded at reduced scale.
+        
+        JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale (DCT scaling), so
+        the full-resolution pixels are never materialized. The result's long
+        edge is the smallest available size that is still >= max_edge, or the
+        full size if the image is already smaller; callers downscale further.
+        If the full-resolution grayscale view is already decoded it is reused.
+        
+        Args:
+            max_edge: Target long-edge size in pixels.
+            
+        Returns:
+            Grayscale uint8 numpy array of shape (height, width).
+        """
+        if self._gray is not None:
+            return self._gray
+        if max_edge not in self._draft_gray:
+            width, height = self.size
+            scale = min(1.0, max_edge / max(width, height))
+            img = Image.open(BytesIO(self.data))
+            img.draft('L', (max(1, int(width * scale)), max(1, int(height * scale))))
+            self._draft_gray[max_edge] = np.asarray(img.convert('L'))
+        return self._draft_gray[max_edge]
+    
+    @property
+    def exif(self) -> Dict[str, Any]:
+        """EXIF tags keyed by tag name (empty if the image has none)."""
+        if self._exif is None:
+            self._exif = {}
+            try:
+                raw_exif = self.pil._getexif() if hasattr(self.pil, '_getexif') else None
+                if raw_exif:
+                    self._exif = {
+                        ExifTags.TAGS[k]: v
+                        for k, v in raw_exif.items()
+                        if k in ExifTags.TAGS
+                    }
+            except Exception as e:
+                logger.debug(f"Could not read EXIF data: {e}")
+        return self._exif
+
+    def release(self):
+        """Drop decoded views to free memory, keeping the raw bytes."""
+        self._pil = None
+        self._rgb = None
+        self._gray = None
+        self._draft_gray = {}
+
+def as_decoded_image(image: Union['DecodedImage', str, bytes]) -> DecodedImage:
+    """
+    Wrap a path or raw bytes in a DecodedImage, passing existing carriers through.
+
+    Args:
+        image: A DecodedImage, a file path or encoded image bytes.
+
+    Returns:
+        A DecodedImage for the input.
+    """
+    if isinstance(image, DecodedImage):
+        return image
+    if isinstance(image, (bytes, bytearray)):
+        return DecodedImage.from_bytes(bytes(image))
+    return DecodedImage.from_path(image)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Concurrent Download Engine
+
+Runs image downloads on a bounded thread pool and yields results as they
+complete, so callers can start post-processing (landscape checks, metadata,
+uploads) while the remaining downloads are still in flight.
+"""
+
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when the config module does not override them
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_PER_HOST = 4
+
+# Markers the job producer thread puts on the results queue
+_JOBS_DONE = object()
+_JOBS_FAILED = object()
+
+class DownloadEngine:
+    """
+    Bounded-concurrency executor for per-URL work items.
+
+    Each job is a ``(key, url, payload)`` tuple. The worker function is called
+    as ``worker(url, payload)`` on a pool thread while holding a per-host slot,
+    so no single CDN host ever sees more than ``max_per_host`` requests at once.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_per_host: int = DEFAULT_MAX_PER_HOST):
+        """
+        Initialize the download engine.
+
+        Args:
+            max_workers: Maximum number of downloads in flight overall.
+            max_per_host: Maximum number of downloads in flight per host.
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.max_per_host = max(1, int(max_per_host))
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Get (or create) the semaphore limiting concurrency for a URL's host."""
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def _run_job(self, worker: Callable[[str, Any], Any], url: str, payload: Any) -> Any:
+        """Run a single job while holding its host slot."""
+        with self._host_slot(url):
+            return worker(url, payload)
+
+    def run(self, jobs: Iterable[Tuple[Any, str, Any]],
+            worker: Callable[[str, Any], Any]) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+        """
+        Run jobs concurrently and yield results in completion order.
+
+        Jobs are pulled from ``jobs`` on a separate thread, so it may be a
+        generator that blocks while it produces items (e.g. polling a dataset
+        that is still being written) without holding back finished results.
+        At most ``2 * max_workers`` jobs are submitted but not yet handed back
+        at any time.
+
+        Args:
+            jobs: Iterable of (key, url, payload) tuples.
+            worker: Callable invoked as worker(url, payload).
+
+        Yields:
+            Tuples of (key, result, error). Exactly one of result/error is set;
+            an exception raised by one job never affects the others.
+        """
+        slots = threading.Semaphore(self.max_workers * 2)
+        results = queue.Queue()
+        stop = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='download') as executor:
+
+            def produce():
+                """Submit jobs as the iterable yields them, then report how many there were."""
+                submitted = 0
+                try:
+                    for key, url, payload in jobs:
+                        # Backpressure: wait for the caller to take a result before submitting more
+                        while not slots.acquire(timeout=0.1):
+                            if stop.is_set():
+                                return
+                        if stop.is_set():
+                            return
+                        future = executor.submit(self._run_job, worker, url, payload)
+                        future.add_done_callback(lambda future, key=key: results.put((key, future)))
+                        submitted += 1
+                except Exception as e:
+                    results.put((_JOBS_FAILED, e))
+                finally:
+                    results.put((_JOBS_DONE, submitted))
+
+            producer = threading.Thread(target=produce, name='download-jobs', daemon=True)
+            producer.start()
+
+            try:
+                yielded = 0
+                submitted = None
+                while submitted is None or yielded < submitted:
+                    key, item = results.get()
+                    if key is _JOBS_DONE:
+                        submitted = item
+                        continue
+                    if key is _JOBS_FAILED:
+                        raise item
+                    yielded += 1
+                    slots.release()
+                    error = item.exception()
+                    if error is not None:
+                        yield key, None, error
+                    else:
+                        yield key, item.result(), None
+                producer.join()
+            finally:
+                stop.set()
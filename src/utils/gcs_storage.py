@@ -1,10 +1,19 @@
 import os
+import base64
+import hashlib
 import logging
-from typing import Optional, Dict, Any, List
+import threading
+from typing import Optional, Dict, Any, Iterator, List
 from google.cloud import storage
 from google.oauth2 import service_account
 from .. import config
 
+try:
+    import google_crc32c
+    CRC32C_AVAILABLE = True
+except ImportError:
+    CRC32C_AVAILABLE = False
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -12,6 +21,11 @@ logger = logging.getLogger(__name__)
 class GCSStorage:
     def __init__(self):
         """Initialize GCS client using credentials from config."""
+        # Remote object sizes and hashes by listing prefix, for skip-if-unchanged uploads
+        self._remote_index = {}
+        self._index_lock = threading.Lock()
+        self.upload_stats = {'uploaded': 0, 'skipped': 0, 'bytes_uploaded': 0, 'bytes_saved': 0}
+        
         try:
             # Check if credentials path is set
             if not config.GOOGLE_APPLICATION_CREDENTIALS:
@@ -50,30 +64,159 @@ class GCSStorage:
         """Check if GCS client is available and properly configured."""
         return self.client is not None and self.bucket is not None
         
-    def upload_file(self, source_file_path: str, destination_blob_name: str) -> bool:
+    def upload_file(self, source_file_path: str, destination_blob_name: str,
+                    content_type: str = None, chunk_size: int = None,
+                    skip_unchanged: bool = None) -> bool:
         """
         Upload a file to GCS bucket.
         
         Args:
             source_file_path: Path to the local file to upload.
             destination_blob_name: Name to give the file in GCS.
+            content_type: MIME type of the file (guessed from the name if None).
+            chunk_size: If set, upload as a resumable upload in chunks of this
+                        many bytes (multiple of 256 KB), so a failure only
+                        resends the current chunk.
+            skip_unchanged: Whether to skip the upload when the blob already
+                            holds identical content (see file_unchanged).
+                            Defaults to config value.
             
         Returns:
-            True if upload was successful, False otherwise.
+            True if upload was successful (or skipped as unchanged), False otherwise.
         """
         if not self.is_available():
             logger.error("GCS client not available. Cannot upload file.")
             return False
+        
+        if skip_unchanged is None:
+            skip_unchanged = getattr(config, 'GCS_SKIP_UNCHANGED', True)
             
         try:
-            blob = self.bucket.blob(destination_blob_name)
-            blob.upload_from_filename(source_file_path)
+            size = os.path.getsize(source_file_path)
+            if skip_unchanged and self.file_unchanged(source_file_path, destination_blob_name):
+                with self._index_lock:
+                    self.upload_stats['skipped'] += 1
+                    self.upload_stats['bytes_saved'] += size
+                logger.info(f"File {destination_blob_name} unchanged; skipped upload.")
+                return True
+            
+            blob = self.bucket.blob(destination_blob_name, chunk_size=chunk_size)
+            blob.upload_from_filename(source_file_path, content_type=content_type)
             logger.info(f"File {source_file_path} uploaded to {destination_blob_name}.")
+            
+            with self._index_lock:
+                self.upload_stats['uploaded'] += 1
+                self.upload_stats['bytes_uploaded'] += size
+                # Keep loaded listings current, so re-uploading the same file is skipped
+                index = self._covering_index(destination_blob_name)
+                if index is not None:
+                    index[destination_blob_name] = {
+                        'size': size,
+                        'md5_hash': blob.md5_hash or _file_hashes(source_file_path)['md5_hash'],
+                        'crc32c': blob.crc32c
+                    }
             return True
         except Exception as e:
             logger.error(f"Error uploading file to GCS: {e}")
             return False
             
+    def load_remote_index(self, prefix: str) -> Dict[str, Dict[str, Any]]:
+        """
+        List a prefix once and remember each object's size and hashes.
+        
+        Later skip-if-unchanged checks for blobs under the prefix use this
+        listing instead of a request per object. Listing a narrow prefix (e.g.
+        one image's variants) keeps the listing small. At most
+        GCS_REMOTE_INDEX_MAX_PREFIXES listings are kept, oldest dropped first.
+        
+        Args:
+            prefix: Prefix to list.
+            
+        Returns:
+            Dictionary of blob name to {'size', 'md5_hash', 'crc32c'}.
+        """
+        index = {}
+        if not self.is_available():
+            return index
+            
+        for item in self.iter_files(prefix):
+            index[item['name']] = {'size': item['size'], 'md5_hash': item['md5_hash'], 'crc32c': item['crc32c']}
+            
+        max_prefixes = getattr(config, 'GCS_REMOTE_INDEX_MAX_PREFIXES', 64)
+        with self._index_lock:
+            # Re-inserted last, so the oldest listings are the ones dropped
+            self._remote_index.pop(prefix, None)
+            self._remote_index[prefix] = index
+            while len(self._remote_index) > max(max_prefixes, 1):
+                self._remote_index.pop(next(iter(self._remote_index)))
+        logger.info(f"Loaded hashes of {len(index)} GCS objects under {prefix}")
+        return index
+        
+    def drop_remote_index(self, prefix: str):
+        """
+        Forget a listing loaded by load_remote_index, once its uploads are done.
+        
+        Args:
+            prefix: Prefix the listing was loaded for.
+        """
+        with self._index_lock:
+            self._remote_index.pop(prefix, None)
+            
+    def _covering_index(self, blob_name: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """The most specific loaded listing that covers blob_name (call with _index_lock held)."""
+        prefixes = [prefix for prefix in self._remote_index if blob_name.startswith(prefix)]
+        if not prefixes:
+            return None
+        return self._remote_index[max(prefixes, key=len)]
+        
+    def file_unchanged(self, source_file_path: str, destination_blob_name: str) -> bool:
+        """
+        Check whether a blob already holds exactly the content of a local file.
+        
+        Sizes are compared first; only same-size files are hashed, and
+        compared by MD5 (or CRC32C for composite objects, which have no MD5).
+        If no loaded listing covers the blob, only that object's metadata is
+        fetched (see load_remote_index).
+        
+        Args:
+            source_file_path: Path to the local file.
+            destination_blob_name: Name of the file in GCS.
+            
+        Returns:
+            True if the blob exists with identical content.
+        """
+        with self._index_lock:
+            index = self._covering_index(destination_blob_name)
+            remote = index.get(destination_blob_name) if index is not None else None
+        if index is None:
+            try:
+                blob = self.bucket.get_blob(destination_blob_name)
+            except Exception as e:
+                logger.warning(f"Could not fetch metadata of {destination_blob_name}: {e}")
+                return False
+            if blob is not None:
+                remote = {'size': blob.size, 'md5_hash': blob.md5_hash, 'crc32c': blob.crc32c}
+            
+        if remote is None or remote['size'] != os.path.getsize(source_file_path):
+            return False
+            
+        local = _file_hashes(source_file_path, crc32c=not remote.get('md5_hash'))
+        if remote.get('md5_hash'):
+            return remote['md5_hash'] == local['md5_hash']
+        if remote.get('crc32c') and local.get('crc32c'):
+            return remote['crc32c'] == local['crc32c']
+        return False
+        
+    def get_upload_stats(self) -> Dict[str, int]:
+        """
+        Get counts of uploaded and skipped (unchanged) files and their bytes.
+        
+        Returns:
+            Dictionary with uploaded, skipped, bytes_uploaded and bytes_saved.
+        """
+        with self._index_lock:
+            return dict(self.upload_stats)
+            
     def upload_from_string(self, data: str, destination_blob_name: str, content_type: str = 'text/plain') -> bool:
         """
         Upload data from a string to GCS bucket.
@@ -99,6 +242,37 @@ class GCSStorage:
             logger.error(f"Error uploading data to GCS: {e}")
             return False
             
+    def open_writer(self, destination_blob_name: str, content_type: str = None,
+                    chunk_size: int = None):
+        """
+        Open a streaming writer for a blob in the GCS bucket.
+        
+        Data written to the returned file-like object is uploaded in chunks
+        (resumable upload), so large files never have to be held in memory.
+        The upload completes when the writer is closed.
+        
+        Args:
+            destination_blob_name: Name to give the file in GCS.
+            content_type: MIME type of the data.
+            chunk_size: Upload chunk size in bytes (multiple of 256 KB).
+            
+        Returns:
+            A writable binary file-like object, or None if GCS is unavailable.
+        """
+        if not self.is_available():
+            logger.error("GCS client not available. Cannot open writer.")
+            return None
+            
+        try:
+            blob = self.bucket.blob(destination_blob_name)
+            kwargs = {'content_type': content_type}
+            if chunk_size:
+                kwargs['chunk_size'] = chunk_size
+            return blob.open('wb', **kwargs)
+        except Exception as e:
+            logger.error(f"Error opening GCS writer for {destination_blob_name}: {e}")
+            return None
+            
     def download_file(self, source_blob_name: str, destination_file_path: str) -> bool:
         """
         Download a file from GCS bucket.
@@ -126,26 +300,72 @@ class GCSStorage:
             logger.error(f"Error downloading file from GCS: {e}")
             return False
             
-    def list_files(self, prefix: str = '') -> List[str]:
+    def iter_files(self, prefix: str = '', delimiter: str = None,
+                   page_size: int = 1000) -> Iterator[Dict[str, Any]]:
         """
-        List files in the GCS bucket with the given prefix.
+        Lazily list files in the GCS bucket, one page of results at a time.
+        
+        Only one page of listing results is held in memory, and each page
+        request asks for just the fields returned here, so callers can make
+        sync decisions without a request per blob.
         
         Args:
             prefix: Prefix to filter files by.
+            delimiter: If set (usually '/'), list one "directory" level: files
+                       directly under prefix, plus one entry per sub-prefix.
+            page_size: Results per listing request.
             
-        Returns:
-            A list of file names in the bucket matching the prefix.
+        Yields:
+            Dictionaries with 'name', 'size', 'md5_hash', 'crc32c', 'updated'
+            and 'is_dir' (True for sub-prefix entries, whose other fields are None).
         """
         if not self.is_available():
             logger.error("GCS client not available. Cannot list files.")
-            return []
+            return
             
         try:
-            blobs = self.client.list_blobs(self.bucket, prefix=prefix)
-            return [blob.name for blob in blobs]
+            iterator = self.client.list_blobs(
+                self.bucket, prefix=prefix, delimiter=delimiter, page_size=page_size,
+                fields='items(name,size,md5Hash,crc32c,updated),prefixes,nextPageToken'
+            )
+            # A sub-prefix can be reported on more than one page
+            seen_prefixes = set()
+            for page in iterator.pages:
+                for blob in page:
+                    yield {
+                        'name': blob.name,
+                        'size': blob.size,
+                        'md5_hash': blob.md5_hash,
+                        'crc32c': blob.crc32c,
+                        'updated': blob.updated,
+                        'is_dir': False
+                    }
+                for sub_prefix in sorted(set(page.prefixes) - seen_prefixes):
+                    seen_prefixes.add(sub_prefix)
+                    yield {
+                        'name': sub_prefix,
+                        'size': None,
+                        'md5_hash': None,
+                        'crc32c': None,
+                        'updated': None,
+                        'is_dir': True
+                    }
         except Exception as e:
             logger.error(f"Error listing files in GCS: {e}")
-            return []
+            
+    def list_files(self, prefix: str = '') -> List[str]:
+        """
+        List files in the GCS bucket with the given prefix.
+        
+        Prefer iter_files for large prefixes; this collects every name.
+        
+        Args:
+            prefix: Prefix to filter files by.
+            
+        Returns:
+            A list of file names in the bucket matching the prefix.
+        """
+        return [item['name'] for item in self.iter_files(prefix)]
             
     def file_exists(self, blob_name: str) -> bool:
         """
@@ -190,3 +410,27 @@ class GCSStorage:
         except Exception as e:
             logger.error(f"Error deleting file from GCS: {e}")
             return False
+
+def _file_hashes(path: str, crc32c: bool = False, chunk_size: int = 1024 * 1024) -> Dict[str, Optional[str]]:
+    """
+    Hash a local file the way GCS reports object hashes (base64-encoded digests).
+    
+    Args:
+        path: Path of the file.
+        crc32c: Whether to compute CRC32C as well (needs google-crc32c).
+        chunk_size: Bytes read at a time.
+        
+    Returns:
+        Dictionary with 'md5_hash' and 'crc32c' (None if not computed).
+    """
+    md5 = hashlib.md5()
+    crc = google_crc32c.Checksum() if crc32c and CRC32C_AVAILABLE else None
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+            if crc is not None:
+                crc.update(chunk)
+    return {
+        'md5_hash': base64.b64encode(md5.digest()).decode(),
+        'crc32c': base64.b64encode(crc.digest()).decode() if crc is not None else None
+    }
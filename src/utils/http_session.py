@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Session
+
+Provides a single process-wide requests session with connection pooling,
+HTTP keep-alive and a jittered retry policy, so repeated image downloads from
+the same CDN reuse TCP/TLS connections instead of reconnecting every time.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+# Transient statuses worth retrying
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def _build_retry(total: int, backoff_factor: float, backoff_jitter: float) -> Retry:
+    """Build the retry policy, tolerating urllib3 versions without jitter support."""
+    retry_kwargs = dict(
+        total=total,
+        connect=total,
+        read=total,
+        status=total,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    try:
+        return Retry(backoff_jitter=backoff_jitter, **retry_kwargs)
+    except TypeError:
+        # urllib3 < 2.0 has no backoff_jitter
+        return Retry(**retry_kwargs)
+
+def create_session(pool_size: int = None,
+                   max_per_host: int = None,
+                   max_retries: int = None,
+                   backoff_factor: float = None,
+                   backoff_jitter: float = None) -> requests.Session:
+    """
+    Create a pooled requests session.
+
+    Args:
+        pool_size: Number of per-host connection pools to keep. Defaults to the
+                   download concurrency from config.
+        max_per_host: Maximum open connections per host. Requests beyond this
+                      wait for a free connection rather than opening new ones.
+        max_retries: Retries for connection errors, timeouts and 429/5xx.
+        backoff_factor: Exponential backoff base in seconds.
+        backoff_jitter: Maximum random jitter in seconds added to each backoff.
+
+    Returns:
+        A configured requests.Session.
+    """
+    if pool_size is None:
+        pool_size = getattr(config, 'DOWNLOAD_MAX_WORKERS', 8)
+    if max_per_host is None:
+        max_per_host = getattr(config, 'DOWNLOAD_MAX_PER_HOST', 4)
+    if max_retries is None:
+        max_retries = getattr(config, 'HTTP_MAX_RETRIES', 3)
+    if backoff_factor is None:
+        backoff_factor = getattr(config, 'HTTP_BACKOFF_FACTOR', 0.5)
+    if backoff_jitter is None:
+        backoff_jitter = getattr(config, 'HTTP_BACKOFF_JITTER', 0.5)
+
+    adapter = HTTPAdapter(
+        pool_connections=max(1, pool_size),
+        pool_maxsize=max(1, max_per_host),
+        pool_block=True,
+        max_retries=_build_retry(max_retries, backoff_factor, backoff_jitter)
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+
+    logger.info(f"HTTP session created: pool_size={pool_size}, max_per_host={max_per_host}, retries={max_retries}")
+    return session
+
+def get_session() -> requests.Session:
+    """
+    Get the shared process-wide HTTP session, creating it on first use.
+
+    Returns:
+        The shared requests.Session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def reset_session():
+    """Close and discard the shared session (e.g. after changing config)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
@@ -8,6 +8,8 @@ Maintains a database of processed Instagram posts and their status.
 
 import os
 import json
+import sqlite3
+import threading
 import logging
 from typing import Dict, List, Set, Optional
 from datetime import datetime
@@ -15,9 +17,27 @@ import hashlib
 
 logger = logging.getLogger(__name__)
 
+# Columns stored for each tracked image, in table order
+TRACKING_COLUMNS = (
+    'image_id', 'shortcode', 'post_id', 'owner_username', 'timestamp',
+    'url', 'status', 'processed_at', 'local_path', 'analysis'
+)
+
+INSERT_SQL = (
+    f"INTO processed_images ({', '.join(TRACKING_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in TRACKING_COLUMNS)})"
+)
+
+# SQLite caps the number of bound parameters per statement
+SQL_BATCH_SIZE = 500
+
 class ImageTracker:
     """
     Tracks processed Instagram images to avoid duplicates and enable batch processing.
+    
+    Entries live in a SQLite database (WAL mode) with indexed status and
+    processed_at columns, so marking an image costs a single row write and
+    counts/stats are index queries rather than scans of the whole history.
     """
     
     def __init__(self, base_dir: str = 'data'):
@@ -30,36 +50,126 @@ class ImageTracker:
         self.base_dir = base_dir
         self.tracking_dir = os.path.join(base_dir, 'tracking')
         self.tracking_file = os.path.join(self.tracking_dir, 'processed_images.json')
+        self.db_path = os.path.join(self.tracking_dir, 'processed_images.db')
         
         # Ensure tracking directory exists
         os.makedirs(self.tracking_dir, exist_ok=True)
         
-        # Load existing tracking data
-        self.processed_images = self._load_tracking_data()
+        # Open the database; shared across threads, serialized by our own lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._init_db()
+        
+        # One-shot import of the legacy JSON tracking file
+        self._migrate_json_tracking_data()
         
-        logger.info(f"Image tracker initialized. Tracking {len(self.processed_images)} processed images.")
+        logger.info(f"Image tracker initialized. Tracking {self.get_processed_count()} processed images.")
     
-    def _load_tracking_data(self) -> Dict[str, Dict]:
-        """Load existing tracking data from file."""
-        if os.path.exists(self.tracking_file):
-            try:
-                with open(self.tracking_file, 'r') as f:
-                    data = json.load(f)
-                logger.info(f"Loaded tracking data for {len(data)} images")
-                return data
-            except Exception as e:
-                logger.error(f"Error loading tracking data: {e}")
-                return {}
-        return {}
+    def _init_db(self):
+        """Create the tracking schema if needed."""
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS processed_images (
+                    image_id TEXT PRIMARY KEY,
+                    shortcode TEXT,
+                    post_id TEXT,
+                    owner_username TEXT,
+                    timestamp TEXT,
+                    url TEXT,
+                    status TEXT NOT NULL,
+                    processed_at TEXT NOT NULL,
+                    local_path TEXT,
+                    analysis TEXT
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_processed_images_status ON processed_images (status)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_processed_images_processed_at ON processed_images (processed_at)')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS profile_watermarks (
+                    profile TEXT PRIMARY KEY,
+                    newest_timestamp TEXT,
+                    newest_shortcode TEXT,
+                    oldest_timestamp TEXT,
+                    oldest_shortcode TEXT,
+                    backfill_offset INTEGER NOT NULL DEFAULT 0,
+                    backfill_complete INTEGER NOT NULL DEFAULT 0,
+                    gap_depth INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(profile_watermarks)')}
+            if 'gap_depth' not in columns:
+                self._conn.execute('ALTER TABLE profile_watermarks ADD COLUMN gap_depth INTEGER NOT NULL DEFAULT 0')
     
-    def _save_tracking_data(self):
-        """Save tracking data to file."""
+    def _migrate_json_tracking_data(self):
+        """Import entries from the legacy processed_images.json file, then retire it."""
+        if not os.path.exists(self.tracking_file):
+            return
+            
         try:
-            with open(self.tracking_file, 'w') as f:
-                json.dump(self.processed_images, f, indent=2)
-            logger.debug(f"Saved tracking data for {len(self.processed_images)} images")
+            with open(self.tracking_file, 'r') as f:
+                data = json.load(f)
         except Exception as e:
-            logger.error(f"Error saving tracking data: {e}")
+            logger.error(f"Error loading tracking data for migration: {e}")
+            return
+            
+        rows = []
+        for image_id, entry in data.items():
+            entry = dict(entry)
+            entry.setdefault('image_id', image_id)
+            entry.setdefault('status', 'error')
+            entry.setdefault('processed_at', '')
+            rows.append(self._entry_to_row(entry))
+            
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                # Existing rows win, so re-running the migration never clobbers newer data
+                self._conn.executemany(f"INSERT OR IGNORE {INSERT_SQL}", rows)
+                self._conn.execute('COMMIT')
+            except Exception as e:
+                self._conn.execute('ROLLBACK')
+                logger.error(f"Error migrating tracking data: {e}")
+                return
+                
+        migrated_path = f"{self.tracking_file}.migrated"
+        os.replace(self.tracking_file, migrated_path)
+        logger.info(f"Migrated {len(rows)} tracking entries from {self.tracking_file} (kept as {migrated_path})")
+    
+    @staticmethod
+    def _entry_to_row(entry: Dict) -> tuple:
+        """Convert a tracking entry dict into a row tuple."""
+        analysis = entry.get('analysis')
+        return (
+            entry.get('image_id'),
+            entry.get('shortcode'),
+            None if entry.get('post_id') is None else str(entry.get('post_id')),
+            entry.get('owner_username'),
+            entry.get('timestamp'),
+            entry.get('url'),
+            entry.get('status'),
+            entry.get('processed_at'),
+            entry.get('local_path'),
+            json.dumps(analysis, default=str) if analysis is not None else None
+        )
+    
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> Dict:
+        """Convert a database row into a tracking entry dict."""
+        entry = {column: row[column] for column in TRACKING_COLUMNS if column != 'analysis'}
+        if row['analysis']:
+            entry['analysis'] = json.loads(row['analysis'])
+        return entry
+    
+    @property
+    def processed_images(self) -> Dict[str, Dict]:
+        """All tracking entries keyed by image ID. Loads the full history; prefer the query methods."""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM processed_images').fetchall()
+        return {row['image_id']: self._row_to_entry(row) for row in rows}
     
     def _generate_image_id(self, post_data: Dict) -> str:
         """
@@ -89,6 +199,18 @@ class ImageTracker:
         # Should not happen, but just in case
         return f"unknown_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     
+    def get_image_id(self, post_data: Dict) -> str:
+        """
+        Get the tracking ID of an Instagram post.
+        
+        Args:
+            post_data: Instagram post data from Apify
+            
+        Returns:
+            The ID the post is (or would be) tracked under
+        """
+        return self._generate_image_id(post_data)
+    
     def is_processed(self, post_data: Dict) -> bool:
         """
         Check if an Instagram post has already been processed.
@@ -100,7 +222,11 @@ class ImageTracker:
             True if the post has been processed, False otherwise
         """
         image_id = self._generate_image_id(post_data)
-        return image_id in self.processed_images
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM processed_images WHERE image_id = ?', (image_id,)
+            ).fetchone()
+        return row is not None
     
     def mark_processed(self, post_data: Dict, status: str, analysis_results: Dict = None, local_path: str = None):
         """
@@ -135,8 +261,8 @@ class ImageTracker:
                 'category_matches': analysis_results.get('category_matches', {})
             }
         
-        self.processed_images[image_id] = tracking_entry
-        self._save_tracking_data()
+        with self._lock:
+            self._conn.execute(f"INSERT OR REPLACE {INSERT_SQL}", self._entry_to_row(tracking_entry))
         
         logger.debug(f"Marked image {image_id} as {status}")
     
@@ -150,10 +276,14 @@ class ImageTracker:
         Returns:
             Count of processed images
         """
-        if status is None:
-            return len(self.processed_images)
-        
-        return sum(1 for entry in self.processed_images.values() if entry.get('status') == status)
+        with self._lock:
+            if status is None:
+                row = self._conn.execute('SELECT COUNT(*) FROM processed_images').fetchone()
+            else:
+                row = self._conn.execute(
+                    'SELECT COUNT(*) FROM processed_images WHERE status = ?', (status,)
+                ).fetchone()
+        return row[0]
     
     def get_accepted_images(self) -> List[Dict]:
         """
@@ -162,7 +292,11 @@ class ImageTracker:
         Returns:
             List of tracking entries for accepted images
         """
-        return [entry for entry in self.processed_images.values() if entry.get('status') == 'accepted']
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM processed_images WHERE status = 'accepted' ORDER BY processed_at"
+            ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
     
     def get_unprocessed_posts(self, posts: List[Dict]) -> List[Dict]:
         """
@@ -174,17 +308,108 @@ class ImageTracker:
         Returns:
             List of unprocessed posts
         """
+        image_ids = [self._generate_image_id(post) for post in posts]
+        
+        # Look up the whole list in a few batched primary-key queries
+        processed_ids = set()
+        with self._lock:
+            for i in range(0, len(image_ids), SQL_BATCH_SIZE):
+                batch = image_ids[i:i + SQL_BATCH_SIZE]
+                rows = self._conn.execute(
+                    f"SELECT image_id FROM processed_images WHERE image_id IN ({', '.join('?' for _ in batch)})",
+                    batch
+                ).fetchall()
+                processed_ids.update(row['image_id'] for row in rows)
+        
         unprocessed = []
-        for post in posts:
-            if not self.is_processed(post):
+        for post, image_id in zip(posts, image_ids):
+            if image_id not in processed_ids:
                 unprocessed.append(post)
             else:
-                image_id = self._generate_image_id(post)
                 logger.debug(f"Skipping already processed image: {image_id}")
         
         logger.info(f"Filtered {len(posts)} posts to {len(unprocessed)} unprocessed posts")
         return unprocessed
     
+    def get_profile_watermark(self, profile: str) -> Optional[Dict]:
+        """
+        Get the scraping high-water mark of a profile.
+        
+        Args:
+            profile: Instagram username (case-insensitive)
+            
+        Returns:
+            Dictionary with newest/oldest post timestamp and shortcode seen,
+            backfill_offset, backfill_complete and gap_depth, or None if never scraped
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM profile_watermarks WHERE profile = ?', (profile.lower(),)
+            ).fetchone()
+        if row is None:
+            return None
+        watermark = dict(row)
+        watermark['backfill_complete'] = bool(watermark['backfill_complete'])
+        return watermark
+    
+    def update_profile_watermark(self, profile: str, posts: List[Dict],
+                                 backfill_offset: int = None, backfill_complete: bool = None,
+                                 gap_depth: int = None):
+        """
+        Advance a profile's watermark over a batch of scraped posts.
+        
+        The newest mark only moves forward and the oldest only moves back, so
+        batches may be recorded in any order. While a gap is open (posts
+        between the newest mark and the posts fetched above it are not all
+        fetched yet) the newest mark stays put, so the gap is fetched next.
+        
+        Args:
+            profile: Instagram username (case-insensitive)
+            posts: Posts scraped from the profile
+            backfill_offset: Number of the profile's newest posts walked by backfill so far
+            backfill_complete: Whether backfill has reached the profile's oldest post
+            gap_depth: Number of posts newer than the newest mark fetched so far
+                       while a page of them came back full (0 closes the gap)
+        """
+        # Apify timestamps share one ISO format, so they compare chronologically as strings
+        dated = [post for post in posts if post.get('timestamp')]
+        newest = max(dated, key=lambda post: post['timestamp'], default=None)
+        oldest = min(dated, key=lambda post: post['timestamp'], default=None)
+        
+        with self._lock:
+            current = self.get_profile_watermark(profile) or {}
+            entry = {
+                'newest_timestamp': current.get('newest_timestamp'),
+                'newest_shortcode': current.get('newest_shortcode'),
+                'oldest_timestamp': current.get('oldest_timestamp'),
+                'oldest_shortcode': current.get('oldest_shortcode'),
+                'backfill_offset': current.get('backfill_offset', 0),
+                'backfill_complete': current.get('backfill_complete', False),
+                'gap_depth': current.get('gap_depth', 0)
+            }
+            if gap_depth is not None:
+                entry['gap_depth'] = gap_depth
+            if (newest and not entry['gap_depth']
+                    and (not entry['newest_timestamp'] or newest['timestamp'] > entry['newest_timestamp'])):
+                entry['newest_timestamp'] = newest['timestamp']
+                entry['newest_shortcode'] = newest.get('shortCode')
+            if oldest and (not entry['oldest_timestamp'] or oldest['timestamp'] < entry['oldest_timestamp']):
+                entry['oldest_timestamp'] = oldest['timestamp']
+                entry['oldest_shortcode'] = oldest.get('shortCode')
+            if backfill_offset is not None:
+                entry['backfill_offset'] = max(entry['backfill_offset'], backfill_offset)
+            if backfill_complete is not None:
+                entry['backfill_complete'] = backfill_complete
+            
+            self._conn.execute(
+                'INSERT OR REPLACE INTO profile_watermarks (profile, newest_timestamp, newest_shortcode, '
+                'oldest_timestamp, oldest_shortcode, backfill_offset, backfill_complete, gap_depth, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (profile.lower(), entry['newest_timestamp'], entry['newest_shortcode'],
+                 entry['oldest_timestamp'], entry['oldest_shortcode'], entry['backfill_offset'],
+                 int(entry['backfill_complete']), entry['gap_depth'], datetime.now().isoformat())
+            )
+    
     def cleanup_old_entries(self, days: int = 30):
         """
         Remove tracking entries older than specified days.
@@ -196,22 +421,17 @@ class ImageTracker:
         
         cutoff_date = datetime.now() - timedelta(days=days)
         
-        old_entries = []
-        for image_id, entry in self.processed_images.items():
-            try:
-                processed_at = datetime.fromisoformat(entry.get('processed_at', ''))
-                if processed_at < cutoff_date:
-                    old_entries.append(image_id)
-            except ValueError:
-                # Invalid date format, consider it old
-                old_entries.append(image_id)
-        
-        for image_id in old_entries:
-            del self.processed_images[image_id]
-        
-        if old_entries:
-            self._save_tracking_data()
-            logger.info(f"Cleaned up {len(old_entries)} old tracking entries")
+        # ISO timestamps sort chronologically; anything not shaped like one is considered old
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM processed_images WHERE processed_at < ? "
+                "OR processed_at NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'",
+                (cutoff_date.isoformat(),)
+            )
+            removed = cursor.rowcount
+        
+        if removed:
+            logger.info(f"Cleaned up {removed} old tracking entries")
     
     def get_stats(self) -> Dict:
         """
@@ -220,10 +440,16 @@ class ImageTracker:
         Returns:
             Dictionary with processing statistics
         """
-        total = len(self.processed_images)
-        accepted = self.get_processed_count('accepted')
-        rejected = self.get_processed_count('rejected')
-        errors = self.get_processed_count('error')
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT status, COUNT(*) AS count FROM processed_images GROUP BY status'
+            ).fetchall()
+        counts = {row['status']: row['count'] for row in rows}
+        
+        total = sum(counts.values())
+        accepted = counts.get('accepted', 0)
+        rejected = counts.get('rejected', 0)
+        errors = counts.get('error', 0)
         
         return {
             'total_processed': total,
@@ -235,9 +461,15 @@ class ImageTracker:
     
     def reset_tracking(self):
         """Reset all tracking data. Use with caution!"""
-        self.processed_images = {}
-        self._save_tracking_data()
+        with self._lock:
+            self._conn.execute('DELETE FROM processed_images')
+            self._conn.execute('DELETE FROM profile_watermarks')
         logger.warning("All tracking data has been reset")
+    
+    def close(self):
+        """Close the tracking database."""
+        with self._lock:
+            self._conn.close()
 
 def test_image_tracker():
     """Test the image tracker functionality."""
@@ -1,9 +1,11 @@
 import os
-import requests
-from PIL import Image, ExifTags
+import struct
+from PIL import Image, ImageFile, ImageOps
 from io import BytesIO
 import logging
-from typing import Tuple, Dict, Optional, List, Any
+from typing import Tuple, Dict, Optional, List, Any, Union
+
+from .http_session import get_session
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -13,6 +15,9 @@ def download_image(url: str, save_path: Optional[str] = None) -> Optional[bytes]
     """
     Download an image from a URL.
     
+    Uses the shared pooled session, so connections to the CDN are kept alive
+    between downloads and transient 429/5xx errors and timeouts are retried.
+    
     Args:
         url: The URL of the image to download.
         save_path: Optional path to save the image to. If None, image is not saved to disk.
@@ -22,7 +27,7 @@ def download_image(url: str, save_path: Optional[str] = None) -> Optional[bytes]
     """
     try:
         logger.info(f"Downloading image from {url}")
-        response = requests.get(url, timeout=10)
+        response = get_session().get(url, timeout=10)
         response.raise_for_status()
         
         # Get the image data
@@ -40,29 +45,213 @@ def download_image(url: str, save_path: Optional[str] = None) -> Optional[bytes]
         logger.error(f"Error downloading image from {url}: {e}")
         return None
 
-def get_image_dimensions(image_data: bytes) -> Optional[Tuple[int, int]]:
+# JPEG start-of-frame markers that carry the frame dimensions
+# (excludes DHT 0xC4, JPG 0xC8 and DAC 0xCC, which share the range)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def parse_jpeg_dimensions(image_data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read width and height from a JPEG's SOF marker without decoding the image.
+    
+    Works on a truncated prefix of the file, as long as the prefix reaches the
+    SOF segment (usually within the first few KB, after any EXIF block).
+    
+    Args:
+        image_data: The first bytes of a JPEG file.
+        
+    Returns:
+        A tuple of (width, height) if an SOF marker was found, None otherwise.
+    """
+    if len(image_data) < 4 or image_data[0:2] != b'\xff\xd8':
+        return None
+        
+    offset = 2
+    length = len(image_data)
+    while offset < length:
+        # Every segment starts with 0xFF, possibly padded with extra 0xFF fill bytes
+        if image_data[offset] != 0xFF:
+            return None
+        while offset < length and image_data[offset] == 0xFF:
+            offset += 1
+        if offset >= length:
+            return None
+        marker = image_data[offset]
+        offset += 1
+        
+        # Standalone markers carry no length field
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue
+            
+        if offset + 2 > length:
+            return None
+        segment_length = struct.unpack('>H', image_data[offset:offset + 2])[0]
+        
+        if marker in JPEG_SOF_MARKERS:
+            # Segment layout: length(2) precision(1) height(2) width(2)
+            if offset + 7 > length:
+                return None
+            height, width = struct.unpack('>HH', image_data[offset + 3:offset + 7])
+            if width and height:
+                return width, height
+            return None
+            
+        # Start of scan means we've passed the headers without finding a frame
+        if marker == 0xDA:
+            return None
+            
+        offset += segment_length
+        
+    return None
+
+def get_partial_image_dimensions(image_data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Get image dimensions from a (possibly truncated) image header.
+    
+    JPEGs are parsed directly; other formats fall back to PIL's incremental
+    parser, which reports the size as soon as the header has been fed.
+    
+    Args:
+        image_data: The first bytes of an image file.
+        
+    Returns:
+        A tuple of (width, height) if the header was complete enough, None otherwise.
+    """
+    dimensions = parse_jpeg_dimensions(image_data)
+    if dimensions:
+        return dimensions
+    if image_data[0:2] == b'\xff\xd8':
+        # JPEG whose SOF isn't in this prefix yet
+        return None
+        
+    try:
+        parser = ImageFile.Parser()
+        parser.feed(image_data)
+        if parser.image:
+            return parser.image.size
+    except Exception:
+        pass
+    return None
+
+def get_post_dimensions(post: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """
+    Get image dimensions reported by Apify for an Instagram post.
+    
+    Args:
+        post: The Instagram post data from Apify.
+        
+    Returns:
+        A tuple of (width, height) if the post has dimensionsWidth/Height, None otherwise.
+    """
+    try:
+        width = int(post.get('dimensionsWidth') or 0)
+        height = int(post.get('dimensionsHeight') or 0)
+    except (TypeError, ValueError):
+        return None
+    if width > 0 and height > 0:
+        return width, height
+    return None
+
+def probe_image_dimensions(url: str, max_bytes: int = 65536, chunk_size: int = 4096) -> Optional[Tuple[int, int]]:
+    """
+    Read an image's dimensions by fetching only the start of the file.
+    
+    Sends an HTTP Range request and streams the response, stopping as soon as
+    the dimensions can be parsed (or after max_bytes if the server ignores the
+    range), so rejected images never pay for the full transfer.
+    
+    Args:
+        url: The URL of the image.
+        max_bytes: Maximum number of bytes to read before giving up.
+        chunk_size: Size of each streamed read.
+        
+    Returns:
+        A tuple of (width, height) if found, None otherwise.
+    """
+    try:
+        headers = {'Range': f"bytes=0-{max_bytes - 1}"}
+        with get_session().get(url, headers=headers, stream=True, timeout=10) as response:
+            response.raise_for_status()
+            
+            header_data = b''
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                header_data += chunk
+                dimensions = get_partial_image_dimensions(header_data)
+                if dimensions:
+                    logger.debug(f"Probed {url}: {dimensions[0]}x{dimensions[1]} from {len(header_data)} bytes")
+                    return dimensions
+                if len(header_data) >= max_bytes:
+                    break
+                    
+        logger.debug(f"Could not probe dimensions for {url} from {len(header_data)} bytes")
+        return None
+    except Exception as e:
+        logger.warning(f"Error probing image dimensions for {url}: {e}")
+        return None
+
+def resolve_image_dimensions(url: str, post: Dict[str, Any] = None, probe: bool = True) -> Optional[Tuple[int, int]]:
+    """
+    Determine image dimensions as cheaply as possible, before a full download.
+    
+    Uses Apify's dimensionsWidth/Height when present, otherwise probes the
+    image header over HTTP.
+    
+    Args:
+        url: The URL of the image.
+        post: Optional Instagram post data from Apify.
+        probe: Whether to fall back to an HTTP header probe.
+        
+    Returns:
+        A tuple of (width, height) if known, None otherwise.
+    """
+    if post:
+        dimensions = get_post_dimensions(post)
+        if dimensions:
+            return dimensions
+    if probe and url:
+        return probe_image_dimensions(url)
+    return None
+
+def is_landscape_dimensions(dimensions: Tuple[int, int], min_ratio: float = 1.2) -> bool:
+    """
+    Check if image dimensions are in landscape orientation.
+    
+    Args:
+        dimensions: Tuple of (width, height).
+        min_ratio: The minimum width-to-height ratio to consider as landscape.
+        
+    Returns:
+        True if the dimensions are landscape, False otherwise.
+    """
+    width, height = dimensions
+    return width / height >= min_ratio
+
+def get_image_dimensions(image_data: Union[bytes, 'DecodedImage']) -> Optional[Tuple[int, int]]:
     """
     Get the dimensions of an image from its binary data.
     
     Args:
-        image_data: The image data as bytes.
+        image_data: The image data as bytes, or a DecodedImage.
         
     Returns:
         A tuple of (width, height) if successful, None otherwise.
     """
     try:
+        if not isinstance(image_data, (bytes, bytearray)):
+            return image_data.size
         img = Image.open(BytesIO(image_data))
         return img.size
     except Exception as e:
         logger.error(f"Error getting image dimensions: {e}")
         return None
 
-def is_landscape(image_data: bytes, min_ratio: float = 1.2) -> bool:
+def is_landscape(image_data: Union[bytes, 'DecodedImage'], min_ratio: float = 1.2) -> bool:
     """
     Check if an image is in landscape orientation.
     
     Args:
-        image_data: The image data as bytes.
+        image_data: The image data as bytes, or a DecodedImage.
         min_ratio: The minimum width-to-height ratio to consider as landscape.
                   Default is 1.2 (20% wider than tall).
         
@@ -73,40 +262,86 @@ def is_landscape(image_data: bytes, min_ratio: float = 1.2) -> bool:
     if not dimensions:
         return False
         
-    width, height = dimensions
-    return width / height >= min_ratio
+    return is_landscape_dimensions(dimensions, min_ratio)
 
-def get_image_metadata(image_data: bytes) -> Dict[str, Any]:
+def get_image_metadata(image_data: Union[bytes, 'DecodedImage']) -> Dict[str, Any]:
     """
     Extract metadata from an image.
     
     Args:
-        image_data: The image data as bytes.
+        image_data: The image data as bytes, or a DecodedImage.
         
     Returns:
         A dictionary containing metadata about the image.
     """
+    from .decoded_image import as_decoded_image
+    
     metadata = {}
     try:
-        img = Image.open(BytesIO(image_data))
-        metadata['format'] = img.format
-        metadata['mode'] = img.mode
-        metadata['width'], metadata['height'] = img.size
+        image = as_decoded_image(image_data)
+        metadata['format'] = image.format
+        metadata['mode'] = image.mode
+        metadata['width'], metadata['height'] = image.size
         metadata['aspect_ratio'] = metadata['width'] / metadata['height']
         
         # Extract EXIF data if available
-        if hasattr(img, '_getexif') and img._getexif():
-            exif = {
-                ExifTags.TAGS[k]: v
-                for k, v in img._getexif().items()
-                if k in ExifTags.TAGS
-            }
-            metadata['exif'] = exif
+        if image.exif:
+            metadata['exif'] = image.exif
     except Exception as e:
         logger.error(f"Error extracting image metadata: {e}")
     
     return metadata
 
+def prepare_vision_payload(image_data: Union[bytes, 'DecodedImage'],
+                           max_edge: int = 1024,
+                           quality: int = 85) -> bytes:
+    """
+    Downscale and re-encode an image for upload to a vision API.
+    
+    Images whose long edge already fits within max_edge are returned unchanged.
+    Larger images are decoded at reduced scale where the format allows it
+    (JPEG DCT scaling), resized so the long edge equals max_edge, and encoded
+    as JPEG. The original image is left untouched, so quality scoring can keep
+    using its full-resolution dimensions.
+    
+    Args:
+        image_data: The image data as bytes, or a DecodedImage.
+        max_edge: Maximum long-edge size in pixels. 0 or None disables resizing.
+        quality: JPEG quality of the re-encoded payload.
+        
+    Returns:
+        The bytes to send to the vision API.
+    """
+    from .decoded_image import as_decoded_image
+    
+    image = as_decoded_image(image_data)
+    data = image.data
+    if not max_edge:
+        return data
+    
+    try:
+        if max(image.size) <= max_edge:
+            return data
+        
+        # Open a separate PIL image: draft() changes the decode scale and must
+        # not affect the carrier's full-resolution view
+        img = Image.open(BytesIO(data))
+        img.draft('RGB', (max_edge, max_edge))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=quality, optimize=True)
+        payload = buffer.getvalue()
+        
+        # Re-encoding a small but heavily compressed original can grow it
+        return payload if len(payload) < len(data) else data
+    except Exception as e:
+        logger.warning(f"Could not downscale image for vision analysis, sending original: {e}")
+        return data
+
 def create_storage_structure(base_dir: str) -> Dict[str, str]:
     """
     Create a directory structure for storing images and metadata.
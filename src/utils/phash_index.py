@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Perceptual Hash Near-Duplicate Index
+
+Finds images that look the same as one already accepted even when the post,
+URL or bytes differ (reposts, re-uploads, recompression, light edits).
+
+Each image gets a 64-bit pHash (low frequencies of a 32x32 DCT) and a 64-bit
+dHash (horizontal gradient signs). Lookups use multi-index hashing: the pHash
+is split into max_distance + 1 chunks, and by the pigeonhole principle any
+hash within max_distance bits matches at least one chunk exactly, so a query
+only compares against the few entries sharing a chunk instead of scanning
+the whole index. A candidate is a duplicate when both its pHash and dHash
+are within max_distance; the dHash check rejects pHash collisions between
+different low-texture images such as plain skies.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+# pHash input size, and the low-frequency block of the DCT that is hashed
+PHASH_IMAGE_SIZE = 32
+PHASH_DCT_SIZE = 8
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix."""
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+_DCT = _dct_matrix(PHASH_IMAGE_SIZE)
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    """Pack a boolean array into an integer, first element as the highest bit."""
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+def compute_hashes(image: Union['DecodedImage', Image.Image, str]) -> Tuple[int, int]:
+    """
+    Compute the perceptual hashes of an image.
+
+    Args:
+        image: DecodedImage (decoded at reduced scale for speed), PIL image or path.
+
+    Returns:
+        Tuple of (phash, dhash), each a 64-bit unsigned integer.
+    """
+    if isinstance(image, str):
+        from .decoded_image import DecodedImage
+        image = DecodedImage.from_path(image)
+    if isinstance(image, Image.Image):
+        gray = image.convert('L')
+    else:
+        gray = Image.fromarray(image.draft_gray(PHASH_IMAGE_SIZE * 4))
+
+    # pHash: sign of the low-frequency DCT coefficients against their median
+    small = np.asarray(gray.resize((PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE), Image.LANCZOS), dtype=np.float64)
+    dct = (_DCT @ small @ _DCT.T)[:PHASH_DCT_SIZE, :PHASH_DCT_SIZE]
+    phash = _bits_to_int(dct > np.median(dct.ravel()[1:]))
+
+    # dHash: whether each pixel is brighter than its right-hand neighbour
+    small = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    dhash = _bits_to_int(small[:, 1:] > small[:, :-1])
+
+    return phash, dhash
+
+def _to_signed(value: int) -> int:
+    """Map an unsigned 64-bit hash to SQLite's signed INTEGER range."""
+    return value - (1 << HASH_BITS) if value >= (1 << (HASH_BITS - 1)) else value
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+class PerceptualHashIndex:
+    """
+    Persistent near-duplicate index over perceptual hashes, with multi-index Hamming lookup.
+    """
+
+    def __init__(self, db_path: str, max_distance: int = 6):
+        """
+        Initialize the index, loading every stored hash into memory.
+
+        Args:
+            db_path: Path of the SQLite database holding the hashes.
+            max_distance: Largest Hamming distance (in bits, for both pHash and
+                          dHash) at which two images count as duplicates.
+        """
+        self.db_path = db_path
+        self.max_distance = max_distance
+
+        # Bit ranges of the pHash chunks: max_distance + 1 near-equal slices
+        chunk_count = max_distance + 1
+        bounds = [round(i * HASH_BITS / chunk_count) for i in range(chunk_count + 1)]
+        self._chunks = [(HASH_BITS - end, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+
+        self._entries = []   # (phash, dhash, image_id, label)
+        self._phashes = []   # entry pHashes alone, for the lookup's inner loop
+        self._tables = [{} for _ in self._chunks]  # chunk value -> entry positions
+        self._ids = set()
+        self._lock = threading.RLock()
+
+        self.lookups = 0
+        self.duplicates_found = 0
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS image_hashes (
+                image_id TEXT PRIMARY KEY,
+                phash INTEGER NOT NULL,
+                dhash INTEGER NOT NULL,
+                label TEXT,
+                added_at REAL NOT NULL
+            )
+        ''')
+
+        for image_id, phash, dhash, label in self._conn.execute(
+                'SELECT image_id, phash, dhash, label FROM image_hashes'):
+            self._insert(image_id, _to_unsigned(phash), _to_unsigned(dhash), label)
+
+        logger.info(f"Perceptual hash index opened at {db_path} with {len(self._entries)} images "
+                    f"(max distance {max_distance})")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, image_id: str) -> bool:
+        return image_id in self._ids
+
+    def _chunk_values(self, phash: int) -> List[int]:
+        return [(phash >> shift) & mask for shift, mask in self._chunks]
+
+    def _insert(self, image_id: str, phash: int, dhash: int, label: Optional[str]):
+        """Add an entry to the in-memory tables."""
+        position = len(self._entries)
+        self._entries.append((phash, dhash, image_id, label))
+        self._phashes.append(phash)
+        self._ids.add(image_id)
+        for table, value in zip(self._tables, self._chunk_values(phash)):
+            table.setdefault(value, []).append(position)
+
+    def add(self, image_id: str, phash: int, dhash: int, label: str = None):
+        """
+        Add an image to the index (no-op if image_id is already present).
+
+        Args:
+            image_id: Tracker image id.
+            phash: 64-bit pHash from compute_hashes.
+            dhash: 64-bit dHash from compute_hashes.
+            label: Human-readable reference returned with matches (e.g. shortcode).
+        """
+        with self._lock:
+            if image_id in self._ids:
+                return
+            self._conn.execute(
+                'INSERT OR IGNORE INTO image_hashes (image_id, phash, dhash, label, added_at) VALUES (?, ?, ?, ?, ?)',
+                (image_id, _to_signed(phash), _to_signed(dhash), label, time.time())
+            )
+            self._insert(image_id, phash, dhash, label)
+
+    def find_duplicate(self, phash: int, dhash: int) -> Optional[Dict[str, Any]]:
+        """
+        Find the closest indexed image within max_distance of the given hashes.
+
+        Args:
+            phash: 64-bit pHash from compute_hashes.
+            dhash: 64-bit dHash from compute_hashes.
+
+        Returns:
+            Dictionary with 'image_id', 'label', 'phash_distance' and
+            'dhash_distance' of the best match, or None.
+        """
+        with self._lock:
+            self.lookups += 1
+            phashes = self._phashes
+            max_distance = self.max_distance
+            best = None
+            best_distance = None
+            for table, value in zip(self._tables, self._chunk_values(phash)):
+                for position in table.get(value, ()):
+                    # An entry matching several chunks is seen more than once; only the best match is kept
+                    phash_distance = (phashes[position] ^ phash).bit_count()
+                    if phash_distance > max_distance:
+                        continue
+                    entry_phash, entry_dhash, image_id, label = self._entries[position]
+                    dhash_distance = (entry_dhash ^ dhash).bit_count()
+                    if dhash_distance > max_distance:
+                        continue
+                    if best_distance is None or phash_distance + dhash_distance < best_distance:
+                        best_distance = phash_distance + dhash_distance
+                        best = {
+                            'image_id': image_id,
+                            'label': label,
+                            'phash_distance': phash_distance,
+                            'dhash_distance': dhash_distance
+                        }
+            if best is not None:
+                self.duplicates_found += 1
+            return best
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with image count, lookups and duplicates found in this process.
+        """
+        with self._lock:
+            return {
+                'images': len(self._entries),
+                'lookups': self.lookups,
+                'duplicates_found': self.duplicates_found,
+                'max_distance': self.max_distance
+            }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Background GCS Upload Queue
+
+Uploads files to GCS on a thread pool so the download and image processing
+pipeline never waits on the network. Failed uploads are retried with
+exponential backoff, and large files are sent as chunked resumable uploads.
+
+Every queued upload is first appended to a JSONL journal and marked done
+once it completes; uploads still pending when a run is interrupted are
+found in the journal and resubmitted when the next queue starts.
+"""
+
+import os
+import json
+import time
+import uuid
+import atexit
+import random
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_shared_queue = None
+_shared_queue_lock = threading.Lock()
+
+class UploadQueue:
+    """
+    Thread pool of GCS uploads with retries and a durable pending-uploads journal.
+    """
+
+    def __init__(self,
+                 gcs: 'GCSStorage',
+                 journal_path: str,
+                 max_workers: int = 4,
+                 max_retries: int = 5,
+                 backoff_factor: float = 1.0,
+                 backoff_max: float = 60.0,
+                 chunk_size: int = 8 * 1024 * 1024,
+                 resume: bool = True):
+        """
+        Initialize the queue.
+
+        Args:
+            gcs: GCS client to upload with.
+            journal_path: Path of the JSONL pending-uploads journal.
+            max_workers: Number of concurrent uploads.
+            max_retries: Retries per upload after the first attempt.
+            backoff_factor: Base delay in seconds; attempt n waits about
+                            backoff_factor * 2**n, with jitter.
+            backoff_max: Upper bound of a single retry delay in seconds.
+            chunk_size: Files larger than this are uploaded as resumable uploads
+                        in chunks of this size (rounded to 256 KB). 0 disables.
+            resume: Whether to resubmit uploads left pending in the journal.
+        """
+        self.gcs = gcs
+        self.journal_path = journal_path
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.chunk_size = (chunk_size // (256 * 1024)) * 256 * 1024 if chunk_size else 0
+
+        self.stats = {'queued': 0, 'resumed': 0, 'uploaded': 0, 'failed': 0, 'retries': 0, 'bytes': 0}
+
+        self._lock = threading.Lock()
+        self._pending = {}  # upload id -> Future
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gcs-upload')
+
+        os.makedirs(os.path.dirname(journal_path) or '.', exist_ok=True)
+        leftover = self._compact_journal()
+        self._journal = open(journal_path, 'a')
+
+        if resume and leftover:
+            logger.info(f"Resuming {len(leftover)} uploads left pending by an earlier run")
+            for entry in leftover:
+                self._submit(entry, resumed=True)
+
+    def _compact_journal(self) -> List[Dict[str, Any]]:
+        """Read the journal, rewrite it with only the pending entries, and return them."""
+        entries = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Partially written last line of an interrupted run
+                        continue
+                    if record.get('op') == 'add':
+                        entries[record['id']] = record
+                    else:
+                        entries.pop(record.get('id'), None)
+
+        temp_path = f"{self.journal_path}.tmp"
+        with open(temp_path, 'w') as f:
+            for record in entries.values():
+                f.write(json.dumps(record) + '\n')
+        os.replace(temp_path, self.journal_path)
+        return list(entries.values())
+
+    def _write_journal(self, record: Dict[str, Any]):
+        """Append a record to the journal and flush it to disk."""
+        with self._lock:
+            self._journal.write(json.dumps(record) + '\n')
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+    def enqueue(self, source_file_path: str, destination_blob_name: str,
+                content_type: str = None, delete_source: bool = False) -> Future:
+        """
+        Queue a file for upload.
+
+        Args:
+            source_file_path: Path to the local file to upload.
+            destination_blob_name: Name to give the file in GCS.
+            content_type: MIME type of the file (guessed by GCS if None).
+            delete_source: Whether to delete the local file once uploaded.
+
+        Returns:
+            Future resolving to True if the upload succeeded, False otherwise.
+        """
+        entry = {
+            'op': 'add',
+            'id': uuid.uuid4().hex,
+            'source': os.path.abspath(source_file_path),
+            'destination': destination_blob_name,
+            'content_type': content_type,
+            'delete_source': delete_source,
+            'queued_at': time.time()
+        }
+        self._write_journal(entry)
+        return self._submit(entry)
+
+    def _submit(self, entry: Dict[str, Any], resumed: bool = False) -> Future:
+        """Hand a journaled entry to the thread pool."""
+        with self._lock:
+            self.stats['resumed' if resumed else 'queued'] += 1
+            future = self._executor.submit(self._run, entry)
+            self._pending[entry['id']] = future
+        future.add_done_callback(lambda _: self._forget(entry['id']))
+        return future
+
+    def _forget(self, upload_id: str):
+        with self._lock:
+            self._pending.pop(upload_id, None)
+
+    def _run(self, entry: Dict[str, Any]) -> bool:
+        """Upload one entry with retries (runs on a pool thread)."""
+        source = entry['source']
+        destination = entry['destination']
+
+        if not os.path.exists(source):
+            logger.error(f"Upload source {source} no longer exists; dropping upload to {destination}")
+            with self._lock:
+                self.stats['failed'] += 1
+            self._finish(entry, 'dropped')
+            return False
+
+        size = os.path.getsize(source)
+        chunk_size = self.chunk_size if self.chunk_size and size > self.chunk_size else None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                delay = min(self.backoff_max, self.backoff_factor * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.5)
+                logger.warning(f"Retrying upload of {source} to {destination} in {delay:.1f}s "
+                               f"(attempt {attempt + 1}/{self.max_retries + 1})")
+                with self._lock:
+                    self.stats['retries'] += 1
+                time.sleep(delay)
+
+            if self.gcs.upload_file(source, destination, content_type=entry.get('content_type'),
+                                    chunk_size=chunk_size):
+                with self._lock:
+                    self.stats['uploaded'] += 1
+                    self.stats['bytes'] += size
+                if entry.get('delete_source'):
+                    try:
+                        os.remove(source)
+                    except OSError as e:
+                        logger.warning(f"Could not delete uploaded file {source}: {e}")
+                self._finish(entry, 'done')
+                return True
+
+        # Left pending in the journal, so the next run tries again
+        logger.error(f"Giving up uploading {source} to {destination} after {self.max_retries + 1} attempts; "
+                     f"it will be retried on the next run")
+        with self._lock:
+            self.stats['failed'] += 1
+        return False
+
+    def _finish(self, entry: Dict[str, Any], op: str):
+        """Record in the journal that an upload is no longer pending."""
+        self._write_journal({'op': op, 'id': entry['id'], 'finished_at': time.time()})
+
+    def pending_count(self) -> int:
+        """Number of uploads queued or in progress."""
+        with self._lock:
+            return len(self._pending)
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Wait for every queued upload to finish.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            True if no uploads are left pending.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                futures = list(self._pending.values())
+            if not futures:
+                return True
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                return False
+            wait(futures, timeout=remaining)
+
+    def close(self, wait_for_uploads: bool = True):
+        """
+        Stop the queue.
+
+        Args:
+            wait_for_uploads: Whether to finish pending uploads first. Uploads
+                              not finished stay in the journal for the next run.
+        """
+        if wait_for_uploads:
+            self.wait()
+        self._executor.shutdown(wait=wait_for_uploads, cancel_futures=not wait_for_uploads)
+        with self._lock:
+            if not self._journal.closed:
+                self._journal.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get upload statistics.
+
+        Returns:
+            Dictionary with queued, resumed, uploaded, failed, retries, bytes
+            and pending counts.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+        return stats
+
+def get_upload_queue(gcs: 'GCSStorage' = None) -> Optional[UploadQueue]:
+    """
+    Get the shared upload queue, creating it on first use.
+
+    The queue finishes its pending uploads when the interpreter exits.
+
+    Args:
+        gcs: GCS client to upload with when the queue is created.
+
+    Returns:
+        The shared queue, or None if background uploads are disabled in
+        config or GCS is unavailable.
+    """
+    from .. import config
+    from .gcs_storage import GCSStorage
+
+    global _shared_queue
+    if not getattr(config, 'UPLOAD_QUEUE_ENABLED', False):
+        return None
+    if _shared_queue is None:
+        with _shared_queue_lock:
+            if _shared_queue is None:
+                if gcs is None:
+                    gcs = GCSStorage()
+                if not gcs.is_available():
+                    return None
+                try:
+                    _shared_queue = UploadQueue(
+                        gcs,
+                        getattr(config, 'UPLOAD_JOURNAL_PATH', os.path.join('data', 'cache', 'upload_journal.jsonl')),
+                        max_workers=getattr(config, 'UPLOAD_MAX_WORKERS', 4),
+                        max_retries=getattr(config, 'UPLOAD_MAX_RETRIES', 5),
+                        backoff_factor=getattr(config, 'UPLOAD_BACKOFF_FACTOR', 1.0),
+                        chunk_size=getattr(config, 'UPLOAD_CHUNK_SIZE_MB', 8) * 1024 * 1024
+                    )
+                    atexit.register(_shared_queue.close)
+                except Exception as e:
+                    logger.error(f"Error starting upload queue: {e}")
+                    return None
+    return _shared_queue
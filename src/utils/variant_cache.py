@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Print Variant Cache
+
+Content-addressed record of rendered print variants. Each render is keyed by
+a hash of the source image file plus a canonical hash of every parameter
+that affects the output (enhancement, size, DPI, fit method, format and
+encoder options), so re-processing an unchanged image with unchanged
+presets reuses the existing files, and editing a preset only re-renders the
+variants it affects.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_shared_cache = None
+_shared_cache_pid = None
+_shared_cache_lock = threading.Lock()
+
+class VariantCache:
+    """
+    SQLite-backed map from render keys to the files holding those renders.
+
+    One render may be stored at several paths (e.g. the same file for two
+    materials with equal DPI and format); each path holds at most one render.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: Path of the SQLite cache database.
+        """
+        self.db_path = db_path
+
+        # Hit/miss counters for this process
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS variant_renders (
+                render_key TEXT NOT NULL,
+                local_path TEXT NOT NULL,
+                gcs_path TEXT,
+                params TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (render_key, local_path)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_variant_renders_local_path ON variant_renders (local_path)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_variant_renders_gcs_path ON variant_renders (gcs_path)')
+
+        logger.info(f"Variant cache opened at {db_path}")
+
+    @staticmethod
+    def make_key(source_hash: str, params: Dict[str, Any]) -> str:
+        """
+        Build the render key for a source image and render parameters.
+
+        Args:
+            source_hash: Hash of the source image file (see hash_file).
+            params: Every parameter that affects the rendered output.
+
+        Returns:
+            The render key.
+        """
+        canonical = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+        params_hash = hashlib.sha256(canonical.encode()).hexdigest()[:32]
+        return f"{source_hash}:{params_hash}"
+
+    def get(self, render_key: str, preferred_path: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up where a render is stored.
+
+        Args:
+            render_key: Key from make_key.
+            preferred_path: Local path to return if the render is stored there.
+
+        Returns:
+            Dictionary with 'local_path' and 'gcs_path', or None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT local_path, gcs_path FROM variant_renders WHERE render_key = ? '
+                'ORDER BY local_path = ? DESC, created_at DESC LIMIT 1',
+                (render_key, preferred_path)
+            ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {'local_path': row[0], 'gcs_path': row[1]}
+
+    def put(self, render_key: str, local_path: str, gcs_path: str = None,
+            params: Dict[str, Any] = None):
+        """
+        Record where a render is stored.
+
+        Any other render recorded at the same paths is forgotten, since the
+        file there has just been overwritten.
+
+        Args:
+            render_key: Key from make_key.
+            local_path: Local file holding the render.
+            gcs_path: GCS blob holding the render.
+            params: The render parameters, kept for inspection.
+        """
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM variant_renders WHERE local_path = ? AND render_key != ?',
+                (local_path, render_key)
+            )
+            if gcs_path:
+                self._conn.execute(
+                    'DELETE FROM variant_renders WHERE gcs_path = ? AND render_key != ?',
+                    (gcs_path, render_key)
+                )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO variant_renders (render_key, local_path, gcs_path, params, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (render_key, local_path, gcs_path,
+                 json.dumps(params, sort_keys=True, default=str) if params is not None else None,
+                 time.time())
+            )
+
+    def delete(self, render_key: str, local_path: str = None):
+        """Forget a render (only its copy at local_path, if given), e.g. because the file has disappeared."""
+        with self._lock:
+            if local_path:
+                self._conn.execute(
+                    'DELETE FROM variant_renders WHERE render_key = ? AND local_path = ?', (render_key, local_path)
+                )
+            else:
+                self._conn.execute('DELETE FROM variant_renders WHERE render_key = ?', (render_key,))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with entry count and this process's hit/miss counters.
+        """
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM variant_renders').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups * 100) if lookups > 0 else 0
+        }
+
+    def clear(self):
+        """Forget all renders."""
+        with self._lock:
+            self._conn.execute('DELETE FROM variant_renders')
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Hash a file's contents.
+
+    Args:
+        path: Path of the file.
+        chunk_size: Bytes read at a time.
+
+    Returns:
+        Hex SHA-256 digest of the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_variant_cache() -> Optional[VariantCache]:
+    """
+    Get this process's variant cache, creating it on first use.
+
+    Worker processes forked after the cache was opened get their own
+    connection rather than sharing the parent's.
+
+    Returns:
+        The shared cache, or None if caching is disabled in config.
+    """
+    from .. import config
+
+    global _shared_cache, _shared_cache_pid
+    if not getattr(config, 'VARIANT_CACHE_ENABLED', True):
+        return None
+    if _shared_cache is None or _shared_cache_pid != os.getpid():
+        with _shared_cache_lock:
+            if _shared_cache is None or _shared_cache_pid != os.getpid():
+                try:
+                    _shared_cache = VariantCache(
+                        getattr(config, 'VARIANT_CACHE_PATH', os.path.join('data', 'cache', 'variant_renders.db'))
+                    )
+                    _shared_cache_pid = os.getpid()
+                except Exception as e:
+                    logger.error(f"Error opening variant cache: {e}")
+                    return None
+    return _shared_cache
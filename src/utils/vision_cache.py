@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Vision Result Cache
+
+Persistent, content-addressed cache of Google Vision results. Entries are
+keyed by a hash of the exact bytes sent to Vision plus the requested feature
+set, so re-analyzing an identical image never pays for a second API call.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+class VisionResultCache:
+    """
+    SQLite-backed LRU cache for Vision analysis results with a TTL.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 50000, ttl_seconds: float = 30 * 24 * 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: Path of the SQLite cache database.
+            max_entries: Maximum number of cached results; least recently used
+                         entries are evicted beyond this.
+            ttl_seconds: Age after which a cached result is ignored and dropped.
+                         0 or None disables expiry.
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # Hit/miss counters for this process
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS vision_results (
+                cache_key TEXT PRIMARY KEY,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_vision_results_last_access ON vision_results (last_access)')
+
+        logger.info(f"Vision result cache opened at {db_path} (max_entries={max_entries}, ttl={ttl_seconds}s)")
+
+    @staticmethod
+    def make_key(content: bytes, feature_key: str) -> str:
+        """
+        Build the cache key for an image payload and feature set.
+
+        Args:
+            content: The exact image bytes sent to Vision.
+            feature_key: Canonical description of the requested features.
+
+        Returns:
+            The cache key.
+        """
+        content_hash = hashlib.sha256(content).hexdigest()
+        feature_hash = hashlib.sha256(feature_key.encode()).hexdigest()[:16]
+        return f"{content_hash}:{feature_hash}"
+
+    def get(self, content: bytes, feature_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up cached results for an image payload.
+
+        Args:
+            content: The exact image bytes that would be sent to Vision.
+            feature_key: Canonical description of the requested features.
+
+        Returns:
+            The cached results, or None on a miss.
+        """
+        cache_key = self.make_key(content, feature_key)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT results, created_at FROM vision_results WHERE cache_key = ?', (cache_key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            results, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute('DELETE FROM vision_results WHERE cache_key = ?', (cache_key,))
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                'UPDATE vision_results SET last_access = ? WHERE cache_key = ?', (now, cache_key)
+            )
+            self.hits += 1
+
+        return json.loads(results)
+
+    def put(self, content: bytes, feature_key: str, results: Dict[str, Any]):
+        """
+        Store results for an image payload, evicting least recently used entries if needed.
+
+        Args:
+            content: The exact image bytes sent to Vision.
+            feature_key: Canonical description of the requested features.
+            results: The parsed Vision results.
+        """
+        cache_key = self.make_key(content, feature_key)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO vision_results (cache_key, results, created_at, last_access) '
+                'VALUES (?, ?, ?, ?)',
+                (cache_key, json.dumps(results, default=str), now, now)
+            )
+
+            if self.max_entries:
+                count = self._conn.execute('SELECT COUNT(*) FROM vision_results').fetchone()[0]
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        'DELETE FROM vision_results WHERE cache_key IN ('
+                        'SELECT cache_key FROM vision_results ORDER BY last_access LIMIT ?)',
+                        (overflow,)
+                    )
+                    self.evictions += overflow
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with entry count and this process's hit/miss counters.
+        """
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM vision_results').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits / lookups * 100) if lookups > 0 else 0
+        }
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._conn.execute('DELETE FROM vision_results')
+
+def get_vision_cache() -> Optional[VisionResultCache]:
+    """
+    Get the shared Vision result cache, creating it on first use.
+
+    Returns:
+        The shared cache, or None if caching is disabled in config.
+    """
+    from .. import config
+
+    global _shared_cache
+    if not getattr(config, 'VISION_CACHE_ENABLED', True):
+        return None
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                try:
+                    _shared_cache = VisionResultCache(
+                        getattr(config, 'VISION_CACHE_PATH', os.path.join('data', 'cache', 'vision_results.db')),
+                        max_entries=getattr(config, 'VISION_CACHE_MAX_ENTRIES', 50000),
+                        ttl_seconds=getattr(config, 'VISION_CACHE_TTL_SECONDS', 30 * 24 * 3600)
+                    )
+                except Exception as e:
+                    logger.error(f"Error opening Vision result cache: {e}")
+                    return None
+    return _shared_cache
+
+def vision_feature_key(namespace: str, features: list) -> str:
+    """
+    Build a canonical key for a Vision feature request.
+
+    Args:
+        namespace: Identifies the caller, since callers parse responses differently.
+        features: List of vision.Feature objects.
+
+    Returns:
+        A stable string describing the feature set.
+    """
+    parts = sorted(f"{int(feature.type_)}:{feature.max_results}" for feature in features)
+    return f"{namespace}|{','.join(parts)}"